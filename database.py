@@ -1,8 +1,27 @@
 import sqlite3
 import os
-from datetime import datetime
+from datetime import datetime, timedelta
 from typing import List, Dict, Optional, Tuple
 from src.path_manager import get_database_path
+from src.recurrences import occurrences
+
+# Durée d'un rendez-vous sans durée précisée (minutes)
+DUREE_RDV_DEFAUT = 30
+
+# Période sur laquelle une nouvelle série sans fin est comparée aux autres séries
+# (jours) ; les rendez-vous enregistrés sont comparés sans limite de date
+HORIZON_SERIES_JOURS = 3660
+
+# Issues d'un rendez-vous cumulées dans statistiques_rendez_vous
+STATUTS_ISSUE = ('termine', 'annule', 'absent')
+
+# Axes des cumuls : expression SQL de la valeur ({r} = ligne du rendez-vous)
+DIMENSIONS_STATISTIQUES = {
+    'patient': "{r}.patient_id",
+    'jour_semaine': "strftime('%w', {r}.date_rdv)",
+    'heure': "substr({r}.heure_rdv, 1, 2)",
+    'type': "{r}.type_rdv"
+}
 
 class DatabaseManager:
     """Gestionnaire de base de données SQLite pour DentalSoft"""
@@ -16,6 +35,9 @@ class DatabaseManager:
         # Utiliser path_manager pour obtenir le chemin de la base
         self.db_path = db_path if db_path else get_database_path()
         
+        # Abonnés au flux des changements (voir abonner_changements)
+        self._observateurs = []
+        
         # Plus besoin de créer manuellement les dossiers (path_manager s'en charge)
         # Initialiser la base de données
         self.init_database()
@@ -59,9 +81,49 @@ class DatabaseManager:
                     description TEXT,
                     statut TEXT DEFAULT 'planifie',
                     date_creation TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    duree INTEGER DEFAULT 30,
+                    fauteuil INTEGER DEFAULT 1,
+                    FOREIGN KEY (patient_id) REFERENCES patients (id)
+                )
+            ''')
+            self._migrer_table_rendez_vous(cursor)
+            self._creer_statistiques_rendez_vous(cursor)
+            
+            # Séries de rendez-vous récurrents : une règle, occurrences calculées à l'affichage
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS rendez_vous_recurrents (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    patient_id INTEGER NOT NULL,
+                    date_debut DATE NOT NULL,
+                    date_fin DATE,
+                    frequence TEXT NOT NULL,
+                    intervalle INTEGER DEFAULT 1,
+                    heure_rdv TIME NOT NULL,
+                    duree INTEGER DEFAULT 30,
+                    fauteuil INTEGER DEFAULT 1,
+                    type_rdv TEXT NOT NULL,
+                    description TEXT,
+                    date_creation TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                     FOREIGN KEY (patient_id) REFERENCES patients (id)
                 )
             ''')
+            # Occurrences supprimées ou remplacées par un rendez-vous modifié
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS exceptions_recurrence (
+                    recurrence_id INTEGER NOT NULL,
+                    date_occurrence DATE NOT NULL,
+                    PRIMARY KEY (recurrence_id, date_occurrence),
+                    FOREIGN KEY (recurrence_id) REFERENCES rendez_vous_recurrents (id)
+                )
+            ''')
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_rendez_vous_recurrents_periode
+                ON rendez_vous_recurrents (date_debut, date_fin)
+            ''')
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_rendez_vous_recurrents_patient
+                ON rendez_vous_recurrents (patient_id)
+            ''')
             
             # Table des examens dentaires
             cursor.execute('''
@@ -87,9 +149,29 @@ class DatabaseManager:
                     chemin_fichier TEXT NOT NULL,
                     description TEXT,
                     date_creation TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    date_capture TIMESTAMP,
+                    largeur INTEGER,
+                    hauteur INTEGER,
+                    profondeur_bits INTEGER,
+                    taille_fichier INTEGER,
+                    hash_fichier TEXT,
+                    hash_perceptuel INTEGER,
+                    empreinte_calculee INTEGER DEFAULT 0,
+                    archive TEXT,
+                    date_dernier_acces TIMESTAMP,
                     FOREIGN KEY (patient_id) REFERENCES patients (id)
                 )
             ''')
+            self._migrer_table_imagerie(cursor)
+            
+            # Membres d'archives d'images supprimés, retirés des ZIP au prochain archivage
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS membres_archives_retires (
+                    archive TEXT NOT NULL,
+                    membre TEXT NOT NULL,
+                    PRIMARY KEY (archive, membre)
+                )
+            ''')
             
             # Table des ordonnances
             cursor.execute('''
@@ -178,6 +260,39 @@ class DatabaseManager:
                 )
             ''')
             
+            # File des documents PDF à générer en arrière-plan
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS travaux_pdf (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    type_document TEXT NOT NULL,
+                    fichier TEXT NOT NULL,
+                    donnees TEXT NOT NULL,
+                    statut TEXT DEFAULT 'en attente',
+                    tentatives INTEGER DEFAULT 0,
+                    erreur TEXT,
+                    date_creation TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    date_prochain_essai TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_travaux_pdf_statut
+                ON travaux_pdf (statut, date_prochain_essai)
+            ''')
+            
+            # Rappels déjà écrits dans la boîte d'envoi (une ligne par séance et horaire)
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS rappels_envoyes (
+                    cle TEXT PRIMARY KEY,
+                    date_rdv DATE NOT NULL,
+                    fichier TEXT,
+                    date_envoi TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_rappels_envoyes_date
+                ON rappels_envoyes (date_rdv)
+            ''')
+            
             conn.commit()
             
             # Insérer les actes dentaires de base si la table est vide
@@ -189,6 +304,124 @@ class DatabaseManager:
         finally:
             conn.close()
     
+    def _migrer_table_imagerie(self, cursor):
+        """Ajoute les colonnes de métadonnées et les index aux bases existantes"""
+        cursor.execute("PRAGMA table_info(imagerie)")
+        colonnes = {row['name'] for row in cursor.fetchall()}
+        
+        nouvelles_colonnes = [
+            ("date_capture", "TIMESTAMP"),
+            ("largeur", "INTEGER"),
+            ("hauteur", "INTEGER"),
+            ("profondeur_bits", "INTEGER"),
+            ("taille_fichier", "INTEGER"),
+            ("hash_fichier", "TEXT"),
+            ("hash_perceptuel", "INTEGER"),
+            ("empreinte_calculee", "INTEGER DEFAULT 0"),
+            ("archive", "TEXT"),
+            ("date_dernier_acces", "TIMESTAMP")
+        ]
+        for nom, type_sql in nouvelles_colonnes:
+            if nom not in colonnes:
+                cursor.execute(f"ALTER TABLE imagerie ADD COLUMN {nom} {type_sql}")
+        
+        # Images antérieures : la date d'ajout tient lieu de date de prise de vue
+        # (date_creation est en UTC, les dates EXIF en heure locale)
+        cursor.execute("UPDATE imagerie SET date_capture = datetime(date_creation, 'localtime') WHERE date_capture IS NULL")
+        
+        # Empreintes calculées avant l'ajout de l'indicateur
+        if "empreinte_calculee" not in colonnes:
+            cursor.execute("UPDATE imagerie SET empreinte_calculee = 1 WHERE hash_perceptuel IS NOT NULL")
+        
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_imagerie_patient_date ON imagerie (patient_id, date_capture)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_imagerie_patient_type ON imagerie (patient_id, type_image, date_capture)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_imagerie_hash ON imagerie (hash_fichier)")
+    
+    def _migrer_table_rendez_vous(self, cursor):
+        """Ajoute durée, fauteuil et rattachement aux séries aux bases existantes, et les index de l'agenda"""
+        cursor.execute("PRAGMA table_info(rendez_vous)")
+        colonnes = {row['name'] for row in cursor.fetchall()}
+        
+        if "duree" not in colonnes:
+            cursor.execute(f"ALTER TABLE rendez_vous ADD COLUMN duree INTEGER DEFAULT {DUREE_RDV_DEFAUT}")
+        if "fauteuil" not in colonnes:
+            cursor.execute("ALTER TABLE rendez_vous ADD COLUMN fauteuil INTEGER DEFAULT 1")
+        # Séance d'une série enregistrée à part (statut propre, modification) : série et date d'origine
+        if "recurrence_id" not in colonnes:
+            cursor.execute("ALTER TABLE rendez_vous ADD COLUMN recurrence_id INTEGER")
+        if "date_occurrence" not in colonnes:
+            cursor.execute("ALTER TABLE rendez_vous ADD COLUMN date_occurrence DATE")
+        
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_rendez_vous_date ON rendez_vous (date_rdv, heure_rdv)")
+        # Détection des chevauchements : un fauteuil, un jour, créneaux commençant avant la fin
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_rendez_vous_fauteuil ON rendez_vous (fauteuil, date_rdv, heure_rdv)")
+        # Agenda filtré sur un patient et prochains rendez-vous d'un patient
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_rendez_vous_patient ON rendez_vous (patient_id, date_rdv, heure_rdv)")
+    
+    def _creer_statistiques_rendez_vous(self, cursor):
+        """
+        Cumuls des issues (terminé, annulé, absent) par patient, jour, heure et type
+        
+        Tenus à jour par déclencheurs à chaque écriture dans rendez_vous : une
+        modification retire l'ancienne ligne des cumuls et ajoute la nouvelle.
+        Les cumuls sont reconstruits une seule fois, à la création de la table.
+        """
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'statistiques_rendez_vous'")
+        existait = cursor.fetchone() is not None
+        
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS statistiques_rendez_vous (
+                dimension TEXT NOT NULL,
+                valeur,
+                termines INTEGER DEFAULT 0,
+                annules INTEGER DEFAULT 0,
+                absents INTEGER DEFAULT 0,
+                PRIMARY KEY (dimension, valeur)
+            )
+        ''')
+        
+        statuts = ", ".join(f"'{statut}'" for statut in STATUTS_ISSUE)
+        
+        def cumuler(ligne, signe):
+            return "".join(f'''
+                INSERT INTO statistiques_rendez_vous (dimension, valeur, termines, annules, absents)
+                SELECT '{dimension}', {expression.format(r=ligne)}, {signe} * ({ligne}.statut = 'termine'),
+                       {signe} * ({ligne}.statut = 'annule'), {signe} * ({ligne}.statut = 'absent')
+                WHERE {ligne}.statut IN ({statuts})
+                ON CONFLICT (dimension, valeur) DO UPDATE SET
+                    termines = termines + excluded.termines,
+                    annules = annules + excluded.annules,
+                    absents = absents + excluded.absents;'''
+                for dimension, expression in DIMENSIONS_STATISTIQUES.items())
+        
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_statistiques_rdv_ajout AFTER INSERT ON rendez_vous
+            BEGIN {cumuler('NEW', 1)}
+            END
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_statistiques_rdv_suppression AFTER DELETE ON rendez_vous
+            BEGIN {cumuler('OLD', -1)}
+            END
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_statistiques_rdv_modification
+            AFTER UPDATE OF statut, patient_id, date_rdv, heure_rdv, type_rdv ON rendez_vous
+            BEGIN {cumuler('OLD', -1)}{cumuler('NEW', 1)}
+            END
+        ''')
+        
+        if not existait:
+            for dimension, expression in DIMENSIONS_STATISTIQUES.items():
+                cursor.execute(f'''
+                    INSERT INTO statistiques_rendez_vous (dimension, valeur, termines, annules, absents)
+                    SELECT '{dimension}', {expression.format(r='r')}, SUM(r.statut = 'termine'),
+                           SUM(r.statut = 'annule'), SUM(r.statut = 'absent')
+                    FROM rendez_vous r
+                    WHERE r.statut IN ({statuts})
+                    GROUP BY 2
+                ''')
+    
     def _insert_base_actes(self, cursor):
         """Insère les actes dentaires de base si la table est vide"""
         # Vérifier si des actes existent déjà
@@ -218,6 +451,26 @@ class DatabaseManager:
                 VALUES (?, ?, ?, ?)
             ''', acte)
 
+    # ==================== FLUX DES CHANGEMENTS ====================
+    
+    def abonner_changements(self, observateur):
+        """
+        Inscrit un observateur appelé après chaque écriture validée
+        
+        Args:
+            observateur: Appelable observateur(table, operation, identifiant) avec
+                operation parmi 'ajout', 'modification', 'suppression'
+        """
+        self._observateurs.append(observateur)
+    
+    def _notifier(self, table: str, operation: str, identifiant: int):
+        """Transmet un changement validé aux observateurs (leurs erreurs n'annulent rien)"""
+        for observateur in list(self._observateurs):
+            try:
+                observateur(table, operation, identifiant)
+            except Exception as e:
+                pass
+    
     # ==================== GESTION DES PATIENTS ====================
     
     def ajouter_patient(self, nom: str, prenom: str, date_naissance: str = None, 
@@ -555,20 +808,198 @@ class DatabaseManager:
 
     # ==================== GESTION DES RENDEZ-VOUS ====================
     
+    @staticmethod
+    def _occurrences_recurrentes(cursor, debut: str, fin: str, fauteuil: int = None,
+                                 recurrence_id: int = None, patient_id: int = None) -> List[Dict]:
+        """
+        Occurrences des séries récurrentes entre debut et fin, exceptions retirées
+        
+        Les occurrences ont le format des rendez-vous avec id = None et recurrence_id.
+        Leur statut est toujours 'planifie' : une séance terminée, annulée ou manquée
+        est enregistrée par detacher_occurrence et reste rattachée à sa série.
+        """
+        conditions = "r.date_debut <= ? AND (r.date_fin IS NULL OR r.date_fin >= ?)"
+        params = [fin, debut]
+        if fauteuil is not None:
+            conditions += " AND r.fauteuil = ?"
+            params.append(fauteuil)
+        if recurrence_id is not None:
+            conditions += " AND r.id = ?"
+            params.append(recurrence_id)
+        if patient_id is not None:
+            conditions += " AND r.patient_id = ?"
+            params.append(patient_id)
+        
+        cursor.execute(f'''
+            SELECT r.*, p.nom, p.prenom, p.telephone
+            FROM rendez_vous_recurrents r
+            LEFT JOIN patients p ON r.patient_id = p.id
+            WHERE {conditions}
+        ''', params)
+        regles = [dict(row) for row in cursor.fetchall()]
+        if not regles:
+            return []
+        
+        cursor.execute('''
+            SELECT recurrence_id, date_occurrence FROM exceptions_recurrence
+            WHERE date_occurrence BETWEEN ? AND ?
+        ''', (debut, fin))
+        exceptions = {(row['recurrence_id'], row['date_occurrence']) for row in cursor.fetchall()}
+        
+        resultat = []
+        for regle in regles:
+            patient_nom = f"{regle['nom']}, {regle['prenom']}" if regle['nom'] else "Patient inconnu"
+            for jour in occurrences(regle, debut, fin):
+                date_rdv = jour.isoformat()
+                if (regle['id'], date_rdv) in exceptions:
+                    continue
+                resultat.append({
+                    'id': None,
+                    'recurrence_id': regle['id'],
+                    'patient_id': regle['patient_id'],
+                    'date_rdv': date_rdv,
+                    'heure_rdv': regle['heure_rdv'],
+                    'type_rdv': regle['type_rdv'],
+                    'description': regle['description'],
+                    'statut': 'planifie',
+                    'duree': regle['duree'],
+                    'fauteuil': regle['fauteuil'],
+                    'frequence': regle['frequence'],
+                    'nom': regle['nom'],
+                    'prenom': regle['prenom'],
+                    'telephone': regle['telephone'],
+                    'patient_nom': patient_nom
+                })
+        return resultat
+    
+    def _conflits_rendez_vous(self, cursor, date_rdv: str, heure_rdv: str, duree: int,
+                              fauteuil: int, exclure_id: int = None,
+                              exclure_recurrence: int = None) -> List[Dict]:
+        """Rendez-vous non annulés du même fauteuil dont le créneau chevauche [heure, heure + durée["""
+        heures, minutes = (int(x) for x in heure_rdv.split(':')[:2])
+        debut = heures * 60 + minutes
+        fin = min(debut + duree, 24 * 60)
+        
+        # L'index (fauteuil, date_rdv, heure_rdv) limite la recherche aux créneaux commençant
+        # avant la fin du nouveau ; reste à vérifier qu'ils finissent après son début
+        cursor.execute('''
+            SELECT r.id, r.heure_rdv, r.duree, r.type_rdv, r.patient_id, p.nom, p.prenom
+            FROM rendez_vous r
+            LEFT JOIN patients p ON r.patient_id = p.id
+            WHERE r.fauteuil = ? AND r.date_rdv = ? AND r.heure_rdv < ?
+              AND CAST(substr(r.heure_rdv, 1, 2) AS INTEGER) * 60 + CAST(substr(r.heure_rdv, 4, 2) AS INTEGER)
+                  + COALESCE(r.duree, ?) > ?
+              AND r.statut != 'annule' AND r.id != ?
+            ORDER BY r.heure_rdv
+        ''', (fauteuil, date_rdv, f"{fin // 60:02d}:{fin % 60:02d}", DUREE_RDV_DEFAUT, debut, exclure_id or 0))
+        
+        conflits = []
+        for row in cursor.fetchall():
+            rdv = dict(row)
+            rdv['patient_nom'] = f"{rdv['nom']}, {rdv['prenom']}" if rdv['nom'] else "Patient inconnu"
+            conflits.append(rdv)
+        
+        # Occurrences des séries ce jour-là sur ce fauteuil
+        for rdv in self._occurrences_recurrentes(cursor, date_rdv, date_rdv, fauteuil):
+            if rdv['recurrence_id'] == exclure_recurrence:
+                continue
+            heures, minutes = (int(x) for x in rdv['heure_rdv'].split(':')[:2])
+            depart = heures * 60 + minutes
+            if depart < fin and depart + (rdv['duree'] or DUREE_RDV_DEFAUT) > debut:
+                conflits.append(rdv)
+        
+        return sorted(conflits, key=lambda rdv: rdv['heure_rdv'])
+    
+    def _premier_conflit_serie(self, cursor, regle: Dict, heure_rdv: str, duree: int,
+                               fauteuil: int) -> Optional[str]:
+        """
+        Première date où une nouvelle série chevaucherait l'agenda du fauteuil (None sinon)
+        
+        Les rendez-vous enregistrés à partir du début de la série sont lus en une
+        requête (index fauteuil, date), quelle que soit leur date ; les occurrences
+        des autres séries, périodiques, sont comparées sur HORIZON_SERIES_JOURS.
+        """
+        heures, minutes = (int(x) for x in heure_rdv.split(':')[:2])
+        debut = heures * 60 + minutes
+        fin = min(debut + duree, 24 * 60)
+        date_debut, date_fin = regle['date_debut'], regle.get('date_fin')
+        conflits = []
+        
+        cursor.execute('''
+            SELECT r.date_rdv FROM rendez_vous r
+            WHERE r.fauteuil = ? AND r.date_rdv >= ? AND r.date_rdv <= ? AND r.heure_rdv < ?
+              AND CAST(substr(r.heure_rdv, 1, 2) AS INTEGER) * 60 + CAST(substr(r.heure_rdv, 4, 2) AS INTEGER)
+                  + COALESCE(r.duree, ?) > ?
+              AND r.statut != 'annule'
+            ORDER BY r.date_rdv
+        ''', (fauteuil, date_debut, date_fin or '9999-12-31', f"{fin // 60:02d}:{fin % 60:02d}",
+              DUREE_RDV_DEFAUT, debut))
+        dates_rdv = [row['date_rdv'] for row in cursor.fetchall()]
+        if dates_rdv:
+            dates_serie = {jour.isoformat() for jour in occurrences(regle, date_debut, dates_rdv[-1])}
+            conflits += [date_rdv for date_rdv in dates_rdv if date_rdv in dates_serie][:1]
+        
+        horizon = date_fin or (datetime.strptime(date_debut, '%Y-%m-%d')
+                               + timedelta(days=HORIZON_SERIES_JOURS)).strftime('%Y-%m-%d')
+        autres = [rdv for rdv in self._occurrences_recurrentes(cursor, date_debut, horizon, fauteuil)
+                  if rdv['heure_rdv'] < f"{fin // 60:02d}:{fin % 60:02d}"]
+        if autres:
+            dates_serie = {jour.isoformat() for jour in occurrences(regle, date_debut, horizon)}
+            for rdv in autres:
+                heures, minutes = (int(x) for x in rdv['heure_rdv'].split(':')[:2])
+                if (rdv['date_rdv'] in dates_serie
+                        and heures * 60 + minutes + (rdv['duree'] or DUREE_RDV_DEFAUT) > debut):
+                    conflits.append(rdv['date_rdv'])
+        
+        return min(conflits) if conflits else None
+    
+    def obtenir_conflits_rendez_vous(self, date_rdv: str, heure_rdv: str, duree: int = DUREE_RDV_DEFAUT,
+                                     fauteuil: int = 1, exclure_id: int = None,
+                                     exclure_recurrence: int = None) -> List[Dict]:
+        """
+        Retourne les rendez-vous qui chevauchent un créneau (validation pendant la saisie)
+        
+        Args:
+            date_rdv: Date (YYYY-MM-DD)
+            heure_rdv: Heure de début (HH:MM)
+            duree: Durée en minutes
+            fauteuil: Fauteuil du rendez-vous
+            exclure_id: Rendez-vous en cours de modification
+            exclure_recurrence: Série dont l'occurrence de ce jour est en cours de modification
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            return self._conflits_rendez_vous(cursor, date_rdv, heure_rdv, duree, fauteuil,
+                                              exclure_id, exclure_recurrence)
+        except Exception as e:
+            return []
+        finally:
+            conn.close()
+    
     def ajouter_rendez_vous(self, patient_id: int, date_rdv: str, heure_rdv: str, 
-                           type_rdv: str, description: str = None) -> int:
-        """Ajoute un nouveau rendez-vous"""
+                           type_rdv: str, description: str = None,
+                           duree: int = DUREE_RDV_DEFAUT, fauteuil: int = 1) -> int:
+        """Ajoute un nouveau rendez-vous (None si le créneau du fauteuil est déjà pris)"""
         conn = self.get_connection()
         cursor = conn.cursor()
         
         try:
+            # Vérification et écriture dans la même transaction : pas de double réservation
+            cursor.execute("BEGIN IMMEDIATE")
+            if self._conflits_rendez_vous(cursor, date_rdv, heure_rdv, duree, fauteuil):
+                conn.rollback()
+                return None
+            
             cursor.execute('''
-                INSERT INTO rendez_vous (patient_id, date_rdv, heure_rdv, type_rdv, description)
-                VALUES (?, ?, ?, ?, ?)
-            ''', (patient_id, date_rdv, heure_rdv, type_rdv, description))
+                INSERT INTO rendez_vous (patient_id, date_rdv, heure_rdv, type_rdv, description, duree, fauteuil)
+                VALUES (?, ?, ?, ?, ?, ?, ?)
+            ''', (patient_id, date_rdv, heure_rdv, type_rdv, description, duree, fauteuil))
             
             rdv_id = cursor.lastrowid
             conn.commit()
+            self._notifier('rendez_vous', 'ajout', rdv_id)
             return rdv_id
             
         except Exception as e:
@@ -611,8 +1042,14 @@ class DatabaseManager:
         finally:
             conn.close()
     
-    def obtenir_rendez_vous_patient(self, patient_id: int) -> List[Dict]:
-        """Retourne tous les rendez-vous d'un patient"""
+    def obtenir_rendez_vous_patient(self, patient_id: int, limite: int = None, decalage: int = 0) -> List[Dict]:
+        """
+        Retourne les rendez-vous d'un patient, du plus récent au plus ancien
+        
+        Args:
+            limite: Nombre de rendez-vous par page (None = tout l'historique)
+            decalage: Rendez-vous à sauter (pages précédentes)
+        """
         conn = self.get_connection()
         cursor = conn.cursor()
         
@@ -621,7 +1058,8 @@ class DatabaseManager:
                 SELECT * FROM rendez_vous 
                 WHERE patient_id = ?
                 ORDER BY date_rdv DESC, heure_rdv DESC
-            ''', (patient_id,))
+                LIMIT ? OFFSET ?
+            ''', (patient_id, -1 if limite is None else limite, decalage))
             
             return [dict(row) for row in cursor.fetchall()]
             
@@ -657,155 +1095,962 @@ class DatabaseManager:
         finally:
             conn.close()
     
-    def modifier_rendez_vous(self, rdv_id: int, patient_id: int, date_rdv: str, 
-                           heure_rdv: str, type_rdv: str, description: str, statut: str) -> bool:
-        """Modifie un rendez-vous existant"""
+    def obtenir_rendez_vous(self, rdv_id: int) -> Optional[Dict]:
+        """Retourne un rendez-vous au format de obtenir_rendez_vous_range() (None s'il n'existe plus)"""
         conn = self.get_connection()
         cursor = conn.cursor()
         
         try:
             cursor.execute('''
-                UPDATE rendez_vous 
-                SET patient_id = ?, date_rdv = ?, heure_rdv = ?, type_rdv = ?, 
-                    description = ?, statut = ?
-                WHERE id = ?
-            ''', (patient_id, date_rdv, heure_rdv, type_rdv, description, statut, rdv_id))
+                SELECT r.*, p.nom, p.prenom
+                FROM rendez_vous r
+                LEFT JOIN patients p ON r.patient_id = p.id
+                WHERE r.id = ?
+            ''', (rdv_id,))
+            row = cursor.fetchone()
+            if row is None:
+                return None
             
-            conn.commit()
-            return cursor.rowcount > 0
+            rdv = dict(row)
+            rdv['patient_nom'] = f"{rdv['nom']}, {rdv['prenom']}" if rdv['nom'] else "Patient inconnu"
+            return rdv
             
         except Exception as e:
-            conn.rollback()
-            return False
+            return None
         finally:
             conn.close()
-
-    def supprimer_rendez_vous(self, rdv_id: int) -> bool:
-        """Supprime un rendez-vous"""
+    
+    def obtenir_occurrences_serie(self, recurrence_id: int, debut: str, fin: str) -> List[Dict]:
+        """Occurrences d'une seule série entre debut et fin, exceptions retirées"""
         conn = self.get_connection()
         cursor = conn.cursor()
         
         try:
-            cursor.execute('DELETE FROM rendez_vous WHERE id = ?', (rdv_id,))
-            conn.commit()
-            return cursor.rowcount > 0
-            
+            return self._occurrences_recurrentes(cursor, debut, fin, recurrence_id=recurrence_id)
         except Exception as e:
-            conn.rollback()
-            return False
+            return []
         finally:
             conn.close()
     
-    def update_appointment(self, appointment_id, data):
-        """Met à jour un rendez-vous"""
+    def obtenir_prochains_rendez_vous_patient(self, patient_id: int, nombre: int = 5) -> List[Dict]:
+        """
+        Prochains rendez-vous d'un patient (à partir de maintenant), limités à nombre lignes
+        
+        Les séries ne sont développées que jusqu'au dernier rendez-vous retenu
+        (un an au plus quand le patient en a moins de nombre).
+        
+        Returns:
+            list: Rendez-vous triés par date et heure, au format de obtenir_rendez_vous_range()
+        """
         conn = self.get_connection()
         cursor = conn.cursor()
         
         try:
+            maintenant = datetime.now()
+            aujourd_hui, heure = maintenant.strftime('%Y-%m-%d'), maintenant.strftime('%H:%M')
+            # Comparaison (date, heure) : parcours de l'index dans l'ordre, arrêt après nombre lignes
             cursor.execute('''
-                UPDATE rendez_vous 
-                SET patient_id = ?, date_rdv = ?, heure_rdv = ?, 
-                    type_rdv = ?, description = ?, statut = ?
-                WHERE id = ?
-            ''', (
-                data.get('patient_id'),
-                data.get('date_rdv'),
-                data.get('heure_rdv'),
-                data.get('type_rdv'),
-                data.get('description'),
-                data.get('statut'),
-                appointment_id
-            ))
+                SELECT r.*, p.nom, p.prenom
+                FROM rendez_vous r
+                LEFT JOIN patients p ON r.patient_id = p.id
+                WHERE r.patient_id = ?
+                AND (r.date_rdv, r.heure_rdv) >= (?, ?)
+                AND r.statut != 'annule'
+                ORDER BY r.date_rdv, r.heure_rdv
+                LIMIT ?
+            ''', (patient_id, aujourd_hui, heure, nombre))
             
-            conn.commit()
-            return cursor.rowcount > 0
+            rendez_vous = []
+            for row in cursor.fetchall():
+                rdv = dict(row)
+                rdv['patient_nom'] = f"{rdv['nom']}, {rdv['prenom']}" if rdv['nom'] else "Patient inconnu"
+                rendez_vous.append(rdv)
+            
+            if len(rendez_vous) == nombre:
+                horizon = rendez_vous[-1]['date_rdv']
+            else:
+                horizon = (maintenant + timedelta(days=366)).strftime('%Y-%m-%d')
+            occurrences_patient = [
+                rdv for rdv in self._occurrences_recurrentes(cursor, aujourd_hui, horizon, patient_id=patient_id)
+                if rdv['date_rdv'] > aujourd_hui or rdv['heure_rdv'] >= heure
+            ]
+            if occurrences_patient:
+                rendez_vous = sorted(rendez_vous + occurrences_patient,
+                                     key=lambda rdv: (rdv['date_rdv'], rdv['heure_rdv']))[:nombre]
+            return rendez_vous
             
         except Exception as e:
-            conn.rollback()
-            return False
+            return []
         finally:
             conn.close()
     
-    def delete_appointment(self, appointment_id):
-        """Supprime un rendez-vous"""
+    def obtenir_statistiques_rendez_vous(self, patient_ids: List[int] = None) -> Dict[str, Dict]:
+        """
+        Cumuls des issues des rendez-vous, lus en une requête
+        
+        Args:
+            patient_ids: Patients dont lire les cumuls (None = tous, [] = aucun) ;
+                les autres axes (jour_semaine, heure, type) sont toujours lus en entier
+        
+        Returns:
+            dict: {dimension: {valeur: (termines, annules, absents)}}
+        """
         conn = self.get_connection()
         cursor = conn.cursor()
         
         try:
-            cursor.execute('DELETE FROM rendez_vous WHERE id = ?', (appointment_id,))
-            conn.commit()
-            return cursor.rowcount > 0
+            condition, params = "", []
+            if patient_ids is not None:
+                marques = ", ".join("?" * len(patient_ids)) or "NULL"
+                condition = f"WHERE dimension != 'patient' OR valeur IN ({marques})"
+                params = list(patient_ids)
+            cursor.execute(f'''
+                SELECT dimension, valeur, termines, annules, absents
+                FROM statistiques_rendez_vous
+                {condition}
+            ''', params)
+            
+            cumuls = {dimension: {} for dimension in DIMENSIONS_STATISTIQUES}
+            for row in cursor.fetchall():
+                cumuls[row['dimension']][row['valeur']] = (row['termines'], row['annules'], row['absents'])
+            return cumuls
             
         except Exception as e:
-            conn.rollback()
-            return False
+            return {}
         finally:
             conn.close()
-
-    # ==================== GESTION DE L'IMAGERIE ====================
     
-    def ajouter_image(self, patient_id: int, nom_fichier: str, type_image: str, 
-                     chemin_fichier: str, description: str = None) -> int:
-        """Ajoute une image médicale"""
+    def obtenir_intervalles_rendez_vous(self, debut: str, fin: str) -> List[Tuple]:
+        """
+        Plages occupées d'une période, réduites aux nombres utiles aux statistiques
+        
+        Conversions faites par SQLite et lignes sans objet Row : pas de dictionnaire
+        par rendez-vous. Les rendez-vous annulés sont exclus, les séances des séries incluses.
+        
+        Returns:
+            list: [(jour depuis debut, début en minutes, durée, fauteuil), ...]
+        """
         conn = self.get_connection()
         cursor = conn.cursor()
         
         try:
-            cursor.execute('''
-                INSERT INTO imagerie (patient_id, nom_fichier, type_image, chemin_fichier, description)
-                VALUES (?, ?, ?, ?, ?)
-            ''', (patient_id, nom_fichier, type_image, chemin_fichier, description))
-            
-            image_id = cursor.lastrowid
-            conn.commit()
-            return image_id
+            cursor.row_factory = None
+            cursor.execute(f'''
+                SELECT CAST(julianday(date_rdv) - julianday(?) AS INTEGER),
+                       CAST(substr(heure_rdv, 1, 2) AS INTEGER) * 60 + CAST(substr(heure_rdv, 4, 2) AS INTEGER),
+                       COALESCE(duree, {DUREE_RDV_DEFAUT}),
+                       COALESCE(fauteuil, 1)
+                FROM rendez_vous
+                WHERE date_rdv BETWEEN ? AND ?
+                AND statut != 'annule'
+            ''', (debut, debut, fin))
+            intervalles = cursor.fetchall()
+            
+            cursor.row_factory = sqlite3.Row
+            origine = datetime.strptime(debut, '%Y-%m-%d')
+            for rdv in self._occurrences_recurrentes(cursor, debut, fin):
+                heures, minutes = rdv['heure_rdv'].split(':')[:2]
+                intervalles.append(((datetime.strptime(rdv['date_rdv'], '%Y-%m-%d') - origine).days,
+                                    int(heures) * 60 + int(minutes),
+                                    rdv['duree'] or DUREE_RDV_DEFAUT, rdv['fauteuil'] or 1))
+            return intervalles
             
         except Exception as e:
-            conn.rollback()
-            return None
+            return []
         finally:
             conn.close()
     
-    def obtenir_images_patient(self, patient_id: int) -> List[Dict]:
-        """Retourne toutes les images d'un patient"""
+    def obtenir_rendez_vous_range(self, debut: str, fin: str, patient_id: int = None) -> List[Dict]:
+        """
+        Retourne les rendez-vous d'une période (semaine, mois) en une requête
+
+        Args:
+            debut / fin: Bornes incluses (YYYY-MM-DD)
+            patient_id: Seulement les rendez-vous de ce patient (index patient, date)
+
+        Returns:
+            list: Rendez-vous triés par date et heure, au format de obtenir_rendez_vous_date()
+        """
         conn = self.get_connection()
         cursor = conn.cursor()
-        
+
         try:
-            cursor.execute('''
-                SELECT * FROM imagerie 
-                WHERE patient_id = ?
-                ORDER BY date_creation DESC
-            ''', (patient_id,))
-            
-            return [dict(row) for row in cursor.fetchall()]
-            
+            condition_patient = "" if patient_id is None else "AND r.patient_id = ?"
+            params = (debut, fin) if patient_id is None else (debut, fin, patient_id)
+            cursor.execute(f'''
+                SELECT r.*, p.nom, p.prenom
+                FROM rendez_vous r
+                LEFT JOIN patients p ON r.patient_id = p.id
+                WHERE r.date_rdv BETWEEN ? AND ? {condition_patient}
+                ORDER BY r.date_rdv, r.heure_rdv
+            ''', params)
+
+            rendez_vous = []
+            for row in cursor.fetchall():
+                rdv = dict(row)
+                rdv['patient_nom'] = f"{rdv['nom']}, {rdv['prenom']}" if rdv['nom'] else "Patient inconnu"
+                rendez_vous.append(rdv)
+
+            # Séries récurrentes développées pour cette seule période
+            occurrences_plage = self._occurrences_recurrentes(cursor, debut, fin, patient_id=patient_id)
+            if occurrences_plage:
+                rendez_vous = sorted(rendez_vous + occurrences_plage,
+                                     key=lambda rdv: (rdv['date_rdv'], rdv['heure_rdv']))
+
+            return rendez_vous
+
         except Exception as e:
             return []
         finally:
             conn.close()
 
-    def supprimer_image(self, image_id: int) -> bool:
-        """Supprime une image de la base de données"""
+    @staticmethod
+    def cle_rappel(rdv: Dict) -> str:
+        """
+        Identifiant d'un rappel : séance (ou série), date et heure
+        
+        Une occurrence détachée de sa série garde la clé de la série : modifiée sans
+        être déplacée, elle n'est pas rappelée une seconde fois.
+        """
+        if rdv.get('recurrence_id'):
+            return f"serie:{rdv['recurrence_id']}:{rdv['date_rdv']} {rdv['heure_rdv']}"
+        return f"rdv:{rdv['id']}:{rdv['date_rdv']} {rdv['heure_rdv']}"
+    
+    def obtenir_rappels_a_envoyer(self, debut: str, fin: str) -> List[Dict]:
+        """
+        Rendez-vous planifiés de la période dont le rappel n'a pas encore été écrit
+        
+        Une seule requête jointe aux patients ; les séances déjà rappelées sont
+        écartées par l'index de rappels_envoyes. Un rendez-vous déplacé change de
+        clé et sera donc rappelé à nouveau.
+        
+        Args:
+            debut / fin: Bornes incluses (YYYY-MM-DD)
+        
+        Returns:
+            list: Rendez-vous (avec telephone et cle_rappel) triés par date et heure
+        """
         conn = self.get_connection()
         cursor = conn.cursor()
         
         try:
             cursor.execute('''
-                DELETE FROM imagerie WHERE id = ?
-            ''', (image_id,))
-            
-            conn.commit()
-            return cursor.rowcount > 0
+                SELECT r.*, p.nom, p.prenom, p.telephone
+                FROM rendez_vous r
+                JOIN patients p ON r.patient_id = p.id
+                LEFT JOIN rappels_envoyes e
+                    ON e.cle = CASE WHEN r.recurrence_id IS NOT NULL THEN 'serie:' || r.recurrence_id
+                                    ELSE 'rdv:' || r.id END || ':' || r.date_rdv || ' ' || r.heure_rdv
+                WHERE r.date_rdv BETWEEN ? AND ?
+                AND r.statut = 'planifie'
+                AND e.cle IS NULL
+                ORDER BY r.date_rdv, r.heure_rdv
+            ''', (debut, fin))
+            rappels = [dict(row) for row in cursor.fetchall()]
+            
+            occurrences_plage = self._occurrences_recurrentes(cursor, debut, fin)
+            if occurrences_plage:
+                cursor.execute("SELECT cle FROM rappels_envoyes WHERE date_rdv BETWEEN ? AND ?", (debut, fin))
+                deja_envoyes = {row['cle'] for row in cursor.fetchall()}
+                rappels += [rdv for rdv in occurrences_plage
+                            if rdv['nom'] is not None and self.cle_rappel(rdv) not in deja_envoyes]
+                rappels.sort(key=lambda rdv: (rdv['date_rdv'], rdv['heure_rdv']))
+            
+            for rdv in rappels:
+                rdv['cle_rappel'] = self.cle_rappel(rdv)
+                rdv['patient_nom'] = f"{rdv['nom']}, {rdv['prenom']}"
+            return rappels
             
         except Exception as e:
-            conn.rollback()
-            return False
+            return []
         finally:
             conn.close()
-
-    def obtenir_image_par_id(self, image_id: int) -> Dict:
-        """Retourne une image par son ID"""
+    
+    def marquer_rappels_envoyes(self, rappels: List[Dict], fichier: str) -> bool:
+        """Enregistre en une transaction les rappels écrits dans le fichier d'envoi"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            cursor.executemany('''
+                INSERT OR IGNORE INTO rappels_envoyes (cle, date_rdv, fichier)
+                VALUES (?, ?, ?)
+            ''', [(rdv['cle_rappel'], rdv['date_rdv'], fichier) for rdv in rappels])
+            conn.commit()
+            return True
+            
+        except Exception as e:
+            conn.rollback()
+            return False
+        finally:
+            conn.close()
+    
+    def ajouter_rendez_vous_recurrent(self, patient_id: int, date_debut: str, heure_rdv: str,
+                                      type_rdv: str, description: str, duree: int, fauteuil: int,
+                                      frequence: str, intervalle: int = 1,
+                                      date_fin: str = None) -> Tuple[Optional[int], Optional[str]]:
+        """
+        Enregistre une série de rendez-vous (une seule ligne, quelle que soit sa durée)
+        
+        Toutes les occurrences sont vérifiées contre l'agenda du fauteuil (voir
+        _premier_conflit_serie) ; un rendez-vous ajouté ensuite est vérifié contre
+        les occurrences des séries actives ce jour-là.
+        
+        Args:
+            frequence: 'quotidien', 'hebdomadaire' ou 'mensuel'
+            intervalle: Toutes les N périodes
+            date_fin: Dernière date possible (None = sans fin)
+        
+        Returns:
+            tuple: (ID de la série ou None, première date en conflit ou None)
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            cursor.execute("BEGIN IMMEDIATE")
+            
+            regle = {'date_debut': date_debut, 'date_fin': date_fin, 'frequence': frequence,
+                     'intervalle': intervalle}
+            date_conflit = self._premier_conflit_serie(cursor, regle, heure_rdv, duree, fauteuil)
+            if date_conflit:
+                conn.rollback()
+                return None, date_conflit
+            
+            cursor.execute('''
+                INSERT INTO rendez_vous_recurrents (patient_id, date_debut, date_fin, frequence, intervalle,
+                                                    heure_rdv, duree, fauteuil, type_rdv, description)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (patient_id, date_debut, date_fin, frequence, intervalle, heure_rdv, duree, fauteuil,
+                  type_rdv, description))
+            
+            recurrence_id = cursor.lastrowid
+            conn.commit()
+            self._notifier('rendez_vous_recurrents', 'ajout', recurrence_id)
+            return recurrence_id, None
+            
+        except Exception as e:
+            conn.rollback()
+            return None, None
+        finally:
+            conn.close()
+    
+    def detacher_occurrence(self, recurrence_id: int, date_occurrence: str, patient_id: int,
+                            date_rdv: str, heure_rdv: str, type_rdv: str, description: str,
+                            statut: str, duree: int, fauteuil: int) -> bool:
+        """
+        Modifie une seule occurrence d'une série (statut, horaire, ...)
+        
+        L'occurrence est enregistrée dans rendez_vous, rattachée à sa série
+        (recurrence_id, date_occurrence) : son statut est conservé et compté dans
+        les statistiques. Une exception retire l'occurrence calculée.
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            cursor.execute("BEGIN IMMEDIATE")
+            cursor.execute('''
+                INSERT OR IGNORE INTO exceptions_recurrence (recurrence_id, date_occurrence)
+                VALUES (?, ?)
+            ''', (recurrence_id, date_occurrence))
+            
+            if statut != 'annule' and self._conflits_rendez_vous(cursor, date_rdv, heure_rdv, duree, fauteuil):
+                conn.rollback()
+                return False
+            
+            cursor.execute('''
+                INSERT INTO rendez_vous (patient_id, date_rdv, heure_rdv, type_rdv, description, statut,
+                                         duree, fauteuil, recurrence_id, date_occurrence)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', (patient_id, date_rdv, heure_rdv, type_rdv, description, statut, duree, fauteuil,
+                  recurrence_id, date_occurrence))
+            
+            rdv_id = cursor.lastrowid
+            conn.commit()
+            self._notifier('rendez_vous_recurrents', 'modification', recurrence_id)
+            self._notifier('rendez_vous', 'ajout', rdv_id)
+            return True
+            
+        except Exception as e:
+            conn.rollback()
+            return False
+        finally:
+            conn.close()
+    
+    def supprimer_occurrence(self, recurrence_id: int, date_occurrence: str) -> bool:
+        """Supprime une seule occurrence d'une série"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            cursor.execute('''
+                INSERT OR IGNORE INTO exceptions_recurrence (recurrence_id, date_occurrence)
+                VALUES (?, ?)
+            ''', (recurrence_id, date_occurrence))
+            conn.commit()
+            self._notifier('rendez_vous_recurrents', 'modification', recurrence_id)
+            return True
+            
+        except Exception as e:
+            conn.rollback()
+            return False
+        finally:
+            conn.close()
+    
+    def supprimer_rendez_vous_recurrent(self, recurrence_id: int) -> bool:
+        """Supprime une série entière (les séances déjà enregistrées restent, sans rattachement)"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            cursor.execute('SELECT id FROM rendez_vous WHERE recurrence_id = ?', (recurrence_id,))
+            detaches = [row['id'] for row in cursor.fetchall()]
+            cursor.execute('UPDATE rendez_vous SET recurrence_id = NULL WHERE recurrence_id = ?', (recurrence_id,))
+            cursor.execute('DELETE FROM exceptions_recurrence WHERE recurrence_id = ?', (recurrence_id,))
+            cursor.execute('DELETE FROM rendez_vous_recurrents WHERE id = ?', (recurrence_id,))
+            supprimee = cursor.rowcount > 0
+            conn.commit()
+            if supprimee:
+                self._notifier('rendez_vous_recurrents', 'suppression', recurrence_id)
+                for rdv_id in detaches:
+                    self._notifier('rendez_vous', 'modification', rdv_id)
+                return True
+            return False
+            
+        except Exception as e:
+            conn.rollback()
+            return False
+        finally:
+            conn.close()
+    
+    def modifier_rendez_vous(self, rdv_id: int, patient_id: int, date_rdv: str, 
+                           heure_rdv: str, type_rdv: str, description: str, statut: str,
+                           duree: int = None, fauteuil: int = None) -> bool:
+        """Modifie un rendez-vous existant (False si le nouveau créneau est déjà pris)"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            cursor.execute("BEGIN IMMEDIATE")
+            
+            # Durée et fauteuil non précisés : ceux du rendez-vous
+            if duree is None or fauteuil is None:
+                cursor.execute("SELECT duree, fauteuil FROM rendez_vous WHERE id = ?", (rdv_id,))
+                actuel = cursor.fetchone()
+                if actuel is None:
+                    conn.rollback()
+                    return False
+                duree = duree if duree is not None else (actuel['duree'] or DUREE_RDV_DEFAUT)
+                fauteuil = fauteuil if fauteuil is not None else (actuel['fauteuil'] or 1)
+            
+            if statut != 'annule' and self._conflits_rendez_vous(cursor, date_rdv, heure_rdv, duree,
+                                                                 fauteuil, rdv_id):
+                conn.rollback()
+                return False
+            
+            cursor.execute('''
+                UPDATE rendez_vous 
+                SET patient_id = ?, date_rdv = ?, heure_rdv = ?, type_rdv = ?, 
+                    description = ?, statut = ?, duree = ?, fauteuil = ?
+                WHERE id = ?
+            ''', (patient_id, date_rdv, heure_rdv, type_rdv, description, statut, duree, fauteuil, rdv_id))
+            
+            conn.commit()
+            if cursor.rowcount > 0:
+                self._notifier('rendez_vous', 'modification', rdv_id)
+                return True
+            return False
+            
+        except Exception as e:
+            conn.rollback()
+            return False
+        finally:
+            conn.close()
+
+    def supprimer_rendez_vous(self, rdv_id: int) -> bool:
+        """Supprime un rendez-vous"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            cursor.execute('DELETE FROM rendez_vous WHERE id = ?', (rdv_id,))
+            conn.commit()
+            if cursor.rowcount > 0:
+                self._notifier('rendez_vous', 'suppression', rdv_id)
+                return True
+            return False
+            
+        except Exception as e:
+            conn.rollback()
+            return False
+        finally:
+            conn.close()
+    
+    def update_appointment(self, appointment_id, data):
+        """Met à jour un rendez-vous"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            cursor.execute('''
+                UPDATE rendez_vous 
+                SET patient_id = ?, date_rdv = ?, heure_rdv = ?, 
+                    type_rdv = ?, description = ?, statut = ?
+                WHERE id = ?
+            ''', (
+                data.get('patient_id'),
+                data.get('date_rdv'),
+                data.get('heure_rdv'),
+                data.get('type_rdv'),
+                data.get('description'),
+                data.get('statut'),
+                appointment_id
+            ))
+            
+            conn.commit()
+            if cursor.rowcount > 0:
+                self._notifier('rendez_vous', 'modification', appointment_id)
+                return True
+            return False
+            
+        except Exception as e:
+            conn.rollback()
+            return False
+        finally:
+            conn.close()
+    
+    def delete_appointment(self, appointment_id):
+        """Supprime un rendez-vous"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            cursor.execute('DELETE FROM rendez_vous WHERE id = ?', (appointment_id,))
+            conn.commit()
+            if cursor.rowcount > 0:
+                self._notifier('rendez_vous', 'suppression', appointment_id)
+                return True
+            return False
+            
+        except Exception as e:
+            conn.rollback()
+            return False
+        finally:
+            conn.close()
+
+    # ==================== GESTION DE L'IMAGERIE ====================
+    
+    REQUETE_INSERTION_IMAGE = '''
+        INSERT INTO imagerie (patient_id, nom_fichier, type_image, chemin_fichier, description,
+                              date_capture, largeur, hauteur, profondeur_bits, taille_fichier, hash_fichier,
+                              hash_perceptuel, empreinte_calculee)
+        VALUES (?, ?, ?, ?, ?, COALESCE(?, CURRENT_TIMESTAMP), ?, ?, ?, ?, ?, ?, ?)
+    '''
+    
+    # Colonnes autorisées pour le tri des images (protège la clause ORDER BY)
+    TRIS_IMAGES = {
+        'date_capture': 'date_capture',
+        'nom': 'nom_fichier',
+        'type': 'type_image',
+        'taille': 'taille_fichier',
+        'resolution': 'largeur * hauteur'
+    }
+    
+    @staticmethod
+    def _valeurs_image(image: Dict) -> Tuple:
+        """Paramètres d'insertion d'une ligne imagerie"""
+        return (image['patient_id'], image['nom_fichier'], image['type_image'],
+                image['chemin_fichier'], image.get('description'),
+                image.get('date_capture'), image.get('largeur'), image.get('hauteur'),
+                image.get('profondeur_bits'), image.get('taille_fichier'), image.get('hash_fichier'),
+                image.get('hash_perceptuel'), int('hash_perceptuel' in image))
+    
+    def ajouter_image(self, patient_id: int, nom_fichier: str, type_image: str, 
+                     chemin_fichier: str, description: str = None,
+                     metadonnees: Dict = None) -> int:
+        """Ajoute une image médicale (métadonnées extraites à l'import optionnelles)"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            image = dict(metadonnees or {})
+            image.update({
+                'patient_id': patient_id,
+                'nom_fichier': nom_fichier,
+                'type_image': type_image,
+                'chemin_fichier': chemin_fichier,
+                'description': description
+            })
+            cursor.execute(self.REQUETE_INSERTION_IMAGE, self._valeurs_image(image))
+            
+            image_id = cursor.lastrowid
+            conn.commit()
+            return image_id
+            
+        except Exception as e:
+            conn.rollback()
+            return None
+        finally:
+            conn.close()
+    
+    def ajouter_images_lot(self, images: List[Dict]) -> List[int]:
+        """Ajoute plusieurs images médicales en une seule transaction"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+
+        try:
+            image_ids = []
+            for image in images:
+                cursor.execute(self.REQUETE_INSERTION_IMAGE, self._valeurs_image(image))
+                image_ids.append(cursor.lastrowid)
+
+            conn.commit()
+            return image_ids
+
+        except Exception as e:
+            conn.rollback()
+            return []
+        finally:
+            conn.close()
+
+    def obtenir_images_patient(self, patient_id: int) -> List[Dict]:
+        """Retourne toutes les images d'un patient"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            cursor.execute('''
+                SELECT * FROM imagerie 
+                WHERE patient_id = ?
+                ORDER BY date_capture DESC, id DESC
+            ''', (patient_id,))
+            
+            return [dict(row) for row in cursor.fetchall()]
+            
+        except Exception as e:
+            return []
+        finally:
+            conn.close()
+
+    def rechercher_images(self, patient_id: int, type_image: str = None,
+                          date_debut: str = None, date_fin: str = None,
+                          largeur_min: int = None, hauteur_min: int = None, cote_min: int = None,
+                          tri: str = 'date_capture', descendant: bool = True) -> List[Dict]:
+        """
+        Recherche les images d'un patient, filtrées et triées par SQLite
+        
+        Args:
+            patient_id: ID du patient
+            type_image: Modalité exacte (None pour toutes)
+            date_debut: Date de prise de vue minimale (YYYY-MM-DD, incluse)
+            date_fin: Date de prise de vue maximale (YYYY-MM-DD, incluse)
+            largeur_min: Largeur minimale en pixels
+            hauteur_min: Hauteur minimale en pixels
+            cote_min: Plus grand côté minimal en pixels (panoramiques comprises)
+            tri: Clé de TRIS_IMAGES
+            descendant: Ordre décroissant
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            conditions = ["patient_id = ?"]
+            parametres = [patient_id]
+            
+            if type_image:
+                conditions.append("type_image = ?")
+                parametres.append(type_image)
+            if date_debut:
+                conditions.append("date_capture >= ?")
+                parametres.append(date_debut)
+            if date_fin:
+                # Borne exclusive au lendemain pour inclure toute la journée
+                conditions.append("date_capture < date(?, '+1 day')")
+                parametres.append(date_fin)
+            if largeur_min:
+                conditions.append("largeur >= ?")
+                parametres.append(largeur_min)
+            if hauteur_min:
+                conditions.append("hauteur >= ?")
+                parametres.append(hauteur_min)
+            if cote_min:
+                conditions.append("max(largeur, hauteur) >= ?")
+                parametres.append(cote_min)
+            
+            colonne_tri = self.TRIS_IMAGES.get(tri, 'date_capture')
+            sens = "DESC" if descendant else "ASC"
+            
+            cursor.execute(f'''
+                SELECT * FROM imagerie
+                WHERE {" AND ".join(conditions)}
+                ORDER BY {colonne_tri} {sens}, id {sens}
+            ''', parametres)
+            
+            return [dict(row) for row in cursor.fetchall()]
+            
+        except Exception as e:
+            return []
+        finally:
+            conn.close()
+
+    def obtenir_image_par_hash(self, patient_id: int, hash_fichier: str) -> Dict:
+        """Retourne l'image d'un patient ayant cette empreinte (détection des doublons)"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            cursor.execute('''
+                SELECT * FROM imagerie WHERE hash_fichier = ? AND patient_id = ?
+                LIMIT 1
+            ''', (hash_fichier, patient_id))
+            
+            result = cursor.fetchone()
+            return dict(result) if result else {}
+            
+        except Exception as e:
+            return {}
+        finally:
+            conn.close()
+
+    def obtenir_empreintes_perceptuelles(self) -> List[Tuple]:
+        """Retourne (id, patient_id, hash_perceptuel) de toutes les images empreintées"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            cursor.execute('''
+                SELECT id, patient_id, hash_perceptuel FROM imagerie
+                WHERE hash_perceptuel IS NOT NULL
+            ''')
+            
+            return [tuple(row) for row in cursor.fetchall()]
+            
+        except Exception as e:
+            return []
+        finally:
+            conn.close()
+
+    def obtenir_signature_empreintes(self) -> Tuple:
+        """Signature de l'ensemble des empreintes (invalide l'index en mémoire)"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            cursor.execute('''
+                SELECT COUNT(*), MAX(id), TOTAL(id), TOTAL(hash_perceptuel) FROM imagerie
+                WHERE hash_perceptuel IS NOT NULL
+            ''')
+            
+            return tuple(cursor.fetchone())
+            
+        except Exception as e:
+            return ()
+        finally:
+            conn.close()
+
+    def obtenir_images_sans_empreinte(self) -> List[Dict]:
+        """Retourne les images dont l'empreinte perceptuelle n'a jamais été tentée"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            cursor.execute('''
+                SELECT id, chemin_fichier FROM imagerie WHERE empreinte_calculee = 0
+            ''')
+            
+            return [dict(row) for row in cursor.fetchall()]
+            
+        except Exception as e:
+            return []
+        finally:
+            conn.close()
+
+    def enregistrer_empreintes_perceptuelles(self, empreintes: List[Tuple]) -> bool:
+        """
+        Enregistre un lot d'empreintes en une transaction
+        
+        Args:
+            empreintes: [(image_id, hash_perceptuel), ...] ; None marque une image
+                illisible, qui n'est plus retentée
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            cursor.executemany('''
+                UPDATE imagerie SET hash_perceptuel = ?, empreinte_calculee = 1 WHERE id = ?
+            ''', [(hash_perceptuel, image_id) for image_id, hash_perceptuel in empreintes])
+            
+            conn.commit()
+            return True
+            
+        except Exception as e:
+            conn.rollback()
+            return False
+        finally:
+            conn.close()
+
+    def obtenir_images_inactives(self, date_limite: str) -> List[Dict]:
+        """
+        Retourne les images non consultées depuis date_limite (YYYY-MM-DD)
+        
+        La date de référence est le dernier accès, à défaut la date d'ajout.
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            cursor.execute('''
+                SELECT * FROM imagerie
+                WHERE COALESCE(date_dernier_acces, date_creation) < ?
+                ORDER BY date_capture
+            ''', (date_limite,))
+            
+            return [dict(row) for row in cursor.fetchall()]
+            
+        except Exception as e:
+            return []
+        finally:
+            conn.close()
+
+    def mettre_a_jour_fichier_image(self, image_id: int, chemin_fichier: str, taille_fichier: int) -> bool:
+        """Met à jour le fichier d'une image après recompression"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            cursor.execute('''
+                UPDATE imagerie SET chemin_fichier = ?, taille_fichier = ? WHERE id = ?
+            ''', (chemin_fichier, taille_fichier, image_id))
+            
+            conn.commit()
+            return cursor.rowcount > 0
+            
+        except Exception as e:
+            conn.rollback()
+            return False
+        finally:
+            conn.close()
+
+    def definir_archive_image(self, image_id: int, archive: Optional[str]) -> bool:
+        """Enregistre l'archive contenant une image (None = image active uniquement)"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            cursor.execute('''
+                UPDATE imagerie SET archive = ? WHERE id = ?
+            ''', (archive, image_id))
+            
+            conn.commit()
+            return cursor.rowcount > 0
+            
+        except Exception as e:
+            conn.rollback()
+            return False
+        finally:
+            conn.close()
+
+    def marquer_membre_retire(self, archive: str, membre: str) -> bool:
+        """Note qu'un membre d'archive doit être retiré (suppression définitive de l'image)"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            cursor.execute('''
+                INSERT OR IGNORE INTO membres_archives_retires (archive, membre) VALUES (?, ?)
+            ''', (archive, membre))
+            
+            conn.commit()
+            return True
+            
+        except Exception as e:
+            conn.rollback()
+            return False
+        finally:
+            conn.close()
+
+    def obtenir_membres_retires(self, archive: str = None) -> Dict[str, List[str]]:
+        """Membres à retirer, par archive (toutes les archives si archive est None)"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            if archive is None:
+                cursor.execute("SELECT archive, membre FROM membres_archives_retires")
+            else:
+                cursor.execute("SELECT archive, membre FROM membres_archives_retires WHERE archive = ?", (archive,))
+            
+            membres = {}
+            for row in cursor.fetchall():
+                membres.setdefault(row['archive'], []).append(row['membre'])
+            return membres
+            
+        except Exception as e:
+            return {}
+        finally:
+            conn.close()
+
+    def oublier_membres_retires(self, archive: str, membres: List[str]) -> bool:
+        """Efface les marques d'une archive une fois ses membres retirés"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            cursor.executemany('''
+                DELETE FROM membres_archives_retires WHERE archive = ? AND membre = ?
+            ''', [(archive, membre) for membre in membres])
+            
+            conn.commit()
+            return True
+            
+        except Exception as e:
+            conn.rollback()
+            return False
+        finally:
+            conn.close()
+
+    def marquer_acces_image(self, image_id: int) -> bool:
+        """Enregistre la date de consultation d'une image (retarde son archivage)"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            cursor.execute('''
+                UPDATE imagerie SET date_dernier_acces = CURRENT_TIMESTAMP WHERE id = ?
+            ''', (image_id,))
+            
+            conn.commit()
+            return cursor.rowcount > 0
+            
+        except Exception as e:
+            conn.rollback()
+            return False
+        finally:
+            conn.close()
+
+    def supprimer_image(self, image_id: int) -> bool:
+        """Supprime une image de la base de données"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        
+        try:
+            cursor.execute('''
+                DELETE FROM imagerie WHERE id = ?
+            ''', (image_id,))
+            
+            conn.commit()
+            return cursor.rowcount > 0
+            
+        except Exception as e:
+            conn.rollback()
+            return False
+        finally:
+            conn.close()
+
+    def obtenir_image_par_id(self, image_id: int) -> Dict:
+        """Retourne une image par son ID"""
         conn = self.get_connection()
         cursor = conn.cursor()
         
@@ -835,12 +2080,8 @@ class DatabaseManager:
         cursor = conn.cursor()
         
         try:
-            cursor.execute('''
-                INSERT INTO ordonnances (patient_id, date_ordonnance, medicaments, recommandations, chemin_pdf)
-                VALUES (?, ?, ?, ?, ?)
-            ''', (patient_id, date_ordonnance, medicaments, recommandations, chemin_pdf))
-            
-            ordonnance_id = cursor.lastrowid
+            ordonnance_id = self._inserer_ordonnance(cursor, patient_id, medicaments, recommandations,
+                                                     chemin_pdf, date_ordonnance)
             conn.commit()
             return ordonnance_id
             
@@ -850,6 +2091,14 @@ class DatabaseManager:
         finally:
             conn.close()
     
+    def _inserer_ordonnance(self, cursor, patient_id, medicaments, recommandations, chemin_pdf, date_ordonnance):
+        """Écrit la ligne d'une ordonnance dans la transaction en cours et retourne son ID"""
+        cursor.execute('''
+            INSERT INTO ordonnances (patient_id, date_ordonnance, medicaments, recommandations, chemin_pdf)
+            VALUES (?, ?, ?, ?, ?)
+        ''', (patient_id, date_ordonnance, medicaments, recommandations, chemin_pdf))
+        return cursor.lastrowid
+    
     def obtenir_ordonnances_patient(self, patient_id: int) -> List[Dict]:
         """Retourne toutes les ordonnances d'un patient"""
         conn = self.get_connection()
@@ -1031,6 +2280,306 @@ class DatabaseManager:
         finally:
             conn.close()
 
+    def obtenir_factures_pour_export(self, patient_id: int = None, date_debut: str = None,
+                                     date_fin: str = None) -> list:
+        """
+        Retourne les factures à exporter avec leurs lignes, en une seule requête
+
+        Args:
+            patient_id: Limiter aux factures d'un patient
+            date_debut / date_fin: Bornes incluses sur date_facture (YYYY-MM-DD)
+
+        Returns:
+            list: [{id, numero_facture, date_facture, patient, lignes: [...]}, ...]
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+
+        conditions = []
+        params = []
+        if patient_id:
+            conditions.append("f.patient_id = ?")
+            params.append(patient_id)
+        if date_debut:
+            conditions.append("f.date_facture >= ?")
+            params.append(date_debut)
+        if date_fin:
+            conditions.append("f.date_facture <= ?")
+            params.append(date_fin)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+        try:
+            cursor.execute(f'''
+                SELECT f.id, f.numero_facture, f.date_facture,
+                       p.nom, p.prenom,
+                       df.libelle, df.quantite, df.prix_unitaire, df.montant_total
+                FROM factures f
+                LEFT JOIN patients p ON f.patient_id = p.id
+                LEFT JOIN details_facture df ON df.facture_id = f.id
+                {where}
+                ORDER BY f.date_facture, f.id, df.id
+            ''', params)
+
+            factures = {}
+            for row in cursor.fetchall():
+                facture = factures.get(row['id'])
+                if facture is None:
+                    patient = f"{row['nom']}, {row['prenom']}" if row['nom'] is not None else "Inconnu"
+                    facture = factures[row['id']] = {
+                        'id': row['id'],
+                        'numero_facture': row['numero_facture'],
+                        'date_facture': row['date_facture'],
+                        'patient': patient,
+                        'lignes': []
+                    }
+                if row['libelle'] is not None:
+                    facture['lignes'].append({
+                        'libelle': row['libelle'],
+                        'quantite': row['quantite'],
+                        'prix_unitaire': row['prix_unitaire'],
+                        'montant_total': row['montant_total']
+                    })
+
+            return list(factures.values())
+
+        except Exception as e:
+            return []
+        finally:
+            conn.close()
+
+    def definir_chemins_pdf_factures(self, chemins: list) -> bool:
+        """Enregistre le PDF généré de plusieurs factures ([(facture_id, chemin), ...])"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        try:
+            cursor.executemany("UPDATE factures SET chemin_pdf = ? WHERE id = ?",
+                               [(chemin, facture_id) for facture_id, chemin in chemins])
+            conn.commit()
+            return True
+        except Exception as e:
+            conn.rollback()
+            return False
+        finally:
+            conn.close()
+
+    def obtenir_releves_patients(self, date_debut: str = None, date_fin: str = None,
+                                 patient_id: int = None) -> list:
+        """
+        Retourne les relevés de compte (factures, paiements, solde courant), en une seule requête
+
+        Sans patient_id, seuls les patients dont le solde à date_fin reste dû sont retenus.
+        Les mouvements antérieurs à date_debut ne figurent que dans le solde initial.
+
+        Args:
+            date_debut / date_fin: Bornes incluses de la période (YYYY-MM-DD)
+            patient_id: Relevé d'un seul patient, quel que soit son solde
+
+        Returns:
+            list: [{patient_id, patient, date_debut, date_fin, solde_initial,
+                    mouvements: [{date, libelle, debit, credit, solde}], total_factures,
+                    total_paiements, solde_final}, ...]
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+
+        try:
+            # Solde courant, solde initial et solde final calculés par fenêtres sur les
+            # mouvements de chaque patient ; la dernière ligne antérieure à la période est
+            # gardée pour les patients sans mouvement dans la période
+            cursor.execute('''
+                WITH mouvements AS (
+                    SELECT patient_id, date_facture AS date, 0 AS ordre, id,
+                           'Facture ' || numero_facture AS libelle,
+                           montant_total AS debit, 0 AS credit
+                    FROM factures
+                    UNION ALL
+                    SELECT patient_id, date_paiement, 1, id,
+                           'Paiement (' || mode_paiement || ')' || COALESCE(' - ' || numero_facture, ''),
+                           0, montant
+                    FROM paiements
+                ),
+                soldes AS (
+                    SELECT m.*,
+                           SUM(debit - credit) OVER (PARTITION BY patient_id ORDER BY date, ordre, id
+                                                     ROWS UNBOUNDED PRECEDING) AS solde,
+                           SUM(debit - credit) OVER (PARTITION BY patient_id) AS solde_final,
+                           SUM(CASE WHEN date < :debut THEN debit - credit ELSE 0 END)
+                               OVER (PARTITION BY patient_id) AS solde_initial,
+                           ROW_NUMBER() OVER (PARTITION BY patient_id ORDER BY date DESC, ordre DESC, id DESC) AS rang_inverse
+                    FROM mouvements m
+                    WHERE (:fin IS NULL OR date <= :fin)
+                      AND (:patient IS NULL OR patient_id = :patient)
+                )
+                SELECT s.*, p.nom, p.prenom
+                FROM soldes s
+                JOIN patients p ON p.id = s.patient_id
+                WHERE (:patient IS NOT NULL OR s.solde_final > 0.005)
+                  AND (:debut IS NULL OR s.date >= :debut OR s.rang_inverse = 1)
+                ORDER BY p.nom, p.prenom, s.patient_id, s.date, s.ordre, s.id
+            ''', {'debut': date_debut, 'fin': date_fin, 'patient': patient_id})
+
+            releves = {}
+            for row in cursor.fetchall():
+                releve = releves.get(row['patient_id'])
+                if releve is None:
+                    releve = releves[row['patient_id']] = {
+                        'patient_id': row['patient_id'],
+                        'patient': f"{row['nom']}, {row['prenom']}",
+                        'date_debut': date_debut,
+                        'date_fin': date_fin,
+                        'solde_initial': round(row['solde_initial'], 2),
+                        'mouvements': [],
+                        'total_factures': 0,
+                        'total_paiements': 0,
+                        'solde_final': round(row['solde_final'], 2)
+                    }
+                if date_debut and row['date'] < date_debut:
+                    continue
+                releve['mouvements'].append({
+                    'date': row['date'],
+                    'libelle': row['libelle'],
+                    'debit': row['debit'],
+                    'credit': row['credit'],
+                    'solde': round(row['solde'], 2)
+                })
+                releve['total_factures'] += row['debit']
+                releve['total_paiements'] += row['credit']
+
+            return list(releves.values())
+
+        except Exception as e:
+            return []
+        finally:
+            conn.close()
+
+    def ajouter_travail_pdf(self, type_document: str, fichier: str, donnees: str) -> int:
+        """Ajoute un document à la file de génération PDF"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        try:
+            cursor.execute('''
+                INSERT INTO travaux_pdf (type_document, fichier, donnees)
+                VALUES (?, ?, ?)
+            ''', (type_document, fichier, donnees))
+            conn.commit()
+            return cursor.lastrowid
+        except Exception as e:
+            conn.rollback()
+            return None
+        finally:
+            conn.close()
+
+    def prendre_travail_pdf(self) -> Optional[Dict]:
+        """
+        Réserve le prochain travail prêt (statut 'en cours') et le retourne
+
+        Returns:
+            dict ou None si aucun travail n'est prêt
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        try:
+            cursor.execute('''
+                SELECT * FROM travaux_pdf
+                WHERE statut = 'en attente' AND date_prochain_essai <= CURRENT_TIMESTAMP
+                ORDER BY id
+                LIMIT 1
+            ''')
+            row = cursor.fetchone()
+            if not row:
+                return None
+            cursor.execute("UPDATE travaux_pdf SET statut = 'en cours' WHERE id = ?", (row['id'],))
+            conn.commit()
+            return dict(row)
+        except Exception as e:
+            conn.rollback()
+            return None
+        finally:
+            conn.close()
+
+    def terminer_travail_pdf(self, travail_id: int, ordonnance: Dict = None) -> bool:
+        """
+        Retire de la file un travail dont le PDF est écrit
+        
+        Args:
+            ordonnance: Ligne à enregistrer avec le PDF (patient_id, medicaments,
+                recommandations, date_ordonnance), dans la même transaction : une
+                ordonnance n'est jamais en base sans son fichier
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        try:
+            if ordonnance:
+                cursor.execute("SELECT fichier FROM travaux_pdf WHERE id = ?", (travail_id,))
+                row = cursor.fetchone()
+                if row is None:
+                    return False
+                self._inserer_ordonnance(cursor, ordonnance['patient_id'], ordonnance['medicaments'],
+                                         ordonnance.get('recommandations'), row['fichier'],
+                                         ordonnance['date_ordonnance'])
+            cursor.execute("DELETE FROM travaux_pdf WHERE id = ?", (travail_id,))
+            conn.commit()
+            return True
+        except Exception as e:
+            conn.rollback()
+            return False
+        finally:
+            conn.close()
+
+    def echec_travail_pdf(self, travail_id: int, erreur: str, delai_secondes: int = None) -> bool:
+        """
+        Enregistre l'échec d'un travail
+
+        Args:
+            delai_secondes: Nouvel essai après ce délai, None = abandon (travail retiré
+                de la file, l'erreur n'est plus transmise que par le signal de la file)
+        """
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        try:
+            if delai_secondes is None:
+                cursor.execute("DELETE FROM travaux_pdf WHERE id = ?", (travail_id,))
+            else:
+                cursor.execute('''
+                    UPDATE travaux_pdf SET statut = 'en attente', erreur = ?, tentatives = tentatives + 1,
+                           date_prochain_essai = datetime('now', ?)
+                    WHERE id = ?
+                ''', (erreur, f"+{int(delai_secondes)} seconds", travail_id))
+            conn.commit()
+            return True
+        except Exception as e:
+            conn.rollback()
+            return False
+        finally:
+            conn.close()
+
+    def reprendre_travaux_pdf(self) -> int:
+        """Remet en file les travaux interrompus (application fermée pendant le rendu)"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        try:
+            cursor.execute("UPDATE travaux_pdf SET statut = 'en attente' WHERE statut = 'en cours'")
+            repris = cursor.rowcount
+            conn.commit()
+            return repris
+        except Exception as e:
+            conn.rollback()
+            return 0
+        finally:
+            conn.close()
+
+    def compter_travaux_pdf_en_attente(self) -> int:
+        """Nombre de documents restant à générer"""
+        conn = self.get_connection()
+        cursor = conn.cursor()
+        try:
+            cursor.execute("SELECT COUNT(*) FROM travaux_pdf WHERE statut IN ('en attente', 'en cours')")
+            return cursor.fetchone()[0]
+        except Exception as e:
+            return 0
+        finally:
+            conn.close()
+
     def obtenir_paiements_patient(self, patient_id: int) -> list:
         """Retourne tous les paiements d'un patient"""
         conn = self.get_connection()
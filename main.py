@@ -1,5 +1,6 @@
 import sys
 import os
+import multiprocessing
 from PySide6.QtWidgets import QApplication
 from database import db
 from src.main_window import MainWindow
@@ -7,6 +8,9 @@ from src.path_manager import path_manager
 from src.splash import show_splash
 
 if __name__ == "__main__":
+    # Processus de l'export des factures dans l'exécutable installé
+    multiprocessing.freeze_support()
+    
     # Initialiser l'application
     app = QApplication(sys.argv)
     show_splash(app)
@@ -0,0 +1,379 @@
+# -*- coding: utf-8 -*-
+"""
+Archivage du dossier des images
+- recompression sans perte (PNG, WebP sans perte) des formats non compressés
+- déplacement des images non consultées dans des archives ZIP annuelles
+- restauration transparente à l'ouverture d'une image archivée
+- retrait groupé des images supprimées (une réécriture par archive)
+"""
+
+import os
+import time
+import zipfile
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from PySide6.QtCore import QThread, Signal
+
+from database import db
+from src.path_manager import path_manager
+from src.radiographie import charger_raw, EXTENSIONS_RAW
+from src.import_images import NOMBRE_WORKERS
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+try:
+    from PIL import Image, features
+    PIL_AVAILABLE = True
+    WEBP_AVAILABLE = features.check('webp')
+except ImportError:
+    PIL_AVAILABLE = False
+    WEBP_AVAILABLE = False
+
+# Formats stockés sans compression (ou presque) par les capteurs et scanners
+EXTENSIONS_NON_COMPRESSEES = ('.bmp', '.tif', '.tiff', '.raw')
+
+# Modes que PNG / WebP sans perte restituent à l'identique (les autres, comme LA,
+# P ou I 32 bits, seraient convertis : leur original est conservé)
+MODES_SANS_PERTE = ('L', 'I;16', 'RGB', 'RGBA')
+
+# Seuils par défaut (jours sans consultation)
+JOURS_RECOMPRESSION = 30
+JOURS_ARCHIVAGE = 365
+
+
+def pixels_originaux(chemin):
+    """
+    Pixels d'un fichier tels qu'il les stocke, sans conversion de mode
+
+    Returns:
+        ndarray, ou None si l'image ne peut pas être recompressée à l'identique
+        (mode hors MODES_SANS_PERTE, TIFF multipage, RAW sans dimensions)
+    """
+    if os.path.splitext(chemin)[1].lower() in EXTENSIONS_RAW:
+        radiographie = charger_raw(chemin)
+        return radiographie.donnees if radiographie is not None else None
+
+    with Image.open(chemin) as source:
+        if getattr(source, 'n_frames', 1) > 1 or source.mode not in MODES_SANS_PERTE:
+            return None
+        return np.array(source)
+
+
+def recompresser_image(chemin):
+    """
+    Recompresse une image sans perte et vérifie l'identité des pixels
+
+    Les niveaux de gris (8/16 bits) sont enregistrés en PNG, les photos
+    couleur en WebP sans perte si disponible. Le nouveau fichier n'est
+    conservé que s'il est plus petit et que son décodage est strictement
+    identique à un nouveau décodage de l'original.
+
+    Returns:
+        str: Chemin du nouveau fichier, ou None si l'original est conservé
+    """
+    if not PIL_AVAILABLE or not NUMPY_AVAILABLE:
+        return None
+
+    base = os.path.splitext(chemin)[0]
+    try:
+        pixels = pixels_originaux(chemin)
+        if pixels is None:
+            return None
+        image = Image.fromarray(pixels)  # uint16 -> I;16, uint8 -> L / RGB / RGBA
+    except Exception:
+        return None  # Format non reconnu
+
+    if WEBP_AVAILABLE and image.mode in ('RGB', 'RGBA'):
+        chemin_dest = base + ".webp"
+        # exact : couleurs des pixels transparents conservées
+        options = {'lossless': True, 'quality': 100, 'method': 4, 'exact': True}
+    else:
+        chemin_dest = base + ".png"
+        options = {'optimize': True}
+
+    if os.path.exists(chemin_dest):
+        return None
+
+    chemin_temp = chemin_dest + ".tmp"
+    try:
+        image.save(chemin_temp, format=os.path.splitext(chemin_dest)[1][1:].upper(), **options)
+
+        # Vérification pixel à pixel (formes et valeurs) avant de remplacer l'original
+        with Image.open(chemin_temp) as relue:
+            identique = np.array_equal(np.asarray(relue), pixels_originaux(chemin))
+
+        if not identique or os.path.getsize(chemin_temp) >= os.path.getsize(chemin):
+            os.remove(chemin_temp)
+            return None
+
+        os.replace(chemin_temp, chemin_dest)
+        return chemin_dest
+
+    except Exception:
+        if os.path.exists(chemin_temp):
+            os.remove(chemin_temp)
+        return None
+
+
+def chemin_archive(image):
+    """Archive ZIP annuelle correspondant à la date de prise de vue"""
+    annee = (image.get('date_capture') or image.get('date_creation') or "")[:4] or "inconnue"
+    return os.path.join(path_manager.get_archives_images_folder(), f"imagerie_{annee}.zip")
+
+
+def archiver_image(image):
+    """
+    Place une image dans l'archive compressée et libère le dossier actif
+
+    Le membre est relu et vérifié (CRC) avant la suppression du fichier actif.
+    """
+    chemin = image['chemin_fichier']
+    archive = image.get('archive') or chemin_archive(image)
+    membre = os.path.basename(chemin)
+
+    # Un membre homonyme supprimé mais encore présent serait pris pour cette image
+    retires = db.obtenir_membres_retires(archive).get(archive)
+    if retires and membre in retires:
+        compacter_archive(archive, retires)
+
+    with zipfile.ZipFile(archive, 'a', compression=zipfile.ZIP_DEFLATED, compresslevel=9) as zf:
+        if membre not in zf.namelist():
+            zf.write(chemin, membre)
+
+    with zipfile.ZipFile(archive, 'r') as zf:
+        with zf.open(membre) as f:
+            while f.read(1024 * 1024):  # Lecture complète : vérifie le CRC
+                pass
+
+    if image.get('archive') != archive:
+        db.definir_archive_image(image['id'], archive)
+    os.remove(chemin)
+    return archive
+
+
+def rendre_disponible(image):
+    """
+    Retourne le chemin d'une image en la restaurant si elle est archivée
+
+    La copie restaurée reste dans le dossier actif jusqu'au prochain
+    archivage sans consultation ; l'accès est enregistré.
+
+    Returns:
+        str: Chemin du fichier, ou chaîne vide si introuvable
+    """
+    chemin = image.get('chemin_fichier') or ""
+    archive = image.get('archive')
+
+    if chemin and not os.path.exists(chemin) and archive and os.path.exists(archive):
+        membre = os.path.basename(chemin)
+        with zipfile.ZipFile(archive, 'r') as zf:
+            if membre in zf.namelist():
+                chemin_temp = chemin + ".tmp"
+                with zf.open(membre) as source, open(chemin_temp, 'wb') as dest:
+                    while True:
+                        bloc = source.read(1024 * 1024)
+                        if not bloc:
+                            break
+                        dest.write(bloc)
+                os.replace(chemin_temp, chemin)
+
+    if image.get('id') and os.path.exists(chemin):
+        db.marquer_acces_image(image['id'])
+
+    return chemin if os.path.exists(chemin) else ""
+
+
+def retirer_de_archive(image):
+    """
+    Programme le retrait du membre d'une image de son archive (suppression définitive)
+
+    Le ZIP n'est pas réécrit ici : les membres marqués sont retirés ensemble,
+    une réécriture par archive, au prochain archivage (ArchivageWorker.compacter).
+    """
+    archive = image.get('archive')
+    if archive and image.get('chemin_fichier'):
+        db.marquer_membre_retire(archive, os.path.basename(image['chemin_fichier']))
+
+
+def compacter_archive(archive, membres):
+    """Réécrit une archive sans les membres donnés (supprimée si elle devient vide)"""
+    if os.path.exists(archive):
+        membres = set(membres)
+        with zipfile.ZipFile(archive, 'r') as zf:
+            restants = [info for info in zf.infolist() if info.filename not in membres]
+            if len(restants) < len(zf.infolist()):
+                _reecrire_archive(zf, archive, restants)
+    db.oublier_membres_retires(archive, list(membres))
+
+
+def _reecrire_archive(zf, archive, restants):
+    """Le format ZIP ne permet pas de supprimer un membre : copie des restants"""
+    if not restants:
+        zf.close()
+        os.remove(archive)
+        return
+
+    chemin_temp = archive + ".tmp"
+    with zipfile.ZipFile(chemin_temp, 'w', compression=zipfile.ZIP_DEFLATED, compresslevel=9) as dest:
+        for info in restants:
+            with zf.open(info) as source, dest.open(info, 'w') as cible:
+                while True:
+                    bloc = source.read(1024 * 1024)
+                    if not bloc:
+                        break
+                    cible.write(bloc)
+    zf.close()
+    os.replace(chemin_temp, archive)
+
+
+class ArchivageWorker(QThread):
+    """Recompression puis archivage du dossier des images en arrière-plan"""
+
+    progression = Signal(str, int, int)  # étape, traités, total
+    termine = Signal(dict)               # métriques
+
+    def __init__(self, jours_recompression=JOURS_RECOMPRESSION, jours_archivage=JOURS_ARCHIVAGE, parent=None):
+        super().__init__(parent)
+        self.jours_recompression = jours_recompression
+        self.jours_archivage = jours_archivage
+        self._annule = False
+
+    def annuler(self):
+        self._annule = True
+
+    def _date_limite(self, jours):
+        return (datetime.now() - timedelta(days=jours)).strftime('%Y-%m-%d')
+
+    def run(self):
+        debut = time.perf_counter()
+        metriques = {
+            'recompressees': 0,
+            'archivees': 0,
+            'octets_traites': 0,
+            'octets_avant': 0,
+            'octets_apres': 0,
+            'erreurs': [],
+            'archives_compactees': 0
+        }
+
+        self.compacter(metriques)
+        self.recompresser(metriques)
+        if not self._annule:
+            self.archiver(metriques)
+
+        metriques['duree'] = time.perf_counter() - debut
+        metriques['debit_mo_s'] = metriques['octets_traites'] / 1048576 / max(metriques['duree'], 1e-6)
+        metriques['octets_gagnes'] = metriques['octets_avant'] - metriques['octets_apres']
+        self.termine.emit(metriques)
+
+    def compacter(self, metriques):
+        """Étape 0 : retrait des images supprimées depuis le dernier archivage"""
+        retraits = db.obtenir_membres_retires()
+        for traitees, (archive, membres) in enumerate(retraits.items(), 1):
+            if self._annule:
+                break
+            try:
+                compacter_archive(archive, membres)
+                metriques['archives_compactees'] += 1
+            except Exception as e:
+                metriques['erreurs'].append(f"{os.path.basename(archive)}: {e}")
+            self.progression.emit("Compactage", traitees, len(retraits))
+
+    def recompresser(self, metriques):
+        """Étape 1 : recompression sans perte des images actives non compressées"""
+        candidates = [img for img in db.obtenir_images_inactives(self._date_limite(self.jours_recompression))
+                      if os.path.splitext(img['chemin_fichier'])[1].lower() in EXTENSIONS_NON_COMPRESSEES
+                      and not img.get('archive')  # Nom du membre déjà fixé dans l'archive
+                      and os.path.exists(img['chemin_fichier'])]
+        total = len(candidates)
+
+        with ThreadPoolExecutor(max_workers=NOMBRE_WORKERS) as pool:
+            futures = {pool.submit(recompresser_image, img['chemin_fichier']): img for img in candidates}
+            restantes = set(futures)
+            for traitees, future in enumerate(as_completed(futures), 1):
+                if self._annule:
+                    # Les recompressions déjà lancées finissent : leur fichier, jamais
+                    # enregistré, est supprimé (sinon il bloquerait les prochaines exécutions)
+                    for f in restantes:
+                        if f.cancel():
+                            continue
+                        try:
+                            nouveau = f.result()
+                        except Exception:
+                            nouveau = None
+                        if nouveau and os.path.exists(nouveau):
+                            try:
+                                os.remove(nouveau)
+                            except OSError:
+                                pass
+                    break
+
+                restantes.discard(future)
+                image = futures[future]
+                ancien = image['chemin_fichier']
+
+                try:
+                    nouveau = future.result()
+                except Exception as e:
+                    metriques['erreurs'].append(f"{image['nom_fichier']}: {e}")
+                    nouveau = None
+
+                enregistre = False
+                try:
+                    taille_avant = os.path.getsize(ancien)
+                    metriques['octets_traites'] += taille_avant
+                    if nouveau:
+                        taille_apres = os.path.getsize(nouveau)
+                        enregistre = db.mettre_a_jour_fichier_image(image['id'], nouveau, taille_apres)
+                        if enregistre:
+                            metriques['recompressees'] += 1
+                            metriques['octets_avant'] += taille_avant
+                            metriques['octets_apres'] += taille_apres
+                            os.remove(ancien)
+                            if os.path.exists(ancien + ".json"):
+                                os.remove(ancien + ".json")  # Dimensions RAW désormais dans le PNG
+                        else:
+                            os.remove(nouveau)
+                except OSError as e:
+                    # Fichier verrouillé ou disparu entre-temps : compté en erreur, l'étape continue
+                    metriques['erreurs'].append(f"{image['nom_fichier']}: {e}")
+                    if nouveau and not enregistre and os.path.exists(nouveau):
+                        try:
+                            os.remove(nouveau)
+                        except OSError:
+                            pass
+
+                self.progression.emit("Recompression", traitees, total)
+
+    def archiver(self, metriques):
+        """Étape 2 : déplacement des images non consultées dans les archives annuelles"""
+        candidates = [img for img in db.obtenir_images_inactives(self._date_limite(self.jours_archivage))
+                      if os.path.exists(img['chemin_fichier'])]
+        total = len(candidates)
+
+        # Écritures séquentielles : un fichier ZIP ne supporte pas l'ajout concurrent
+        for traitees, image in enumerate(candidates, 1):
+            if self._annule:
+                break
+
+            taille = os.path.getsize(image['chemin_fichier'])
+            deja_archivee = bool(image.get('archive'))
+            try:
+                archive = image.get('archive') or chemin_archive(image)
+                taille_archive = os.path.getsize(archive) if os.path.exists(archive) else 0
+                archiver_image(image)
+
+                metriques['archivees'] += 1
+                metriques['octets_traites'] += taille
+                if not deja_archivee:
+                    metriques['octets_avant'] += taille
+                    metriques['octets_apres'] += os.path.getsize(archive) - taille_archive
+            except Exception as e:
+                metriques['erreurs'].append(f"{image['nom_fichier']}: {e}")
+
+            self.progression.emit("Archivage", traitees, total)
@@ -0,0 +1,173 @@
+# -*- coding: utf-8 -*-
+"""
+Comparaison de deux radiographies (contrôle avant/après)
+Recalage par recherche de translation, carte de différence et superposition
+colorée, calculés avec NumPy hors du thread de l'interface
+"""
+
+from PySide6.QtCore import QThread, Signal
+from PySide6.QtGui import QImage
+
+from src.radiographie import charger_image_radiographique, tableau_vers_qimage
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+try:
+    from PIL import Image
+    PIL_AVAILABLE = True
+except ImportError:
+    PIL_AVAILABLE = False
+
+# Décalage maximal recherché, en fraction de la plus petite dimension
+DECALAGE_MAX_RELATIF = 0.1
+
+# Côté maximal de l'image réduite utilisée pour la recherche grossière
+COTE_RECHERCHE = 128
+
+
+def charger_normalise(chemin, forme=None):
+    """
+    Charge une image en niveaux de gris normalisés [0, 1] (float32)
+
+    Les radiographies 16 bits sont fenêtrées automatiquement pour que deux
+    clichés d'expositions différentes restent comparables.
+
+    Args:
+        forme (tuple): (hauteur, largeur) à laquelle redimensionner l'image
+    """
+    radiographie = charger_image_radiographique(chemin)
+    if radiographie is not None:
+        centre, largeur = radiographie.fenetrage_par_defaut()
+        donnees = (radiographie.donnees.astype(np.float32) - (centre - largeur / 2.0)) / largeur
+        donnees = np.clip(donnees, 0.0, 1.0)
+    else:
+        with Image.open(chemin) as image:
+            donnees = np.asarray(image.convert('L'), dtype=np.float32) / 255.0
+
+    if forme is not None and donnees.shape != tuple(forme):
+        image = Image.fromarray(donnees).resize((forme[1], forme[0]), Image.BILINEAR)
+        donnees = np.asarray(image, dtype=np.float32)
+
+    return donnees
+
+
+def _reduire(donnees, facteur):
+    """Réduction par moyenne de blocs facteur x facteur"""
+    if facteur <= 1:
+        return donnees
+    hauteur = donnees.shape[0] // facteur * facteur
+    largeur = donnees.shape[1] // facteur * facteur
+    return donnees[:hauteur, :largeur].reshape(hauteur // facteur, facteur,
+                                               largeur // facteur, facteur).mean(axis=(1, 3))
+
+
+def _ecart_moyen(reference, mobile, dx, dy):
+    """Écart absolu moyen sur la zone commune après décalage de (dx, dy)"""
+    hauteur, largeur = reference.shape
+    ref = reference[max(dy, 0):hauteur + min(dy, 0), max(dx, 0):largeur + min(dx, 0)]
+    mob = mobile[max(-dy, 0):hauteur + min(-dy, 0), max(-dx, 0):largeur + min(-dx, 0)]
+    if ref.size == 0:
+        return np.inf
+    # Centrer chaque zone compense une différence globale d'exposition
+    return float(np.abs((ref - ref.mean()) - (mob - mob.mean())).mean())
+
+
+def _meilleur_decalage(reference, mobile, candidats):
+    return min(candidats, key=lambda d: _ecart_moyen(reference, mobile, d[0], d[1]))
+
+
+def recaler_translation(reference, mobile):
+    """
+    Recherche la translation (dx, dy) alignant `mobile` sur `reference`
+
+    Recherche exhaustive sur une version réduite, puis affinage niveau par
+    niveau (pyramide de facteur 2) jusqu'au pixel près.
+
+    Returns:
+        tuple: (dx, dy) en pixels de l'image de référence
+    """
+    facteur = 1
+    while max(reference.shape) // (facteur * 2) >= COTE_RECHERCHE:
+        facteur *= 2
+
+    ref_reduite = _reduire(reference, facteur)
+    mob_reduite = _reduire(mobile, facteur)
+    rayon = max(1, int(min(ref_reduite.shape) * DECALAGE_MAX_RELATIF))
+    candidats = [(dx, dy) for dy in range(-rayon, rayon + 1) for dx in range(-rayon, rayon + 1)]
+    dx, dy = _meilleur_decalage(ref_reduite, mob_reduite, candidats)
+
+    while facteur > 1:
+        facteur //= 2
+        dx, dy = dx * 2, dy * 2
+        candidats = [(dx + i, dy + j) for j in (-1, 0, 1) for i in (-1, 0, 1)]
+        dx, dy = _meilleur_decalage(_reduire(reference, facteur), _reduire(mobile, facteur), candidats)
+
+    return dx, dy
+
+
+def decaler(donnees, dx, dy):
+    """Translate une image de (dx, dy), les bords découverts valent 0"""
+    resultat = np.zeros_like(donnees)
+    hauteur, largeur = donnees.shape
+    resultat[max(dy, 0):hauteur + min(dy, 0), max(dx, 0):largeur + min(dx, 0)] = \
+        donnees[max(-dy, 0):hauteur + min(-dy, 0), max(-dx, 0):largeur + min(-dx, 0)]
+    return resultat
+
+
+def carte_difference(reference, mobile_recale):
+    """
+    Différence signée centrée sur le gris moyen
+
+    Gris = inchangé, clair = zone plus dense sur le second cliché,
+    sombre = zone moins dense (perte osseuse, lésion, ...).
+    """
+    difference = (mobile_recale - mobile_recale.mean()) - (reference - reference.mean())
+    amplitude = max(float(np.percentile(np.abs(difference), 99.5)), 1e-6)
+    return (np.clip(difference / amplitude, -1.0, 1.0) * 127.5 + 127.5).astype(np.uint8)
+
+
+def superposition(reference, mobile_recale):
+    """Superposition colorée : référence en magenta, second cliché en vert"""
+    ref = (reference * 255.0).astype(np.uint8)
+    mob = (mobile_recale * 255.0).astype(np.uint8)
+    rgb = np.ascontiguousarray(np.dstack((ref, mob, ref)))
+    hauteur, largeur = ref.shape
+    image = QImage(rgb.data, largeur, hauteur, rgb.strides[0], QImage.Format.Format_RGB888)
+    return image.copy()
+
+
+class ComparaisonWorker(QThread):
+    """Charge, recale et compare deux images en arrière-plan"""
+
+    termine = Signal(object)  # dict: difference, superposition (QImage), dx, dy
+    erreur = Signal(str)
+
+    def __init__(self, chemin_reference, chemin_comparaison, parent=None):
+        super().__init__(parent)
+        self.chemin_reference = chemin_reference
+        self.chemin_comparaison = chemin_comparaison
+
+    def run(self):
+        if not NUMPY_AVAILABLE or not PIL_AVAILABLE:
+            self.erreur.emit("NumPy et Pillow sont nécessaires pour la comparaison d'images.")
+            return
+
+        try:
+            reference = charger_normalise(self.chemin_reference)
+            mobile = charger_normalise(self.chemin_comparaison, reference.shape)
+
+            dx, dy = recaler_translation(reference, mobile)
+            mobile_recale = decaler(mobile, dx, dy)
+
+            self.termine.emit({
+                'difference': tableau_vers_qimage(carte_difference(reference, mobile_recale)),
+                'superposition': superposition(reference, mobile_recale),
+                'dx': dx,
+                'dy': dy
+            })
+        except Exception as e:
+            self.erreur.emit(str(e))
@@ -5,17 +5,22 @@ Gère l'état partagé entre toutes les vues
 """
 
 from PySide6.QtCore import QObject, Signal
+from database import db
 
 class GlobalContext(QObject):
     """Contexte global pour partager l'état entre les vues"""
     
     # Signaux pour notifier les changements
     patient_changed = Signal(int)  # patient_id
+    # Flux des écritures de la base : table, opération ('ajout', 'modification', 'suppression'), id.
+    # Émis depuis un thread de travail, il est remis aux vues dans le thread de l'interface.
+    donnees_modifiees = Signal(str, str, int)
     
     def __init__(self):
         super().__init__()
         self._selected_patient_id = None
         self._selected_patient_name = ""
+        db.abonner_changements(self.donnees_modifiees.emit)
     
     @property
     def selected_patient_id(self):
@@ -0,0 +1,120 @@
+# -*- coding: utf-8 -*-
+"""
+Recherche des prochains créneaux libres de l'agenda
+Les rendez-vous de toute la fenêtre sont lus en une requête, puis chaque
+journée de chaque fauteuil est balayée dans l'ordre des heures : les trous
+d'au moins la durée demandée entre l'ouverture et la fermeture sont retenus.
+"""
+
+from datetime import date, datetime, timedelta
+
+from database import db, DUREE_RDV_DEFAUT
+
+# Horaires d'ouverture par défaut du cabinet
+HEURE_OUVERTURE = "08:00"
+HEURE_FERMETURE = "18:00"
+
+# Jours travaillés (isoweekday : 1 = lundi ... 7 = dimanche)
+JOURS_OUVRES = (1, 2, 3, 4, 5, 6)
+
+# Les débuts de créneau sont arrondis à ce pas (minutes)
+PAS_CRENEAU = 5
+
+# Fenêtre de recherche par défaut (jours)
+FENETRE_JOURS = 90
+
+
+def _minutes(heure):
+    heures, minutes = heure.split(':')[:2]
+    return int(heures) * 60 + int(minutes)
+
+
+def _heure(minutes):
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+def _arrondir(minutes):
+    return -(-minutes // PAS_CRENEAU) * PAS_CRENEAU
+
+
+def creneaux_libres(rendez_vous, debut, fin, duree, fauteuils=(1,), ouverture=HEURE_OUVERTURE,
+                    fermeture=HEURE_FERMETURE, nombre=10, jours=JOURS_OUVRES, maintenant=None):
+    """
+    Calcule les premiers intervalles libres à partir des rendez-vous réservés
+
+    Args:
+        rendez_vous (list): Rendez-vous de la fenêtre, triés par date et heure
+        debut, fin (date): Fenêtre de recherche (bornes incluses)
+        duree (int): Durée minimale d'un créneau (minutes)
+        fauteuils (iterable): Fauteuils à considérer
+        ouverture, fermeture (str): Horaires de la journée (HH:MM)
+        nombre (int): Nombre de créneaux voulus
+        jours (iterable): Jours travaillés (isoweekday)
+        maintenant (datetime): Les créneaux déjà passés aujourd'hui sont ignorés
+
+    Returns:
+        list: [{date, debut, fin, fauteuil}, ...] dans l'ordre chronologique
+    """
+    fauteuils = sorted(set(fauteuils))
+    ouverture, fermeture = _minutes(ouverture), _minutes(fermeture)
+
+    # Occupations par (date, fauteuil), déjà dans l'ordre des heures de début
+    occupations = {}
+    for rdv in rendez_vous:
+        if rdv.get('statut') == 'annule':
+            continue
+        fauteuil = rdv.get('fauteuil') or 1
+        if fauteuil not in fauteuils:
+            continue
+        depart = _minutes(rdv['heure_rdv'])
+        occupations.setdefault((rdv['date_rdv'], fauteuil), []).append(
+            (depart, depart + (rdv.get('duree') or DUREE_RDV_DEFAUT)))
+
+    resultats = []
+    jour = debut
+    while jour <= fin and len(resultats) < nombre:
+        if jour.isoweekday() in jours:
+            ouverture_jour = ouverture
+            if maintenant is not None and jour == maintenant.date():
+                ouverture_jour = max(ouverture, _arrondir(maintenant.hour * 60 + maintenant.minute))
+
+            libres = []
+            for fauteuil in fauteuils:
+                # Balayage : curseur = fin de la dernière occupation rencontrée
+                curseur = ouverture_jour
+                for depart, arrivee in occupations.get((jour.isoformat(), fauteuil), ()):
+                    if curseur >= fermeture:
+                        break
+                    if min(depart, fermeture) - curseur >= duree:
+                        libres.append((curseur, min(depart, fermeture), fauteuil))
+                    curseur = max(curseur, _arrondir(arrivee))
+                if fermeture - curseur >= duree:
+                    libres.append((curseur, fermeture, fauteuil))
+
+            for depart, arrivee, fauteuil in sorted(libres):
+                resultats.append({
+                    'date': jour.isoformat(),
+                    'debut': _heure(depart),
+                    'fin': _heure(arrivee),
+                    'fauteuil': fauteuil
+                })
+                if len(resultats) >= nombre:
+                    break
+        jour += timedelta(days=1)
+
+    return resultats
+
+
+def chercher_creneaux(duree, debut=None, jours_fenetre=FENETRE_JOURS, fauteuils=(1,),
+                      ouverture=HEURE_OUVERTURE, fermeture=HEURE_FERMETURE, nombre=10):
+    """
+    Prochains créneaux libres à partir de debut (aujourd'hui par défaut)
+
+    Returns:
+        list: voir creneaux_libres()
+    """
+    debut = debut or date.today()
+    fin = debut + timedelta(days=jours_fenetre - 1)
+    rendez_vous = db.obtenir_rendez_vous_range(debut.isoformat(), fin.isoformat())
+    return creneaux_libres(rendez_vous, debut, fin, duree, fauteuils, ouverture, fermeture,
+                           nombre, maintenant=datetime.now())
@@ -0,0 +1,265 @@
+# -*- coding: utf-8 -*-
+"""
+Empreintes perceptuelles (dHash 64 bits) et recherche des images quasi identiques
+Une même radiographie réimportée sous un autre nom, recompressée ou recadrée
+de quelques pixels conserve une empreinte à faible distance de Hamming.
+"""
+
+import os
+import threading
+
+from PySide6.QtCore import QThread, Signal
+
+from database import db
+from src.radiographie import charger_image_radiographique
+from src.image_mappee import ouvrir_image_mappee
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+try:
+    from PIL import Image
+    PIL_AVAILABLE = True
+except ImportError:
+    PIL_AVAILABLE = False
+
+# Distance de Hamming maximale (sur 64 bits) pour signaler deux images comme similaires
+SEUIL_SIMILARITE = 6
+
+# Grille du dHash : 9 colonnes pour 8 différences horizontales par ligne
+COLONNES_DHASH = 9
+LIGNES_DHASH = 8
+
+# Empreintes enregistrées par transaction lors du rattrapage des images anciennes
+TAILLE_LOT_EMPREINTES = 100
+
+
+def calculer_dhash(chemin):
+    """
+    Calcule l'empreinte perceptuelle (dHash) d'une image
+
+    L'image en niveaux de gris (pleine dynamique pour les radiographies 16 bits)
+    est réduite par moyenne de blocs sur une grille 9x8, puis chaque bit indique
+    si un bloc est plus clair que son voisin de droite.
+
+    Returns:
+        int: Empreinte signée 64 bits (stockable en INTEGER SQLite) ou None
+    """
+    if not NUMPY_AVAILABLE:
+        return None
+
+    donnees = _charger_niveaux_de_gris(chemin)
+    if donnees is None or donnees.shape[0] < LIGNES_DHASH or donnees.shape[1] < COLONNES_DHASH:
+        return None
+
+    grille = _reduire_par_blocs(donnees.astype(np.float32), LIGNES_DHASH, COLONNES_DHASH)
+    bits = (grille[:, 1:] > grille[:, :-1]).ravel()
+
+    valeur = int(np.packbits(bits).view('>u8')[0])
+    return valeur - (1 << 64) if valeur >= (1 << 63) else valeur
+
+
+def distance_hamming(hash_a, hash_b):
+    """Nombre de bits différents entre deux empreintes 64 bits"""
+    return bin((hash_a ^ hash_b) & 0xFFFFFFFFFFFFFFFF).count("1")
+
+
+def _charger_niveaux_de_gris(chemin):
+    """Tableau 2D en niveaux de gris, sans perte de dynamique si possible"""
+    mappee = ouvrir_image_mappee(chemin)
+    if mappee is not None:
+        # Grand fichier : la grille 9x8 n'a besoin que d'une vue sous-échantillonnée
+        apercu, _ = mappee.apercu(COLONNES_DHASH * 32)
+        mappee.fermer()
+        return apercu if apercu.ndim == 2 else apercu.mean(axis=2)
+
+    radiographie = charger_image_radiographique(chemin)
+    if radiographie is not None:
+        return radiographie.donnees
+
+    if not PIL_AVAILABLE:
+        return None
+
+    try:
+        with Image.open(chemin) as image:
+            image.draft('L', (COLONNES_DHASH * 32, LIGNES_DHASH * 32))  # Décodage JPEG réduit
+            return np.asarray(image.convert('L'))
+    except Exception:
+        return None
+
+
+def _reduire_par_blocs(donnees, lignes, colonnes):
+    """Moyenne de blocs vectorisée (bornes réparties uniformément)"""
+    bornes_y = np.linspace(0, donnees.shape[0], lignes + 1).astype(int)[:-1]
+    bornes_x = np.linspace(0, donnees.shape[1], colonnes + 1).astype(int)[:-1]
+
+    sommes = np.add.reduceat(np.add.reduceat(donnees, bornes_y, axis=0), bornes_x, axis=1)
+    hauteurs = np.diff(np.append(bornes_y, donnees.shape[0]))
+    largeurs = np.diff(np.append(bornes_x, donnees.shape[1]))
+    return sommes / np.outer(hauteurs, largeurs)
+
+
+class ArbreBK:
+    """
+    Arbre BK sur la distance de Hamming
+
+    Chaque nœud range ses enfants par distance ; une recherche de rayon r
+    n'explore que les enfants de distance [d - r, d + r] (inégalité triangulaire).
+    """
+
+    def __init__(self):
+        self.racine = None
+        self.taille = 0
+
+    def ajouter(self, empreinte, valeur):
+        """Ajoute une empreinte associée à une valeur (ID d'image)"""
+        self.taille += 1
+        if self.racine is None:
+            self.racine = (empreinte, [valeur], {})
+            return
+
+        noeud = self.racine
+        while True:
+            distance = distance_hamming(empreinte, noeud[0])
+            if distance == 0:
+                noeud[1].append(valeur)
+                return
+            enfant = noeud[2].get(distance)
+            if enfant is None:
+                noeud[2][distance] = (empreinte, [valeur], {})
+                return
+            noeud = enfant
+
+    def rechercher(self, empreinte, rayon):
+        """
+        Retourne les valeurs à distance <= rayon
+
+        Returns:
+            list: [(distance, valeur), ...] triée par distance croissante
+        """
+        resultats = []
+        if self.racine is None:
+            return resultats
+
+        a_visiter = [self.racine]
+        while a_visiter:
+            noeud_hash, valeurs, enfants = a_visiter.pop()
+            distance = distance_hamming(empreinte, noeud_hash)
+            if distance <= rayon:
+                resultats.extend((distance, valeur) for valeur in valeurs)
+            for distance_enfant, enfant in enfants.items():
+                if distance - rayon <= distance_enfant <= distance + rayon:
+                    a_visiter.append(enfant)
+
+        resultats.sort(key=lambda r: r[0])
+        return resultats
+
+
+# Index de la clinique reconstruit uniquement quand l'archive change
+# (lu et reconstruit depuis les threads d'import et de recherche : accès sous verrou)
+_index_cache = {'signature': None, 'arbre': None, 'patients': {}}
+_verrou_index = threading.Lock()
+
+
+def index_empreintes():
+    """
+    Retourne l'arbre BK de toutes les images de la clinique
+
+    Returns:
+        tuple: (ArbreBK, dict image_id -> patient_id)
+    """
+    with _verrou_index:
+        signature = db.obtenir_signature_empreintes()
+        if _index_cache['arbre'] is None or _index_cache['signature'] != signature:
+            arbre = ArbreBK()
+            patients = {}
+            for image_id, patient_id, empreinte in db.obtenir_empreintes_perceptuelles():
+                arbre.ajouter(empreinte, image_id)
+                patients[image_id] = patient_id
+            _index_cache.update(signature=signature, arbre=arbre, patients=patients)
+
+        # Un arbre reconstruit remplace l'ancien sans le modifier : lecture sûre hors verrou
+        return _index_cache['arbre'], _index_cache['patients']
+
+
+def rechercher_similaires(empreinte, patient_id=None, exclure_id=None, rayon=SEUIL_SIMILARITE):
+    """
+    Recherche les images proches d'une empreinte
+
+    Args:
+        empreinte (int): dHash de référence
+        patient_id (int): Limiter au dossier d'un patient (None = toute la clinique)
+        exclure_id (int): Image à exclure (l'image de référence elle-même)
+
+    Returns:
+        list: [(distance, image_id), ...]
+    """
+    if empreinte is None:
+        return []
+
+    arbre, patients = index_empreintes()
+    return [(distance, image_id) for distance, image_id in arbre.rechercher(empreinte, rayon)
+            if image_id != exclure_id and (patient_id is None or patients.get(image_id) == patient_id)]
+
+
+def calculer_empreintes_manquantes(interrompre=lambda: False):
+    """
+    Calcule l'empreinte des images importées avant son introduction
+
+    Chaque image n'est tentée qu'une fois (les illisibles restent sans empreinte) ;
+    les résultats sont enregistrés par lots. Les fichiers absents du dossier actif
+    (archivés) sont repris lors d'un prochain rattrapage.
+
+    Args:
+        interrompre: Fonction consultée entre deux images (arrêt de l'application)
+    """
+    lot = []
+    for image in db.obtenir_images_sans_empreinte():
+        if interrompre():
+            break
+        chemin = image['chemin_fichier']
+        if chemin and os.path.exists(chemin):
+            lot.append((image['id'], calculer_dhash(chemin)))
+        if len(lot) >= TAILLE_LOT_EMPREINTES:
+            db.enregistrer_empreintes_perceptuelles(lot)
+            lot = []
+    if lot:
+        db.enregistrer_empreintes_perceptuelles(lot)
+
+
+class RattrapageEmpreintesWorker(QThread):
+    """Rattrapage unique, en arrière-plan, des empreintes des images anciennes"""
+
+    def run(self):
+        calculer_empreintes_manquantes(self.isInterruptionRequested)
+
+    def arreter(self):
+        self.requestInterruption()
+        self.wait()
+
+
+class RechercheSimilairesWorker(QThread):
+    """Recherche en arrière-plan les images similaires à une image de l'archive"""
+
+    termine = Signal(list)  # [(distance, dict image), ...]
+
+    def __init__(self, image, toute_la_clinique=True, parent=None):
+        super().__init__(parent)
+        self.image = image
+        self.toute_la_clinique = toute_la_clinique
+
+    def run(self):
+        image = db.obtenir_image_par_id(self.image['id'])
+        empreinte = image.get('hash_perceptuel')
+        patient_id = None if self.toute_la_clinique else image.get('patient_id')
+
+        resultats = []
+        for distance, image_id in rechercher_similaires(empreinte, patient_id, image.get('id')):
+            similaire = db.obtenir_image_par_id(image_id)
+            if similaire:
+                resultats.append((distance, similaire))
+
+        self.termine.emit(resultats)
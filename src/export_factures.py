@@ -0,0 +1,153 @@
+# -*- coding: utf-8 -*-
+"""
+Export par lot des factures PDF (clôture mensuelle, dossier patient) et des
+relevés de compte des patients. Les documents sont lus en une requête puis
+rendus en parallèle dans des processus, par paquets.
+"""
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from PySide6.QtCore import QThread, Signal
+
+from database import db
+from src.path_manager import path_manager
+from src.factures_pdf import generer_paquet, generer_paquet_releves
+
+# Documents par tâche : amortit l'envoi des données aux processus
+TAILLE_PAQUET = 50
+
+# En dessous, le démarrage des processus coûte plus qu'il ne rapporte
+SEUIL_PROCESSUS = 2 * TAILLE_PAQUET
+
+NOMBRE_PROCESSUS = max(1, min(8, (os.cpu_count() or 2) - 1))
+
+
+def decouper(documents, taille=TAILLE_PAQUET):
+    """Découpe la liste des documents en paquets"""
+    return [documents[i:i + taille] for i in range(0, len(documents), taille)]
+
+
+def rendre_par_paquets(generer, dossier, documents, enregistrer, annule):
+    """
+    Rend les documents avec generer(dossier, paquet), en processus au-delà de SEUIL_PROCESSUS
+
+    enregistrer(resultats) est appelé à chaque paquet terminé (document par document
+    sans processus), annule() est consulté entre deux paquets. Après annulation, les
+    paquets déjà lancés écrivent leurs PDF : ils sont enregistrés eux aussi.
+
+    Returns:
+        list: Erreurs des paquets perdus (processus interrompu)
+    """
+    erreurs = []
+    os.makedirs(dossier, exist_ok=True)
+
+    if len(documents) < SEUIL_PROCESSUS:
+        for paquet in decouper(documents, 1):
+            if annule():
+                break
+            enregistrer(generer(dossier, paquet))
+        return erreurs
+
+    def enregistrer_paquet(future):
+        try:
+            enregistrer(future.result())
+        except Exception as e:
+            erreurs.append(str(e))
+
+    with ProcessPoolExecutor(max_workers=NOMBRE_PROCESSUS) as pool:
+        futures = [pool.submit(generer, dossier, paquet) for paquet in decouper(documents)]
+        restantes = set(futures)
+        for future in as_completed(futures):
+            if annule():
+                for f in restantes:
+                    f.cancel()
+                break
+            restantes.discard(future)
+            enregistrer_paquet(future)
+
+        # Paquets en cours (ou finis) au moment de l'annulation : pas de PDF orphelin sur le disque
+        for future in restantes:
+            if not future.cancelled():
+                enregistrer_paquet(future)
+    return erreurs
+
+
+class ExportFacturesWorker(QThread):
+    """Génère les PDF d'un lot de factures hors du thread de l'interface"""
+
+    progression = Signal(int, int)  # générées, total
+    termine = Signal(dict)          # résumé : generees, erreurs, dossier, duree
+
+    def __init__(self, patient_id=None, date_debut=None, date_fin=None, dossier=None, parent=None):
+        super().__init__(parent)
+        self.patient_id = patient_id
+        self.date_debut = date_debut
+        self.date_fin = date_fin
+        self.dossier = dossier or path_manager.get_factures_folder()
+        self._annule = False
+
+    def annuler(self):
+        self._annule = True
+
+    def run(self):
+        debut = time.perf_counter()
+        factures = db.obtenir_factures_pour_export(self.patient_id, self.date_debut, self.date_fin)
+        ids = {f['numero_facture']: f['id'] for f in factures}
+        total = len(factures)
+        resume = {'total': total, 'generees': 0, 'erreurs': [], 'dossier': self.dossier}
+        chemins = []
+
+        def enregistrer(resultats):
+            for numero, chemin, erreur in resultats:
+                if chemin:
+                    chemins.append((ids[numero], chemin))
+                    resume['generees'] += 1
+                else:
+                    resume['erreurs'].append(f"{numero}: {erreur}")
+            self.progression.emit(resume['generees'] + len(resume['erreurs']), total)
+
+        resume['erreurs'] += rendre_par_paquets(generer_paquet, self.dossier, factures,
+                                                enregistrer, lambda: self._annule)
+
+        db.definir_chemins_pdf_factures(chemins)
+        resume['duree'] = time.perf_counter() - debut
+        self.termine.emit(resume)
+
+
+class ExportRelevesWorker(QThread):
+    """Génère les relevés de compte des patients dont le solde reste dû"""
+
+    progression = Signal(int, int)  # générés, total
+    termine = Signal(dict)          # résumé : generees, erreurs, dossier, duree
+
+    def __init__(self, patient_id=None, date_debut=None, date_fin=None, dossier=None, parent=None):
+        super().__init__(parent)
+        self.patient_id = patient_id
+        self.date_debut = date_debut
+        self.date_fin = date_fin
+        self.dossier = dossier or path_manager.get_releves_folder()
+        self._annule = False
+
+    def annuler(self):
+        self._annule = True
+
+    def run(self):
+        debut = time.perf_counter()
+        releves = db.obtenir_releves_patients(self.date_debut, self.date_fin, self.patient_id)
+        total = len(releves)
+        resume = {'total': total, 'generees': 0, 'erreurs': [], 'dossier': self.dossier}
+
+        def enregistrer(resultats):
+            for patient, chemin, erreur in resultats:
+                if chemin:
+                    resume['generees'] += 1
+                else:
+                    resume['erreurs'].append(f"{patient}: {erreur}")
+            self.progression.emit(resume['generees'] + len(resume['erreurs']), total)
+
+        resume['erreurs'] += rendre_par_paquets(generer_paquet_releves, self.dossier, releves,
+                                                enregistrer, lambda: self._annule)
+        resume['duree'] = time.perf_counter() - debut
+        self.termine.emit(resume)
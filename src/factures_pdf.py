@@ -0,0 +1,276 @@
+# -*- coding: utf-8 -*-
+"""
+Rendu PDF des factures, des reçus de paiement et des relevés de compte
+Module sans dépendance à Qt ni à la base de données : il est importé par les
+processus de l'export par lot, qui reçoivent des factures déjà chargées.
+"""
+
+import os
+from datetime import datetime
+from functools import partial
+from xml.sax.saxutils import escape
+
+from src.ressources_pdf import preparer_image
+
+try:
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.lib.units import cm
+    from reportlab.platypus import (BaseDocTemplate, SimpleDocTemplate, PageTemplate, Frame,
+                                    CallerMacro, Paragraph, Spacer, Table, TableStyle)
+    REPORTLAB_AVAILABLE = True
+except ImportError:
+    REPORTLAB_AVAILABLE = False
+
+# Image de fond des factures
+IMAGE_FOND = os.path.join(os.path.dirname(__file__), "..", "assets", "icons", "grosse_dent.ico")
+
+# Colonnes du tableau des actes (points)
+COLONNES = ("Acte", "Quantité", "PU (DT)", "Total (DT)")
+LARGEURS_COLONNES = (200, 100, 100, 100)
+MARGE_X = 50
+
+# Colonnes du relevé de compte (points)
+COLONNES_RELEVE = ("Date", "Libellé", "Débit", "Crédit", "Solde")
+LARGEURS_COLONNES_RELEVE = (70, 205, 75, 75, 75)
+
+# Bas du cadre des lignes : laisse la place à la signature et au numéro de page
+BAS_CADRE = 100
+
+# Lignes par tableau : découpage en pages linéaire quelle que soit la longueur
+LIGNES_PAR_TABLEAU = 25
+
+
+def image_fond():
+    """Fond aplati sur blanc à la résolution d'impression (None si absent)"""
+    return preparer_image(IMAGE_FOND, *A4, fond='white')
+
+
+def nom_fichier_facture(numero_facture):
+    """Nom du PDF d'une facture dans le dossier factures/"""
+    return f"facture_{numero_facture}.pdf"
+
+
+def _dessiner_signature(flowable):
+    """Ligne de signature à position fixe en bas de la page où elle est placée (la dernière)"""
+    c = flowable.canv
+    x, y = c.absolutePosition(0, 0)
+    c.saveState()
+    c.translate(-x, -y)
+    c.setFont("Helvetica", 9)
+    c.drawString(2 * cm, 2.5 * cm, "Signature du médecin : _______________________")
+    c.restoreState()
+
+
+def nom_fichier_releve(releve):
+    """Nom du PDF d'un relevé de compte dans le dossier releves/"""
+    periode = releve['date_fin'] or datetime.now().strftime('%Y-%m-%d')
+    return f"releve_{releve['patient_id']}_{periode}.pdf"
+
+
+def _dessiner_page(titre, infos, colonnes, largeurs, c, doc):
+    """Partie fixe de chaque page : fond, titre, en-tête des colonnes, numéro de page"""
+    largeur, hauteur = A4
+    c.saveState()
+
+    # 🖼️ Image de fond
+    fond = image_fond()
+    if fond is not None:
+        try:
+            c.drawImage(fond, 0, 0, width=largeur, height=hauteur, mask='auto')
+        except Exception:
+            pass  # Fond illisible : facture sans fond
+
+    # ✏️ Texte général
+    y = hauteur - 80
+    c.setFont("Helvetica-Bold", 18)
+    if doc.page == 1:
+        c.drawString(MARGE_X, y, titre)
+        y -= 10
+        c.setFont("Helvetica", 12)
+        for info in infos:
+            y -= 20
+            c.drawString(MARGE_X, y, info)
+        y -= 40
+    else:
+        c.drawString(MARGE_X, y, f"{titre} (suite)")
+        y -= 40
+
+    # 🧾 En-tête du tableau, répété sur chaque page
+    c.setFont("Helvetica-Bold", 12)
+    x = MARGE_X
+    for colonne, largeur_colonne in zip(colonnes, largeurs):
+        c.drawString(x, y, colonne)
+        x += largeur_colonne
+
+    c.setFont("Helvetica", 8)
+    c.drawRightString(MARGE_X + sum(largeurs), 1.2 * cm, f"Page {doc.page}")
+    c.restoreState()
+
+
+def _modele_document(fichier, titre, infos, colonnes=COLONNES, largeurs=LARGEURS_COLONNES):
+    """Document à deux modèles de page : première page (en-tête complet) et suite"""
+    largeur, hauteur = A4
+    largeur_tableau = sum(largeurs)
+    dessiner = partial(_dessiner_page, titre, infos, colonnes, largeurs)
+    haut_premiere = hauteur - 80 - 10 - 20 * len(infos) - 40
+
+    # Le cadre commence sous l'en-tête des colonnes (ligne de base - 6 pt)
+    def cadre(haut):
+        return Frame(MARGE_X, BAS_CADRE, largeur_tableau, haut - BAS_CADRE,
+                     leftPadding=0, rightPadding=0, topPadding=0, bottomPadding=0)
+
+    doc = BaseDocTemplate(fichier, pagesize=A4, title=titre)
+    doc.addPageTemplates([
+        PageTemplate('premiere', [cadre(haut_premiere - 6)], onPage=dessiner, autoNextPageTemplate='suite'),
+        PageTemplate('suite', [cadre(hauteur - 120 - 6)], onPage=dessiner)
+    ])
+    return doc
+
+
+def _style_lignes():
+    return TableStyle([
+        ('FONT', (0, 0), (-1, -1), 'Helvetica', 11),
+        ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+        ('LEFTPADDING', (0, 0), (-1, -1), 0),
+        ('RIGHTPADDING', (0, 0), (-1, -1), 6),
+        ('TOPPADDING', (0, 0), (-1, -1), 4),
+        ('BOTTOMPADDING', (0, 0), (-1, -1), 5),
+    ])
+
+
+def generer_facture_pdf(fichier, facture):
+    """
+    Génère une facture, sur autant de pages que nécessaire
+
+    Les lignes sont réparties en petits tableaux de LIGNES_PAR_TABLEAU lignes :
+    ReportLab découpe un tableau en recalculant tout le reste à chaque page, ce
+    qui rend un tableau unique quadratique sur les longs plans de traitement.
+
+    Args:
+        fichier (str): Chemin du PDF à écrire
+        facture (dict): numero_facture, date_facture, patient (nom affiché) et
+            lignes [{libelle, quantite, prix_unitaire, montant_total}, ...]
+    """
+    style_ligne = _style_lignes()
+    style_libelle = ParagraphStyle('Libelle', fontName='Helvetica', fontSize=11, leading=13)
+    style_total = ParagraphStyle('Total', fontName='Helvetica-Bold', fontSize=12, alignment=2, spaceBefore=20)
+
+    story = []
+    total = 0
+    lignes = facture['lignes']
+    for debut in range(0, len(lignes), LIGNES_PAR_TABLEAU):
+        donnees = []
+        for d in lignes[debut:debut + LIGNES_PAR_TABLEAU]:
+            donnees.append([Paragraph(escape(str(d['libelle'])), style_libelle), str(d['quantite']),
+                            f"{d['prix_unitaire']:.2f}", f"{d['montant_total']:.2f}"])
+            total += d['montant_total']
+        story.append(Table(donnees, colWidths=LARGEURS_COLONNES, style=style_ligne))
+
+    # 🧮 Total général
+    story.append(Paragraph(f"TOTAL : {total:.2f} DT", style_total))
+
+    # ✒️ Signature
+    story.append(CallerMacro(_dessiner_signature))
+
+    infos = [f"Date : {facture['date_facture']}", f"Patient : {facture['patient']}"]
+    _modele_document(fichier, f"Facture N° {facture['numero_facture']}", infos).build(story)
+
+
+def generer_recu_pdf(fichier, recu):
+    """
+    Génère un reçu de paiement
+
+    Args:
+        recu (dict): patient, date, montant, mode (textes affichés)
+    """
+    doc = SimpleDocTemplate(fichier, pagesize=A4)
+    styles = getSampleStyleSheet()
+    contenu = []
+
+    contenu.append(Paragraph("<b>Reçu de Paiement</b>", styles["Title"]))
+    contenu.append(Spacer(1, 12))
+    contenu.append(Paragraph(f"Patient : {escape(recu['patient'])}", styles["Normal"]))
+    contenu.append(Paragraph(f"Date : {recu['date']}", styles["Normal"]))
+    contenu.append(Paragraph(f"Montant payé : {recu['montant']}", styles["Normal"]))
+    contenu.append(Paragraph(f"Mode de paiement : {recu['mode']}", styles["Normal"]))
+    contenu.append(Spacer(1, 24))
+    contenu.append(Paragraph("Merci pour votre paiement.", styles["Normal"]))
+
+    doc.build(contenu)
+
+
+def _montant(valeur):
+    return f"{valeur:.2f}" if valeur else ""
+
+
+def generer_releve_pdf(fichier, releve):
+    """
+    Génère le relevé de compte d'un patient : factures, paiements et solde courant
+
+    Args:
+        releve (dict): tel que retourné par db.obtenir_releves_patients()
+    """
+    style_libelle = ParagraphStyle('Libelle', fontName='Helvetica', fontSize=10, leading=12)
+    style_total = ParagraphStyle('Total', fontName='Helvetica', fontSize=11, alignment=2, spaceBefore=20)
+    style_solde = ParagraphStyle('Solde', fontName='Helvetica-Bold', fontSize=12, alignment=2, spaceBefore=6)
+
+    lignes = []
+    if releve['date_debut']:
+        lignes.append([releve['date_debut'], Paragraph("Solde initial", style_libelle), "", "",
+                       f"{releve['solde_initial']:.2f}"])
+    for m in releve['mouvements']:
+        lignes.append([m['date'], Paragraph(escape(m['libelle']), style_libelle),
+                       _montant(m['debit']), _montant(m['credit']), f"{m['solde']:.2f}"])
+
+    story = []
+    for debut in range(0, len(lignes), LIGNES_PAR_TABLEAU):
+        story.append(Table(lignes[debut:debut + LIGNES_PAR_TABLEAU], colWidths=LARGEURS_COLONNES_RELEVE,
+                           style=_style_lignes()))
+
+    story.append(Paragraph(f"Total facturé : {releve['total_factures']:.2f} DT &nbsp;&nbsp; "
+                           f"Total payé : {releve['total_paiements']:.2f} DT", style_total))
+    story.append(Paragraph(f"SOLDE DÛ : {releve['solde_final']:.2f} DT", style_solde))
+
+    if releve['date_debut']:
+        periode = f"Période : du {releve['date_debut']} au {releve['date_fin'] or datetime.now().strftime('%Y-%m-%d')}"
+    else:
+        periode = f"Au {releve['date_fin'] or datetime.now().strftime('%Y-%m-%d')}"
+    infos = [periode, f"Patient : {releve['patient']}"]
+    _modele_document(fichier, "Relevé de compte", infos, COLONNES_RELEVE, LARGEURS_COLONNES_RELEVE).build(story)
+
+
+def generer_paquet(dossier, factures):
+    """
+    Génère un paquet de factures (exécuté dans un processus de l'export par lot)
+
+    Returns:
+        list: [(numero_facture, chemin ou None, erreur ou None), ...]
+    """
+    resultats = []
+    for facture in factures:
+        fichier = os.path.join(dossier, nom_fichier_facture(facture['numero_facture']))
+        try:
+            generer_facture_pdf(fichier, facture)
+            resultats.append((facture['numero_facture'], fichier, None))
+        except Exception as e:
+            resultats.append((facture['numero_facture'], None, str(e)))
+    return resultats
+
+
+def generer_paquet_releves(dossier, releves):
+    """
+    Génère un paquet de relevés de compte (exécuté dans un processus de l'export par lot)
+
+    Returns:
+        list: [(patient, chemin ou None, erreur ou None), ...]
+    """
+    resultats = []
+    for releve in releves:
+        fichier = os.path.join(dossier, nom_fichier_releve(releve))
+        try:
+            generer_releve_pdf(fichier, releve)
+            resultats.append((releve['patient'], fichier, None))
+        except Exception as e:
+            resultats.append((releve['patient'], None, str(e)))
+    return resultats
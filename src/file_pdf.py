@@ -0,0 +1,152 @@
+# -*- coding: utf-8 -*-
+"""
+File persistante des documents PDF (ordonnances, factures, reçus)
+Les demandes sont enregistrées dans la table travaux_pdf puis rendues par un
+thread dédié : l'interface reste disponible, les échecs sont retentés et les
+travaux interrompus par la fermeture de l'application reprennent au démarrage.
+Un travail achevé (PDF écrit ou abandon) est retiré de la file.
+"""
+
+import os
+import json
+import threading
+
+from PySide6.QtCore import QObject, QThread, Signal
+
+from database import db
+from src.modele_ordonnance import generer_ordonnance_pdf
+from src.factures_pdf import generer_facture_pdf, generer_recu_pdf
+
+# Fonctions de rendu par type de document : (fichier, données) -> None
+RENDUS = {
+    'ordonnance': generer_ordonnance_pdf,
+    'facture': generer_facture_pdf,
+    'recu': generer_recu_pdf
+}
+
+# Messages de fin de génération
+LIBELLES = {
+    'ordonnance': "Ordonnance générée",
+    'facture': "Facture générée",
+    'recu': "Reçu généré"
+}
+
+# Nombre d'essais avant abandon, délai entre essais (secondes, doublé à chaque échec)
+MAX_TENTATIVES = 3
+DELAI_NOUVEL_ESSAI = 5
+
+# Attente maximale entre deux consultations de la file (nouveaux essais programmés)
+INTERVALLE_SCRUTATION = 2.0
+
+
+class TravauxPdfWorker(QThread):
+    """Consomme la file des travaux PDF, un document à la fois"""
+
+    termine = Signal(int, str, str)  # id, type_document, fichier
+    echoue = Signal(int, str, str)   # id, type_document, erreur (abandon définitif)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._reveil = threading.Event()
+        self._arret = False
+
+    def reveiller(self):
+        self._reveil.set()
+
+    def arreter(self):
+        self._arret = True
+        self._reveil.set()
+
+    def run(self):
+        while not self._arret:
+            travail = db.prendre_travail_pdf()
+            if travail is None:
+                self._reveil.wait(INTERVALLE_SCRUTATION)
+                self._reveil.clear()
+                continue
+            self.traiter(travail)
+
+    def traiter(self, travail):
+        type_document = travail['type_document']
+        fichier = travail['fichier']
+        try:
+            rendu = RENDUS[type_document]
+            dossier = os.path.dirname(fichier)
+            if dossier:
+                os.makedirs(dossier, exist_ok=True)
+
+            # Écriture dans un fichier temporaire : jamais de PDF tronqué à l'emplacement final
+            chemin_temp = fichier + ".tmp"
+            donnees = json.loads(travail['donnees'])
+            rendu(chemin_temp, donnees)
+            os.replace(chemin_temp, fichier)
+
+            # Ligne associée (ordonnance) écrite seulement une fois le PDF en place
+            if not db.terminer_travail_pdf(travail['id'], donnees.get('enregistrement')):
+                raise RuntimeError("Le document n'a pas pu être enregistré en base")
+        except Exception as e:
+            if os.path.exists(fichier + ".tmp"):
+                os.remove(fichier + ".tmp")
+            tentatives = travail['tentatives'] + 1
+            if tentatives < MAX_TENTATIVES and type_document in RENDUS:
+                db.echec_travail_pdf(travail['id'], str(e), DELAI_NOUVEL_ESSAI * 2 ** (tentatives - 1))
+            else:
+                db.echec_travail_pdf(travail['id'], str(e))
+                self.echoue.emit(travail['id'], type_document, str(e))
+            return
+
+        self.termine.emit(travail['id'], type_document, fichier)
+
+
+class FilePdf(QObject):
+    """Point d'entrée global de la file des documents PDF"""
+
+    document_pret = Signal(int, str, str)     # id, type_document, fichier
+    document_echoue = Signal(int, str, str)   # id, type_document, erreur
+
+    def __init__(self):
+        super().__init__()
+        self.worker = None
+
+    def demarrer(self):
+        """Démarre le thread de rendu et reprend les travaux interrompus"""
+        if self.worker is not None:
+            return
+        db.reprendre_travaux_pdf()
+        self.worker = TravauxPdfWorker()
+        self.worker.termine.connect(self.document_pret)
+        self.worker.echoue.connect(self.document_echoue)
+        self.worker.start()
+
+    def arreter(self):
+        """Arrête le thread après le document en cours (repris au prochain démarrage)"""
+        if self.worker is not None:
+            self.worker.arreter()
+            self.worker.wait()
+            self.worker = None
+
+    def ajouter(self, type_document, fichier, donnees):
+        """
+        Met un document en file de génération
+
+        Args:
+            type_document (str): 'ordonnance', 'facture' ou 'recu'
+            fichier (str): Chemin du PDF à écrire
+            donnees (dict): Contenu du document (sérialisable en JSON) ; pour une
+                ordonnance, 'enregistrement' porte la ligne à écrire en base après le rendu
+
+        Returns:
+            int: ID du travail, ou None en cas d'erreur
+        """
+        travail_id = db.ajouter_travail_pdf(type_document, fichier, json.dumps(donnees, ensure_ascii=False))
+        self.demarrer()
+        self.worker.reveiller()
+        return travail_id
+
+    def en_attente(self):
+        """Nombre de documents restant à générer"""
+        return db.compter_travaux_pdf_en_attente()
+
+
+# Instance globale de la file des documents PDF
+file_pdf = FilePdf()
@@ -0,0 +1,205 @@
+# -*- coding: utf-8 -*-
+"""
+Filtres d'amélioration des radiographies
+Égalisation adaptative (CLAHE), masque flou (netteté), débruitage médian et
+rehaussement des contours, appliqués à l'image affichée (après fenêtrage).
+Aperçu réduit pendant les réglages, pleine résolution en arrière-plan.
+"""
+
+from collections import OrderedDict
+
+from PySide6.QtCore import QThread, Signal
+
+from src.radiographie import tableau_vers_qimage
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+try:
+    from PIL import Image, ImageFilter
+    PIL_AVAILABLE = True
+except ImportError:
+    PIL_AVAILABLE = False
+
+# Côté maximal de l'aperçu calculé pendant le glissement des curseurs
+COTE_APERCU = 768
+
+# Nombre de résultats pleine résolution conservés en mémoire
+TAILLE_CACHE = 12
+
+# Réglages neutres : aucune étape appliquée
+PARAMETRES_NEUTRES = {
+    'clahe': 0,        # Limite d'écrêtage x 10 (0 = désactivé)
+    'nettete': 0,      # Intensité du masque flou en %
+    'debruitage': 0,   # Taille du filtre médian (0, 3 ou 5)
+    'contours': 0      # Intensité du rehaussement des contours en %
+}
+
+
+def parametres_actifs(parametres):
+    """Indique si au moins une étape du pipeline est active"""
+    return bool(parametres) and any(parametres.get(cle) for cle in PARAMETRES_NEUTRES)
+
+
+def cle_parametres(parametres):
+    """Représentation hashable des réglages (clé de cache)"""
+    return tuple(int(parametres.get(cle, 0)) for cle in sorted(PARAMETRES_NEUTRES))
+
+
+def clahe(donnees, limite, tuiles=8):
+    """
+    Égalisation d'histogramme adaptative à contraste limité
+
+    Histogrammes par tuile calculés en un seul bincount, écrêtage et
+    redistribution vectorisés, puis interpolation bilinéaire des tables
+    des quatre tuiles voisines pour chaque pixel.
+
+    Args:
+        donnees: Tableau 2D uint8
+        limite (float): Limite d'écrêtage relative (1 = égalisation désactivée)
+        tuiles (int): Nombre de tuiles par côté
+    """
+    hauteur, largeur = donnees.shape
+    tuiles_y = max(1, min(tuiles, hauteur // 16))
+    tuiles_x = max(1, min(tuiles, largeur // 16))
+    th = -(-hauteur // tuiles_y)
+    tw = -(-largeur // tuiles_x)
+
+    # Complétion par réflexion pour des tuiles de taille égale
+    remplie = np.pad(donnees, ((0, th * tuiles_y - hauteur), (0, tw * tuiles_x - largeur)), mode='reflect')
+    blocs = remplie.reshape(tuiles_y, th, tuiles_x, tw).transpose(0, 2, 1, 3).reshape(tuiles_y * tuiles_x, -1)
+
+    indices = (np.arange(tuiles_y * tuiles_x)[:, None] * 256 + blocs).ravel()
+    histogrammes = np.bincount(indices, minlength=tuiles_y * tuiles_x * 256)
+    histogrammes = histogrammes.reshape(tuiles_y * tuiles_x, 256).astype(np.float32)
+
+    # Écrêtage et redistribution uniforme de l'excédent
+    plafond = max(1.0, limite * th * tw / 256.0)
+    excedent = np.maximum(histogrammes - plafond, 0).sum(axis=1, keepdims=True)
+    histogrammes = np.minimum(histogrammes, plafond) + excedent / 256.0
+
+    cdf = np.cumsum(histogrammes, axis=1)
+    tables = ((cdf - cdf[:, :1]) / np.maximum(cdf[:, -1:] - cdf[:, :1], 1e-6) * 255.0)
+    tables = tables.reshape(tuiles_y, tuiles_x, 256)
+
+    # Position de chaque pixel relativement aux centres des tuiles
+    fy = np.clip((np.arange(hauteur) + 0.5) / th - 0.5, 0, tuiles_y - 1)
+    fx = np.clip((np.arange(largeur) + 0.5) / tw - 0.5, 0, tuiles_x - 1)
+    y0 = np.floor(fy).astype(int)
+    x0 = np.floor(fx).astype(int)
+    y1 = np.minimum(y0 + 1, tuiles_y - 1)
+    x1 = np.minimum(x0 + 1, tuiles_x - 1)
+    wy = (fy - y0)[:, None].astype(np.float32)
+    wx = (fx - x0)[None, :].astype(np.float32)
+
+    haut = tables[y0[:, None], x0[None, :], donnees] * (1 - wx) + tables[y0[:, None], x1[None, :], donnees] * wx
+    bas = tables[y1[:, None], x0[None, :], donnees] * (1 - wx) + tables[y1[:, None], x1[None, :], donnees] * wx
+    return np.clip(haut * (1 - wy) + bas * wy + 0.5, 0, 255).astype(np.uint8)
+
+
+def masque_flou(donnees, intensite, rayon=2.0):
+    """Netteté par masque flou : image + intensité x (image - flou)"""
+    flou = np.asarray(Image.fromarray(donnees).filter(ImageFilter.GaussianBlur(rayon)), dtype=np.float32)
+    resultat = donnees.astype(np.float32) * (1 + intensite) - flou * intensite
+    return np.clip(resultat + 0.5, 0, 255).astype(np.uint8)
+
+
+def debruiter(donnees, taille):
+    """Filtre médian (préserve les bords, supprime le bruit impulsionnel du capteur)"""
+    return np.asarray(Image.fromarray(donnees).filter(ImageFilter.MedianFilter(taille)))
+
+
+def rehausser_contours(donnees, intensite):
+    """Ajoute l'amplitude du gradient de Sobel pour accentuer les contours"""
+    image = np.pad(donnees.astype(np.float32), 1, mode='edge')
+    gx = (image[:-2, 2:] + 2 * image[1:-1, 2:] + image[2:, 2:]) - (image[:-2, :-2] + 2 * image[1:-1, :-2] + image[2:, :-2])
+    gy = (image[2:, :-2] + 2 * image[2:, 1:-1] + image[2:, 2:]) - (image[:-2, :-2] + 2 * image[:-2, 1:-1] + image[:-2, 2:])
+    gradient = np.sqrt(gx * gx + gy * gy) / 8.0
+    return np.clip(donnees + intensite * gradient + 0.5, 0, 255).astype(np.uint8)
+
+
+def filtrer_niveaux_de_gris(donnees, parametres):
+    """Applique le pipeline dans l'ordre : débruitage, CLAHE, netteté, contours"""
+    if parametres.get('debruitage'):
+        donnees = debruiter(donnees, int(parametres['debruitage']))
+    if parametres.get('clahe'):
+        donnees = clahe(donnees, parametres['clahe'] / 10.0)
+    if parametres.get('nettete'):
+        donnees = masque_flou(donnees, parametres['nettete'] / 100.0)
+    if parametres.get('contours'):
+        donnees = rehausser_contours(donnees, parametres['contours'] / 100.0)
+    return donnees
+
+
+def appliquer_filtres(tableau, parametres):
+    """
+    Applique le pipeline à une image 8 bits
+
+    Les images couleur sont filtrées sur la luminance uniquement (YCbCr)
+    pour ne pas altérer les teintes des photos intra-orales.
+
+    Args:
+        tableau: Tableau uint8 (H, W) ou (H, W, 3)
+    """
+    if tableau.ndim == 2:
+        return filtrer_niveaux_de_gris(tableau, parametres)
+
+    y, cb, cr = Image.fromarray(tableau).convert('YCbCr').split()
+    y = Image.fromarray(filtrer_niveaux_de_gris(np.asarray(y), parametres))
+    return np.asarray(Image.merge('YCbCr', (y, cb, cr)).convert('RGB'))
+
+
+def charger_tableau_couleur(chemin):
+    """Charge une photo (ou image 8 bits) en tableau RGB uint8"""
+    with Image.open(chemin) as image:
+        return np.asarray(image.convert('RGB'))
+
+
+def reduire_apercu(tableau, cote_max=COTE_APERCU):
+    """Réduit une image pour l'aperçu interactif"""
+    hauteur, largeur = tableau.shape[:2]
+    facteur = max(hauteur, largeur) / cote_max
+    if facteur <= 1:
+        return tableau
+    image = Image.fromarray(tableau).resize((round(largeur / facteur), round(hauteur / facteur)), Image.BILINEAR)
+    return np.asarray(image)
+
+
+# Résultats pleine résolution par image, fenêtrage et réglages
+_cache = OrderedDict()
+
+
+def lire_cache(cle):
+    image = _cache.get(cle)
+    if image is not None:
+        _cache.move_to_end(cle)
+    return image
+
+
+def ecrire_cache(cle, image):
+    _cache[cle] = image
+    _cache.move_to_end(cle)
+    while len(_cache) > TAILLE_CACHE:
+        _cache.popitem(last=False)
+
+
+class FiltrageWorker(QThread):
+    """Calcule le pipeline en pleine résolution hors du thread de l'interface"""
+
+    termine = Signal(object, object)  # clé de cache, QImage
+
+    def __init__(self, cle, tableau, parametres, parent=None):
+        super().__init__(parent)
+        self.cle = cle
+        self.tableau = tableau
+        self.parametres = dict(parametres)
+
+    def run(self):
+        try:
+            image = tableau_vers_qimage(appliquer_filtres(self.tableau, self.parametres))
+        except Exception:
+            return
+        self.termine.emit(self.cle, image)
@@ -0,0 +1,201 @@
+# -*- coding: utf-8 -*-
+"""
+Lecture par projection mémoire (mmap) des grandes images non compressées
+BMP, TIFF non compressé et RAW capteur : seuls les pixels de la région et de
+la résolution demandées sont lus, l'empreinte mémoire reste bornée quelle
+que soit la taille du fichier.
+"""
+
+import os
+import json
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+try:
+    from PIL import Image
+    PIL_AVAILABLE = True
+except ImportError:
+    PIL_AVAILABLE = False
+
+# Au-delà de cette taille, le visualiseur passe en lecture par région
+SEUIL_MMAP = 64 * 1024 * 1024
+
+# Côté maximal de la vue d'ensemble chargée en mémoire
+COTE_APERCU = 2048
+
+# Modes bruts Pillow pris en charge : (type NumPy, canaux, ordre des canaux RGB)
+MODES_BRUTS = {
+    'L': ('u1', 1, None),
+    'P': ('u1', 1, None),
+    'I;16': ('<u2', 1, None),
+    'I;16L': ('<u2', 1, None),
+    'I;16B': ('>u2', 1, None),
+    'RGB': ('u1', 3, [0, 1, 2]),
+    'BGR': ('u1', 3, [2, 1, 0]),
+    'RGBX': ('u1', 4, [0, 1, 2]),
+    'RGBA': ('u1', 4, [0, 1, 2]),
+    'BGRX': ('u1', 4, [2, 1, 0]),
+    'BGRA': ('u1', 4, [2, 1, 0]),
+}
+
+
+class ImageMappee:
+    """Image non compressée projetée en mémoire, lue par régions"""
+
+    def __init__(self, chemin, offset, largeur, hauteur, mode_brut, pas_ligne=0,
+                 de_bas_en_haut=False, palette=None):
+        type_pixel, self.canaux, self.ordre_rgb = MODES_BRUTS[mode_brut]
+        dtype = np.dtype(type_pixel)
+        octets_ligne = pas_ligne or largeur * self.canaux * dtype.itemsize
+
+        self.chemin = chemin
+        self.largeur = largeur
+        self.hauteur = hauteur
+        self.de_bas_en_haut = de_bas_en_haut
+        self.palette = palette
+
+        # Lignes complètes (alignement compris), colonnes utiles sélectionnées ensuite
+        self._memmap = np.memmap(chemin, dtype=np.uint8, mode='r', offset=offset,
+                                 shape=(hauteur, octets_ligne))
+        utiles = self._memmap[:, :largeur * self.canaux * dtype.itemsize]
+        self._pixels = utiles.view(dtype).reshape(hauteur, largeur, self.canaux)
+
+        self.niveaux_de_gris = self.canaux == 1 and palette is None
+        self.profondeur_bits = dtype.itemsize * 8 if self.niveaux_de_gris else 8
+
+    @property
+    def valeur_max(self):
+        return (1 << self.profondeur_bits) - 1
+
+    def lire_region(self, x, y, largeur, hauteur, pas=1):
+        """
+        Lit une région, sous-échantillonnée d'un facteur `pas`
+
+        Seules les pages du fichier couvrant les lignes lues sont chargées.
+
+        Returns:
+            Tableau (H, W) en niveaux de gris (uint8/uint16) ou (H, W, 3) RGB uint8
+        """
+        x = max(0, min(x, self.largeur))
+        y = max(0, min(y, self.hauteur))
+        x2 = max(x, min(x + largeur, self.largeur))
+        y2 = max(y, min(y + hauteur, self.hauteur))
+
+        if self.de_bas_en_haut:
+            # Lignes stockées du bas vers le haut (BMP)
+            debut = self.hauteur - 1 - y
+            fin = self.hauteur - 1 - y2
+            region = self._pixels[debut:fin if fin >= 0 else None:-pas, x:x2:pas]
+        else:
+            region = self._pixels[y:y2:pas, x:x2:pas]
+
+        if self.niveaux_de_gris:
+            # Copie de la seule région, convertie dans l'ordre d'octets natif
+            return np.ascontiguousarray(region[:, :, 0], dtype=region.dtype.newbyteorder('='))
+        if self.palette is not None:
+            return self.palette[region[:, :, 0]]
+        return np.ascontiguousarray(region[:, :, self.ordre_rgb])
+
+    def apercu(self, cote_max=COTE_APERCU):
+        """Vue d'ensemble sous-échantillonnée (le plus grand côté <= cote_max)"""
+        pas = max(1, -(-max(self.largeur, self.hauteur) // cote_max))
+        return self.lire_region(0, 0, self.largeur, self.hauteur, pas), pas
+
+    def fermer(self):
+        """Libère la projection mémoire"""
+        self._pixels = None
+        self._memmap = None
+
+
+def ouvrir_image_mappee(chemin, taille_min=SEUIL_MMAP):
+    """
+    Ouvre une image en lecture par projection mémoire si son format le permet
+
+    Args:
+        chemin (str): Fichier image
+        taille_min (int): Taille en dessous de laquelle le chargement classique suffit
+
+    Returns:
+        ImageMappee ou None (format compressé, multipage ou fichier trop petit)
+    """
+    if not NUMPY_AVAILABLE or not os.path.exists(chemin) or os.path.getsize(chemin) < taille_min:
+        return None
+
+    try:
+        if os.path.splitext(chemin)[1].lower() == '.raw':
+            return _ouvrir_raw(chemin)
+        if PIL_AVAILABLE:
+            return _ouvrir_via_entete(chemin)
+    except Exception:
+        pass
+    return None
+
+
+def _ouvrir_raw(chemin):
+    """RAW capteur : dimensions dans le JSON voisin (cf. radiographie.charger_raw)"""
+    parametres = {}
+    for chemin_json in (chemin + ".json", os.path.splitext(chemin)[0] + ".json"):
+        if os.path.exists(chemin_json):
+            with open(chemin_json, 'r', encoding='utf-8') as f:
+                parametres = json.load(f)
+            break
+
+    bits = int(parametres.get("bits", 16))
+    if bits > 8:
+        mode = 'I;16B' if parametres.get("ordre", "little") == "big" else 'I;16'
+        taille_pixel = 2
+    else:
+        mode = 'L'
+        taille_pixel = 1
+
+    largeur = parametres.get("largeur")
+    hauteur = parametres.get("hauteur")
+    if not largeur or not hauteur:
+        cote = int((os.path.getsize(chemin) // taille_pixel) ** 0.5)
+        if cote * cote * taille_pixel != os.path.getsize(chemin):
+            return None
+        largeur = hauteur = cote
+
+    return ImageMappee(chemin, 0, int(largeur), int(hauteur), mode)
+
+
+def _ouvrir_via_entete(chemin):
+    """BMP / TIFF : Pillow ne lit que l'en-tête, la disposition des pixels vient de image.tile"""
+    with Image.open(chemin) as image:
+        if getattr(image, 'n_frames', 1) > 1 or not image.tile:
+            return None
+
+        tuiles = sorted(image.tile, key=lambda t: t[2])
+        if any(t[0] != 'raw' for t in tuiles):
+            return None  # Données compressées
+
+        mode_brut, pas_ligne, orientation = (tuple(tuiles[0][3]) + (0, 1))[:3]
+        if mode_brut not in MODES_BRUTS:
+            return None
+
+        largeur, hauteur = image.size
+        type_pixel, canaux, _ = MODES_BRUTS[mode_brut]
+        octets_ligne = pas_ligne or largeur * canaux * np.dtype(type_pixel).itemsize
+
+        # Bandes TIFF : acceptées seulement si elles se suivent dans le fichier
+        offset_attendu = tuiles[0][2]
+        ligne_attendue = 0
+        for tuile in tuiles:
+            x0, y0, x1, y1 = tuile[1]
+            if tuile[2] != offset_attendu or x0 != 0 or x1 != largeur or y0 != ligne_attendue:
+                return None
+            offset_attendu += (y1 - y0) * octets_ligne
+            ligne_attendue = y1
+
+        palette = None
+        if image.mode == 'P':
+            valeurs = image.getpalette() or []
+            valeurs += [0] * (768 - len(valeurs))
+            palette = np.array(valeurs[:768], dtype=np.uint8).reshape(256, 3)
+
+        return ImageMappee(chemin, tuiles[0][2], largeur, hauteur, mode_brut,
+                           pas_ligne, orientation == -1, palette)
@@ -0,0 +1,432 @@
+# -*- coding: utf-8 -*-
+"""
+Import d'images médicales par lot
+Copie, empreintes (SHA-256, dHash), dimensions/EXIF et miniatures calculées en parallèle,
+puis insertion de toutes les lignes `imagerie` en une seule transaction
+"""
+
+import os
+import json
+import shutil
+import hashlib
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from PySide6.QtCore import QObject, QThread, QTimer, QFileSystemWatcher, Signal
+
+from database import db
+from src.path_manager import path_manager
+from src.radiographie import (charger_image_radiographique, calculer_lut,
+                              ImageRadiographique, profondeur_effective)
+from src.image_mappee import ouvrir_image_mappee
+from src.empreinte_perceptuelle import ArbreBK, calculer_dhash, rechercher_similaires, SEUIL_SIMILARITE
+
+try:
+    from PIL import Image, ExifTags
+    PIL_AVAILABLE = True
+except ImportError:
+    PIL_AVAILABLE = False
+
+# Extensions reconnues lors de l'import d'un dossier
+EXTENSIONS_IMAGES = ('.png', '.jpg', '.jpeg', '.bmp', '.tif', '.tiff', '.raw', '.dcm')
+
+# Taille maximale des miniatures affichées dans la liste des images
+TAILLE_MINIATURE = (160, 160)
+
+# Nombre de fichiers traités simultanément (copie, hachage et décodage
+# libèrent le GIL, des threads suffisent)
+NOMBRE_WORKERS = min(8, (os.cpu_count() or 2) * 2)
+
+# Balises EXIF de date de prise de vue, par ordre de préférence
+EXIF_DATE_ORIGINALE = 36867
+EXIF_DATE = 306
+
+
+def lister_images(dossier, recursif=False):
+    """
+    Retourne les fichiers images d'un dossier, triés par nom
+
+    Args:
+        dossier (str): Dossier à parcourir
+        recursif (bool): Inclure les sous-dossiers
+    """
+    fichiers = []
+    for racine, sous_dossiers, noms in os.walk(dossier):
+        for nom in noms:
+            if os.path.splitext(nom)[1].lower() in EXTENSIONS_IMAGES:
+                fichiers.append(os.path.join(racine, nom))
+        if not recursif:
+            break
+    return sorted(fichiers)
+
+
+def nom_fichier_destination(patient_id, nom, extension, date_str, deja_pris=None):
+    """
+    Construit un nom de fichier unique dans le dossier des images
+
+    Reprend la convention de l'ajout unitaire : patient_date_nom.ext
+    """
+    dest_dir = path_manager.get_images_folder()
+    deja_pris = deja_pris if deja_pris is not None else set()
+
+    base = f"{patient_id}_{date_str}_{nom}".replace(" ", "_")
+    candidat = f"{base}{extension}"
+    compteur = 1
+    while candidat in deja_pris or os.path.exists(os.path.join(dest_dir, candidat)):
+        candidat = f"{base}_{compteur}{extension}"
+        compteur += 1
+
+    deja_pris.add(candidat)
+    return candidat
+
+
+def chemin_miniature(nom_fichier):
+    """Chemin de la miniature associée à une image importée"""
+    return os.path.join(path_manager.get_miniatures_folder(), nom_fichier + ".png")
+
+
+def calculer_hash(chemin, taille_bloc=1024 * 1024):
+    """Calcule l'empreinte SHA-256 d'un fichier par blocs"""
+    sha = hashlib.sha256()
+    with open(chemin, 'rb') as f:
+        for bloc in iter(lambda: f.read(taille_bloc), b''):
+            sha.update(bloc)
+    return sha.hexdigest()
+
+
+def extraire_metadonnees(chemin):
+    """
+    Extrait les métadonnées techniques d'une image
+
+    Returns:
+        dict: largeur, hauteur, profondeur_bits, date_capture, taille_fichier
+    """
+    metadonnees = {
+        'largeur': None,
+        'hauteur': None,
+        'profondeur_bits': None,
+        'date_capture': None,
+        'taille_fichier': os.path.getsize(chemin)
+    }
+
+    if os.path.splitext(chemin)[1].lower() == '.raw':
+        mappee = ouvrir_image_mappee(chemin)
+        if mappee is not None:
+            # Dimensions lues sans charger le fichier, profondeur estimée sur la vue d'ensemble
+            apercu, _ = mappee.apercu()
+            metadonnees['largeur'] = mappee.largeur
+            metadonnees['hauteur'] = mappee.hauteur
+            metadonnees['profondeur_bits'] = profondeur_effective(apercu)
+            mappee.fermer()
+            radiographie = None
+        else:
+            radiographie = charger_image_radiographique(chemin)
+        if radiographie is not None:
+            metadonnees['largeur'] = radiographie.largeur
+            metadonnees['hauteur'] = radiographie.hauteur
+            metadonnees['profondeur_bits'] = radiographie.profondeur_bits
+    elif PIL_AVAILABLE:
+        try:
+            with Image.open(chemin) as image:
+                metadonnees['largeur'], metadonnees['hauteur'] = image.size
+                metadonnees['profondeur_bits'] = _profondeur_mode(image.mode)
+
+                exif = image.getexif()
+                date_exif = exif.get_ifd(ExifTags.IFD.Exif).get(EXIF_DATE_ORIGINALE) or exif.get(EXIF_DATE)
+                if date_exif:
+                    metadonnees['date_capture'] = _convertir_date_exif(date_exif)
+        except Exception:
+            pass
+
+    # À défaut d'EXIF, la date de modification du fichier source fait foi
+    if not metadonnees['date_capture']:
+        metadonnees['date_capture'] = datetime.fromtimestamp(
+            os.path.getmtime(chemin)).strftime('%Y-%m-%d %H:%M:%S')
+
+    return metadonnees
+
+
+def generer_miniature(chemin_source, chemin_dest):
+    """
+    Génère une miniature PNG (radiographies 16 bits fenêtrées automatiquement)
+
+    Returns:
+        bool: True si la miniature a été créée
+    """
+    if not PIL_AVAILABLE:
+        return False
+
+    try:
+        image = None
+        mappee = ouvrir_image_mappee(chemin_source)
+        if mappee is not None:
+            # Grand fichier non compressé : seuls les pixels sous-échantillonnés sont lus
+            apercu, _ = mappee.apercu(max(TAILLE_MINIATURE) * 4)
+            mappee.fermer()
+            if apercu.ndim == 2:
+                radiographie = ImageRadiographique(apercu, profondeur_effective(apercu))
+            else:
+                radiographie = None
+                image = Image.fromarray(apercu)
+        else:
+            radiographie = charger_image_radiographique(chemin_source)
+
+        if radiographie is not None:
+            centre, largeur = radiographie.fenetrage_par_defaut()
+            lut = calculer_lut(radiographie.donnees.dtype.itemsize * 8, int(centre), int(largeur))
+            image = Image.fromarray(lut[radiographie.donnees])
+        elif image is None:
+            image = Image.open(chemin_source)
+            image.draft('RGB', TAILLE_MINIATURE)  # Décodage JPEG réduit
+            image = image.convert('RGB')
+
+        image.thumbnail(TAILLE_MINIATURE)
+        image.save(chemin_dest, 'PNG')
+        return True
+    except Exception:
+        return False
+
+
+def traiter_fichier(chemin_source, nom_fichier):
+    """
+    Copie un fichier dans le dossier des images et calcule ses métadonnées
+
+    Exécuté dans un thread du pool : aucune interaction avec l'interface
+    ni avec la base de données.
+
+    Returns:
+        dict: Résultat du traitement (clé 'erreur' renseignée en cas d'échec)
+    """
+    resultat = {'source': chemin_source, 'nom_fichier': nom_fichier, 'erreur': None}
+
+    try:
+        chemin_dest = os.path.join(path_manager.get_images_folder(), nom_fichier)
+        shutil.copy2(chemin_source, chemin_dest)
+        copier_parametres_raw(chemin_source, chemin_dest)
+
+        resultat['chemin_fichier'] = chemin_dest
+        resultat['hash_fichier'] = calculer_hash(chemin_dest)
+        resultat['hash_perceptuel'] = calculer_dhash(chemin_dest)
+        resultat.update(extraire_metadonnees(chemin_source))
+        resultat['miniature'] = generer_miniature(chemin_dest, chemin_miniature(nom_fichier))
+
+    except Exception as e:
+        resultat['erreur'] = str(e)
+
+    return resultat
+
+
+def copier_parametres_raw(chemin_source, chemin_dest):
+    """Copie le fichier JSON des dimensions d'un export RAW à côté de la copie"""
+    if os.path.splitext(chemin_source)[1].lower() != '.raw':
+        return
+    for chemin_json in (chemin_source + ".json", os.path.splitext(chemin_source)[0] + ".json"):
+        if os.path.exists(chemin_json):
+            shutil.copy2(chemin_json, chemin_dest + ".json")
+            return
+
+
+def supprimer_fichier_importe(nom_fichier):
+    """Supprime une copie et sa miniature (doublon ou échec d'insertion)"""
+    chemin_image = os.path.join(path_manager.get_images_folder(), nom_fichier)
+    for chemin in (chemin_image, chemin_image + ".json", chemin_miniature(nom_fichier)):
+        try:
+            if os.path.exists(chemin):
+                os.remove(chemin)
+        except OSError:
+            pass
+
+
+def _profondeur_mode(mode):
+    """Profondeur par canal correspondant à un mode Pillow"""
+    if mode.startswith('I;16') or mode == 'I':
+        return 16
+    if mode == '1':
+        return 1
+    return 8
+
+
+def _convertir_date_exif(date_exif):
+    """Convertit une date EXIF (AAAA:MM:JJ HH:MM:SS) au format SQL"""
+    try:
+        return datetime.strptime(str(date_exif).strip('\x00 '), '%Y:%m:%d %H:%M:%S').strftime('%Y-%m-%d %H:%M:%S')
+    except ValueError:
+        return None
+
+
+def charger_config_imagerie():
+    """Charge la configuration de l'imagerie (dossier capteur, seuils d'archivage)"""
+    config_file = os.path.join(path_manager.get_app_data_folder(), "config_imagerie.json")
+
+    config_defaut = {
+        "dossier_capteur": "",
+        "surveillance_active": False,
+        "type_capteur": "Radiographie Rétro-alvéolaire",
+        "jours_recompression": 30,
+        "jours_archivage": 365
+    }
+
+    try:
+        if os.path.exists(config_file):
+            with open(config_file, 'r', encoding='utf-8') as f:
+                config_defaut.update(json.load(f))
+        return config_defaut
+    except Exception:
+        return config_defaut
+
+
+def sauvegarder_config_imagerie(config):
+    """Sauvegarde la configuration de l'imagerie"""
+    config_file = os.path.join(path_manager.get_app_data_folder(), "config_imagerie.json")
+    with open(config_file, 'w', encoding='utf-8') as f:
+        json.dump(config, f, ensure_ascii=False, indent=2)
+
+
+class ImportLotWorker(QThread):
+    """Importe un lot de fichiers en arrière-plan avec un pool de threads"""
+
+    progression = Signal(int, int)  # fichiers traités, total
+    termine = Signal(list, list)    # images importées, erreurs
+
+    def __init__(self, fichiers, patient_id, type_image, description="", parent=None):
+        super().__init__(parent)
+        self.fichiers = list(fichiers)
+        self.patient_id = patient_id
+        self.type_image = type_image
+        self.description = description
+        self._annule = False
+
+    def annuler(self):
+        """Demande l'arrêt de l'import (les fichiers déjà traités sont conservés)"""
+        self._annule = True
+
+    def run(self):
+        date_str = datetime.now().strftime("%Y%m%d")
+        noms_pris = set()
+        taches = []
+
+        # Les noms de destination sont attribués ici pour éviter les collisions entre threads
+        for chemin in self.fichiers:
+            nom, extension = os.path.splitext(os.path.basename(chemin))
+            taches.append((chemin, nom_fichier_destination(self.patient_id, nom, extension, date_str, noms_pris)))
+
+        resultats = []
+        erreurs = []
+        total = len(taches)
+
+        with ThreadPoolExecutor(max_workers=NOMBRE_WORKERS) as pool:
+            futures = [pool.submit(traiter_fichier, chemin, nom) for chemin, nom in taches]
+            for traites, future in enumerate(as_completed(futures), 1):
+                if self._annule:
+                    for f in futures:
+                        f.cancel()
+                resultat = future.result() if not future.cancelled() else None
+                if resultat is None:
+                    continue
+                if resultat['erreur']:
+                    erreurs.append(f"{os.path.basename(resultat['source'])}: {resultat['erreur']}")
+                else:
+                    resultats.append(resultat)
+                self.progression.emit(traites, total)
+
+        # Un même fichier n'est importé qu'une fois par patient
+        vus = set()
+        lot_similaires = ArbreBK()
+        lignes = []
+        for resultat in sorted(resultats, key=lambda r: r['nom_fichier']):
+            if resultat['hash_fichier'] in vus:
+                supprimer_fichier_importe(resultat['nom_fichier'])
+                erreurs.append(f"{os.path.basename(resultat['source'])}: doublon dans le lot, ignoré")
+                continue
+            if db.obtenir_image_par_hash(self.patient_id, resultat['hash_fichier']):
+                supprimer_fichier_importe(resultat['nom_fichier'])
+                erreurs.append(f"{os.path.basename(resultat['source'])}: déjà présente pour ce patient, ignorée")
+                continue
+            vus.add(resultat['hash_fichier'])
+
+            # Quasi-doublons (même cliché recompressé ou renommé) : importés mais signalés
+            empreinte = resultat.get('hash_perceptuel')
+            if empreinte is not None:
+                similaires = rechercher_similaires(empreinte, self.patient_id)
+                similaires += lot_similaires.rechercher(empreinte, SEUIL_SIMILARITE)
+                if similaires:
+                    distance, reference = min(similaires, key=lambda r: r[0])
+                    nom_reference = reference if isinstance(reference, str) else db.obtenir_image_par_id(reference).get('nom_fichier', '?')
+                    erreurs.append(f"{os.path.basename(resultat['source'])}: très proche de {nom_reference} "
+                                   f"(distance {distance}), importée")
+                lot_similaires.ajouter(empreinte, os.path.basename(resultat['source']))
+            resultat.update({
+                'patient_id': self.patient_id,
+                'type_image': self.type_image,
+                'description': self.description
+            })
+            lignes.append(resultat)
+
+        image_ids = db.ajouter_images_lot(lignes) if lignes else []
+        if lignes and not image_ids:
+            # Transaction annulée : ne pas laisser de fichiers orphelins
+            for ligne in lignes:
+                supprimer_fichier_importe(ligne['nom_fichier'])
+            erreurs.append("Erreur lors de l'enregistrement en base de données, aucune image importée.")
+            lignes = []
+
+        for ligne, image_id in zip(lignes, image_ids):
+            ligne['id'] = image_id
+
+        self.termine.emit(lignes, erreurs)
+
+
+class SurveillanceDossierCapteur(QObject):
+    """Surveille le dossier d'export du capteur et signale les nouveaux fichiers"""
+
+    nouveaux_fichiers = Signal(list)
+
+    # Délai sans modification avant de considérer un export comme terminé (ms)
+    DELAI_STABILISATION = 1500
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.dossier = None
+        self._connus = set()
+        self._watcher = QFileSystemWatcher(self)
+        self._watcher.directoryChanged.connect(self._dossier_modifie)
+
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.timeout.connect(self._verifier_nouveaux)
+
+    def demarrer(self, dossier):
+        """Démarre la surveillance ; les fichiers déjà présents sont ignorés"""
+        self.arreter()
+        if not dossier or not os.path.isdir(dossier):
+            return False
+
+        self.dossier = dossier
+        self._connus = set(lister_images(dossier))
+        self._watcher.addPath(dossier)
+        return True
+
+    def arreter(self):
+        """Arrête la surveillance"""
+        if self._watcher.directories():
+            self._watcher.removePaths(self._watcher.directories())
+        self._timer.stop()
+        self.dossier = None
+        self._connus = set()
+
+    def est_active(self):
+        return self.dossier is not None
+
+    def _dossier_modifie(self, chemin):
+        # Le capteur écrit souvent en plusieurs fois : attendre la fin de l'écriture
+        self._timer.start(self.DELAI_STABILISATION)
+
+    def _verifier_nouveaux(self):
+        if not self.dossier:
+            return
+
+        presents = set(lister_images(self.dossier))
+        nouveaux = sorted(presents - self._connus)
+        self._connus = presents
+        if nouveaux:
+            self.nouveaux_fichiers.emit(nouveaux)
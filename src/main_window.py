@@ -1,4 +1,4 @@
-from PySide6.QtWidgets import QMainWindow, QWidget, QHBoxLayout, QVBoxLayout, QStackedWidget, QLabel
+from PySide6.QtWidgets import QMainWindow, QWidget, QHBoxLayout, QVBoxLayout, QStackedWidget, QLabel, QMessageBox
 from PySide6.QtCore import Qt
 from PySide6.QtGui import QPixmap
 from src.sidebar import Sidebar
@@ -9,6 +9,7 @@ from src.views.imagerie_view import ImagerieView
 from src.views.paiements_view import PaiementsView
 from src.views.ordonnance_view import OrdonnanceView
 from src.context import context
+from src.file_pdf import file_pdf, LIBELLES
 from database import db
 
 
@@ -79,6 +80,23 @@ class MainWindow(QMainWindow):
         # Set initial view
         self.switch_view("Agenda")
 
+        # Documents PDF générés en arrière-plan (reprise des travaux interrompus)
+        file_pdf.document_pret.connect(self.document_pdf_pret)
+        file_pdf.document_echoue.connect(self.document_pdf_echoue)
+        file_pdf.demarrer()
+
+    def document_pdf_pret(self, travail_id, type_document, fichier):
+        self.statusBar().showMessage(f"{LIBELLES.get(type_document, 'Document généré')} : {fichier}", 10000)
+
+    def document_pdf_echoue(self, travail_id, type_document, erreur):
+        QMessageBox.warning(self, "Erreur", f"La génération du PDF a échoué après plusieurs essais :\n{erreur}")
+
+    def closeEvent(self, event):
+        # Le document en cours est terminé, les suivants reprendront au prochain lancement
+        file_pdf.arreter()
+        self.imagerie_view.rattrapage_empreintes.arreter()
+        super().closeEvent(event)
+
     def switch_view(self, view_name):
         if view_name in self.views:
             self.stacked_widget.setCurrentWidget(self.views[view_name])
@@ -0,0 +1,285 @@
+# -*- coding: utf-8 -*-
+"""
+Modèle de page des ordonnances PDF
+L'en-tête (logo, médecin, cabinet) et le pied de page (coordonnées) sont
+préparés une seule fois par configuration du cabinet : logo décodé et réduit,
+styles créés, paragraphes mis en forme. Chaque PDF les dessine dans un form
+XObject défini une fois et réutilisé sur toutes ses pages.
+"""
+
+import os
+import json
+
+from src.path_manager import path_manager
+from src.ressources_pdf import preparer_image
+
+try:
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+    from reportlab.lib.units import cm
+    from reportlab.lib import colors
+    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer
+    REPORTLAB_AVAILABLE = True
+except ImportError:
+    REPORTLAB_AVAILABLE = False
+
+# Logo proposé par défaut dans la configuration du cabinet
+LOGO_DEFAUT = os.path.join(os.path.dirname(__file__), "..", "assets", "icons", "logo_cabinet_defaut.png")
+
+CONFIG_CABINET_DEFAUT = {
+    "nom_cabinet": "Cabinet Dentaire",
+    "nom_medecin": "Dr. Médecin",
+    "specialite": "Chirurgien-Dentiste",
+    "adresse": "",
+    "ville": "Tunis",
+    "code_postal": "",
+    "telephone1": "",
+    "telephone2": "",
+    "email": "",
+    "site_web": "",
+    "numero_ordre": "",
+    "chemin_logo": ""
+}
+
+
+def chemin_config_cabinet():
+    """Fichier de configuration du cabinet dans le dossier DentalSoft"""
+    return os.path.join(path_manager.get_app_data_folder(), "config_cabinet.json")
+
+
+def charger_config_cabinet():
+    """Charge la configuration du cabinet (valeurs par défaut si absente)"""
+    config = dict(CONFIG_CABINET_DEFAUT)
+    try:
+        if os.path.exists(chemin_config_cabinet()):
+            with open(chemin_config_cabinet(), 'r', encoding='utf-8') as f:
+                config.update(json.load(f))
+    except Exception:
+        pass
+    return config
+
+
+def chemin_logo(config):
+    """Chemin du logo à imprimer, ou None"""
+    logo = config.get('chemin_logo')
+    if logo == "defaut":
+        logo = LOGO_DEFAUT
+    return logo if logo and os.path.exists(logo) else None
+
+
+def _signature_fichier(chemin):
+    """Date de modification et taille : change dès que le fichier est réécrit"""
+    try:
+        stat = os.stat(chemin)
+        return (stat.st_mtime_ns, stat.st_size)
+    except OSError:
+        return None
+
+
+def creer_styles():
+    """Styles de paragraphe des ordonnances"""
+    styles = getSampleStyleSheet()
+
+    def style(nom, parent, **options):
+        return ParagraphStyle(nom, parent=styles[parent], **options)
+
+    return {
+        'titre': style('DoctorName', 'Heading1', fontSize=22, spaceAfter=5, alignment=0,
+                       textColor=colors.HexColor('#2c3e50'), fontName='Helvetica-Bold'),
+        'specialite': style('Specialty', 'Heading2', fontSize=18, spaceAfter=5, alignment=0,
+                            textColor=colors.HexColor('#34495e'), fontName='Helvetica'),
+        'cabinet': style('Cabinet', 'Heading3', fontSize=16, spaceAfter=30, alignment=0,
+                         textColor=colors.HexColor('#7f8c8d'), fontName='Helvetica-Oblique'),
+        'date': style('DateStyle', 'Normal', fontSize=14, alignment=2, fontName='Helvetica-Bold'),
+        'patient': style('PatientStyle', 'Normal', fontSize=16, spaceAfter=10, fontName='Helvetica-Bold'),
+        'rubrique': style('PrescriptionTitle', 'Heading2', fontSize=18, spaceAfter=20,
+                          textColor=colors.HexColor('#2c3e50'), fontName='Helvetica-Bold'),
+        'medicament': style('MedicamentNom', 'Normal', fontSize=16, spaceAfter=5,
+                            textColor=colors.HexColor('#2c3e50'), fontName='Helvetica-Bold'),
+        'posologie': style('PosologieStyle', 'Normal', fontSize=14, spaceAfter=20, leftIndent=20,
+                           textColor=colors.HexColor('#555555'), fontName='Helvetica'),
+        'recommandation': style('RecommandationStyle', 'Normal', fontSize=14, spaceAfter=5,
+                                fontName='Helvetica'),
+        'signature': style('SignatureStyle', 'Normal', fontSize=14, alignment=2, fontName='Helvetica-Bold'),
+        'contact': style('ContactStyle', 'Normal', fontSize=12, alignment=0,
+                         textColor=colors.HexColor('#7f8c8d'), fontName='Helvetica')
+    }
+
+
+class ModeleOrdonnance:
+    """Partie fixe de la page d'ordonnance, préparée pour une configuration donnée"""
+
+    def __init__(self, config):
+        self.config = config
+        self.marge_haut = self.marge_bas = 1 * cm
+        self.marge_cotes = 0.5 * cm
+        self.styles = creer_styles()
+        self.nom_form = f"EnteteOrdonnance{id(self)}"
+
+        largeur_page, hauteur_page = A4
+        self.largeur_utile = largeur_page - 2 * self.marge_cotes
+        self.logo = self._preparer_logo(chemin_logo(config))
+
+        # Paragraphes mis en forme une fois : (paragraphe, x, y bas)
+        self.elements = []
+        self.hauteur_entete = self._placer_entete(hauteur_page - self.marge_haut)
+        self.hauteur_pied = self._placer_pied(self.marge_bas)
+
+    def _preparer_logo(self, chemin):
+        """Logo converti une fois à sa taille d'impression (cache disque partagé)"""
+        if not chemin:
+            return None
+        return preparer_image(chemin, 2 * cm, 2 * cm)
+
+    def _paragraphe(self, texte, style, x, haut, largeur):
+        """Met en forme un paragraphe sous `haut` et retourne sa hauteur (espacement compris)"""
+        paragraphe = Paragraph(texte, self.styles[style])
+        _, hauteur = paragraphe.wrap(largeur, 1000)
+        self.elements.append((paragraphe, x, haut - hauteur))
+        return hauteur + paragraphe.getSpaceAfter()
+
+    def _placer_entete(self, haut):
+        """En-tête : logo et informations du médecin, ou titre simple"""
+        config = self.config
+        x = self.marge_cotes
+
+        if self.logo is not None:
+            texte = (f"<b>{config['nom_medecin']}</b><br/>{config['specialite']}<br/>"
+                     f"<i>{config['nom_cabinet']}</i>")
+            paragraphe = Paragraph(texte, self.styles['titre'])
+            _, hauteur_texte = paragraphe.wrap(18 * cm, 1000)
+            hauteur = max(2 * cm, hauteur_texte)
+
+            # Logo centré dans une colonne de 3 cm, texte à droite, centrés verticalement
+            self.position_logo = (x + 0.5 * cm, haut - (hauteur + 2 * cm) / 2)
+            self.elements.append((paragraphe, x + 3 * cm, haut - (hauteur + hauteur_texte) / 2))
+            return hauteur
+
+        hauteur = self._paragraphe(config['nom_medecin'], 'titre', x, haut, self.largeur_utile)
+        hauteur += self._paragraphe(config['specialite'], 'specialite', x, haut - hauteur, self.largeur_utile)
+        hauteur += self._paragraphe(config['nom_cabinet'], 'cabinet', x, haut - hauteur, self.largeur_utile)
+        return hauteur
+
+    def _placer_pied(self, bas):
+        """Pied de page : coordonnées du cabinet sous une ligne séparatrice"""
+        config = self.config
+        lignes = []
+        if config.get('telephone1'):
+            lignes.append(f"Tél: {config['telephone1']}")
+        if config.get('telephone2'):
+            lignes.append(f"Mobile: {config['telephone2']}")
+        if config.get('email'):
+            lignes.append(f"Email: {config['email']}")
+
+        adresse_complete = f"{config.get('adresse', '')}, {config.get('code_postal', '')} {config.get('ville', '')}".strip(", ")
+        if adresse_complete:
+            lignes.append(f"Adresse: {adresse_complete}")
+
+        # Placement de bas en haut
+        hauteur = 0
+        for texte in reversed(lignes):
+            paragraphe = Paragraph(texte, self.styles['contact'])
+            _, h = paragraphe.wrap(self.largeur_utile, 1000)
+            self.elements.append((paragraphe, self.marge_cotes, bas + hauteur))
+            hauteur += h
+
+        self.y_ligne = bas + hauteur + 10
+        return hauteur + 10
+
+    def marges(self):
+        """Marges du cadre de contenu variable (haut, bas)"""
+        return (self.marge_haut + self.hauteur_entete + 20,
+                self.marge_bas + self.hauteur_pied + 20)
+
+    def dessiner_page(self, canvas, doc):
+        """Callback de page : définit le form XObject au premier appel, puis le réutilise"""
+        if not canvas.hasForm(self.nom_form):
+            canvas.beginForm(self.nom_form)
+            if self.logo is not None:
+                canvas.drawImage(self.logo, self.position_logo[0], self.position_logo[1],
+                                 width=2 * cm, height=2 * cm, mask='auto')
+            for paragraphe, x, y in self.elements:
+                paragraphe.drawOn(canvas, x, y)
+            canvas.setStrokeColor(colors.grey)
+            canvas.setLineWidth(1)
+            canvas.line(self.marge_cotes, self.y_ligne, self.marge_cotes + self.largeur_utile, self.y_ligne)
+            canvas.endForm()
+
+        canvas.doForm(self.nom_form)
+
+
+# Modèle de la configuration courante, reconstruit quand config_cabinet.json ou le logo change
+_modele_cache = {'signature': None, 'logo': None, 'modele': None}
+
+
+def obtenir_modele_ordonnance():
+    """
+    Retourne le modèle de page correspondant à la configuration enregistrée
+
+    Returns:
+        ModeleOrdonnance (son attribut config est la configuration chargée)
+    """
+    signature = _signature_fichier(chemin_config_cabinet())
+    modele = _modele_cache['modele']
+    if modele is not None and _modele_cache['signature'] == signature:
+        logo = chemin_logo(modele.config)
+        if _modele_cache['logo'] == (logo and _signature_fichier(logo)):
+            return modele
+
+    config = charger_config_cabinet()
+    logo = chemin_logo(config)
+    modele = ModeleOrdonnance(config)
+    _modele_cache.update(signature=signature, modele=modele, logo=logo and _signature_fichier(logo))
+    return modele
+
+
+def generer_ordonnance_pdf(fichier, donnees):
+    """
+    Génère le PDF d'une ordonnance
+
+    Args:
+        fichier (str): Chemin du PDF à écrire
+        donnees (dict): date, patient, age, medicaments [{nom, posologie}], recommandations
+    """
+    # En-tête, logo et pied de page préparés une fois par configuration du cabinet
+    modele = obtenir_modele_ordonnance()
+    config = modele.config
+    styles = modele.styles
+    marge_haut, marge_bas = modele.marges()
+
+    doc = SimpleDocTemplate(fichier, pagesize=A4, topMargin=marge_haut, bottomMargin=marge_bas,
+                            leftMargin=modele.marge_cotes, rightMargin=modele.marge_cotes)
+    story = []
+
+    # Date et ville en haut à droite
+    story.append(Paragraph(f"{config.get('ville', 'Monastir')}, le {donnees['date']}", styles['date']))
+    story.append(Spacer(1, 30))
+
+    # Informations patient
+    story.append(Paragraph(f"Nom & Prénom: {donnees['patient']}", styles['patient']))
+    story.append(Paragraph(f"Âge: {donnees['age']}", styles['patient']))
+    story.append(Spacer(1, 30))
+
+    # Prescription
+    story.append(Paragraph("Prescription:", styles['rubrique']))
+    for medicament in donnees['medicaments']:
+        story.append(Paragraph(medicament['nom'], styles['medicament']))
+        story.append(Paragraph(f"➤ {medicament['posologie']}", styles['posologie']))
+
+    # Recommandations
+    recommandations = donnees.get('recommandations')
+    if recommandations:
+        story.append(Spacer(1, 30))
+        story.append(Paragraph("Recommandations:", styles['rubrique']))
+        for ligne in recommandations.split('\n'):
+            if ligne.strip():
+                story.append(Paragraph(ligne, styles['recommandation']))
+
+    # Signature
+    story.append(Spacer(1, 70))
+    story.append(Paragraph("Signature du médecin", styles['signature']))
+    story.append(Spacer(1, 10))
+    story.append(Paragraph(config['nom_medecin'], styles['signature']))
+
+    # En-tête et coordonnées dessinés par le modèle sur chaque page
+    doc.build(story, onFirstPage=modele.dessiner_page, onLaterPages=modele.dessiner_page)
@@ -0,0 +1,149 @@
+# -*- coding: utf-8 -*-
+"""
+Taux d'occupation des fauteuils
+Minutes réservées rapportées aux minutes d'ouverture, par fauteuil et par jour,
+sur une période quelconque. Les plages occupées de la période sont lues en une
+requête (quatre entiers par rendez-vous) puis traitées en bloc sur des tableaux
+NumPy : découpage aux horaires d'ouverture et union des chevauchements, sans
+boucle Python par rendez-vous.
+"""
+
+import time
+from collections import OrderedDict
+from datetime import timedelta
+
+from database import db
+from src.creneaux_libres import HEURE_OUVERTURE, HEURE_FERMETURE, JOURS_OUVRES
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+# Périodes calculées gardées en mémoire (vidées à chaque écriture dans l'agenda)
+TAILLE_CACHE = 16
+
+# Durée de validité d'une période en cache (secondes) : les écritures des autres
+# postes ne passent pas par le flux de changements et sont relues à l'expiration
+DUREE_CACHE = 60
+
+_cache = OrderedDict()  # clé -> (instant du calcul (time.monotonic), résultat)
+
+
+def _vider_cache(table, operation, identifiant):
+    if table in ('rendez_vous', 'rendez_vous_recurrents'):
+        _cache.clear()
+
+
+db.abonner_changements(_vider_cache)
+
+
+def _minutes(heure):
+    heures, minutes = heure.split(':')[:2]
+    return int(heures) * 60 + int(minutes)
+
+
+def minutes_reservees(groupes, debuts, fins, nombre_groupes):
+    """
+    Minutes couvertes par au moins un intervalle, pour chaque groupe
+
+    Les intervalles d'un même groupe (un fauteuil un jour donné) qui se
+    chevauchent ne sont comptés qu'une fois. Chaque groupe est décalé sur
+    l'axe des temps de façon à ce qu'un seul maximum cumulé serve à tous.
+
+    Args:
+        groupes (ndarray int): Numéro du groupe de chaque intervalle
+        debuts, fins (ndarray int): Bornes des intervalles (minutes dans la journée)
+        nombre_groupes (int): Taille du résultat
+
+    Returns:
+        ndarray: Minutes réservées par groupe
+    """
+    if len(groupes) == 0:
+        return np.zeros(nombre_groupes, dtype=np.int64)
+
+    decalage = int(max(fins.max(), 1)) + 1
+    ordre = np.lexsort((debuts, groupes))
+    g = groupes[ordre].astype(np.int64)
+    debut = g * decalage + debuts[ordre]
+    fin = g * decalage + fins[ordre]
+
+    # Fin la plus tardive atteinte jusqu'ici (les groupes précédents restent en dessous)
+    couvert = np.maximum.accumulate(fin)
+    precedent = np.concatenate(([0], couvert[:-1]))
+    apport = np.clip(couvert - np.maximum(debut, precedent), 0, None)
+    return np.bincount(g, weights=apport, minlength=nombre_groupes).astype(np.int64)
+
+
+def calculer_occupation(debut, fin, nombre_fauteuils=None, ouverture=HEURE_OUVERTURE,
+                        fermeture=HEURE_FERMETURE, jours=JOURS_OUVRES):
+    """
+    Occupation des fauteuils entre debut et fin (incluses)
+
+    Seules les minutes comprises dans les horaires d'ouverture sont comptées ;
+    les rendez-vous annulés sont ignorés, les séances des séries incluses.
+
+    Args:
+        debut, fin (date): Période analysée
+        nombre_fauteuils (int): Fauteuils du cabinet (par défaut : le plus grand numéro utilisé)
+        ouverture, fermeture (str): Horaires d'une journée (HH:MM)
+        jours (iterable): Jours travaillés (isoweekday)
+
+    Returns:
+        dict: jours (liste de dates), fauteuils, reserve et disponible (tableaux
+        jours x fauteuils, en minutes), taux_fauteuils, taux_jours, taux_global
+        (None si rien n'est disponible) ; None si NumPy est absent
+    """
+    if not NUMPY_AVAILABLE:
+        return None
+
+    cle = (debut, fin, nombre_fauteuils, ouverture, fermeture, tuple(jours))
+    if cle in _cache and time.monotonic() - _cache[cle][0] <= DUREE_CACHE:
+        _cache.move_to_end(cle)
+        return _cache[cle][1]
+
+    # Période inversée : aucun jour, résultat vide
+    nombre_jours = max((fin - debut).days + 1, 0)
+    lignes = db.obtenir_intervalles_rendez_vous(debut.isoformat(), fin.isoformat()) if nombre_jours else []
+    intervalles = np.array(lignes, dtype=np.int64).reshape(-1, 4)
+    jour, depart, duree, fauteuil = intervalles.T
+    fauteuil = fauteuil - 1
+    nombre_fauteuils = nombre_fauteuils or int(max(fauteuil.max(initial=0) + 1, 1))
+    ouverture, fermeture = _minutes(ouverture), _minutes(fermeture)
+
+    # Découpage aux horaires d'ouverture, fauteuils hors du cabinet ignorés
+    debuts = np.clip(depart, ouverture, fermeture)
+    fins = np.clip(depart + duree, ouverture, fermeture)
+    garder = (fins > debuts) & (fauteuil >= 0) & (fauteuil < nombre_fauteuils)
+    groupes = jour[garder] * nombre_fauteuils + fauteuil[garder]
+
+    reserve = minutes_reservees(groupes, debuts[garder], fins[garder], nombre_jours * nombre_fauteuils)
+    reserve = reserve.reshape(nombre_jours, nombre_fauteuils)
+
+    dates = [debut + timedelta(days=i) for i in range(nombre_jours)]
+    ouvert = np.array([d.isoweekday() in jours for d in dates], dtype=bool)
+    disponible = np.where(ouvert[:, None], fermeture - ouverture, 0) * np.ones((1, nombre_fauteuils), dtype=np.int64)
+
+    def taux(reserve_total, disponible_total):
+        return np.divide(reserve_total, disponible_total, out=np.zeros(np.shape(reserve_total)),
+                         where=np.asarray(disponible_total) > 0)
+
+    # Les taux ne portent que sur les jours ouvrés
+    reserve_ouvert = reserve * ouvert[:, None]
+    total_disponible = int(disponible.sum())
+    resultat = {
+        'jours': dates,
+        'fauteuils': list(range(1, nombre_fauteuils + 1)),
+        'reserve': reserve,
+        'disponible': disponible,
+        'taux_fauteuils': taux(reserve_ouvert.sum(axis=0), disponible.sum(axis=0)),
+        'taux_jours': taux(reserve_ouvert.sum(axis=1), disponible.sum(axis=1)),
+        'taux_global': reserve_ouvert.sum() / total_disponible if total_disponible else None
+    }
+
+    _cache[cle] = (time.monotonic(), resultat)
+    _cache.move_to_end(cle)
+    while len(_cache) > TAILLE_CACHE:
+        _cache.popitem(last=False)
+    return resultat
@@ -70,7 +70,40 @@ class PathManager:
             str: Documents/DentalSoft/images
         """
         return self._images_folder
-    
+
+    def get_miniatures_folder(self):
+        """
+        Retourne le dossier des miniatures d'imagerie
+
+        Returns:
+            str: Documents/DentalSoft/images/miniatures
+        """
+        miniatures_folder = os.path.join(self._images_folder, "miniatures")
+        os.makedirs(miniatures_folder, exist_ok=True)
+        return miniatures_folder
+
+    def get_archives_images_folder(self):
+        """
+        Retourne le dossier des archives compressées d'imagerie
+
+        Returns:
+            str: Documents/DentalSoft/images/archives
+        """
+        archives_folder = os.path.join(self._images_folder, "archives")
+        os.makedirs(archives_folder, exist_ok=True)
+        return archives_folder
+
+    def get_cache_pdf_folder(self):
+        """
+        Retourne le dossier des images préparées pour les PDF (logo, fonds)
+
+        Returns:
+            str: Documents/DentalSoft/cache/pdf
+        """
+        cache_folder = os.path.join(self._app_data_folder, "cache", "pdf")
+        os.makedirs(cache_folder, exist_ok=True)
+        return cache_folder
+
     def get_exports_folder(self):
         """
         Retourne le dossier des exports (PDF, rapports, etc.)
@@ -115,6 +148,28 @@ class PathManager:
         os.makedirs(factures_folder, exist_ok=True)
         return factures_folder
     
+    def get_releves_folder(self):
+        """
+        Retourne le dossier des relevés de compte des patients
+        
+        Returns:
+            str: Documents/DentalSoft/releves
+        """
+        releves_folder = os.path.join(self._app_data_folder, "releves")
+        os.makedirs(releves_folder, exist_ok=True)
+        return releves_folder
+    
+    def get_rappels_folder(self):
+        """
+        Retourne la boîte d'envoi des rappels de rendez-vous (fichiers CSV / JSON)
+        
+        Returns:
+            str: Documents/DentalSoft/rappels
+        """
+        rappels_folder = os.path.join(self._app_data_folder, "rappels")
+        os.makedirs(rappels_folder, exist_ok=True)
+        return rappels_folder
+    
     def ensure_directory(self, path):
         """
         S'assure qu'un dossier existe, le crée si nécessaire
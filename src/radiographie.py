@@ -0,0 +1,201 @@
+# -*- coding: utf-8 -*-
+"""
+Chargement des radiographies en pleine dynamique (8 ou 16 bits)
+Fenêtrage (niveau/fenêtre), gamma et inversion par tables de correspondance (LUT)
+"""
+
+import os
+import json
+from functools import lru_cache
+
+from PySide6.QtGui import QImage
+
+try:
+    import numpy as np
+    NUMPY_AVAILABLE = True
+except ImportError:
+    NUMPY_AVAILABLE = False
+
+try:
+    from PIL import Image
+    PIL_AVAILABLE = True
+except ImportError:
+    PIL_AVAILABLE = False
+
+# Formats bruts exportés par les capteurs (pixels 16 bits sans en-tête)
+EXTENSIONS_RAW = ('.raw',)
+
+# Modes Pillow correspondant à des niveaux de gris 16 bits
+MODES_16_BITS = ('I;16', 'I;16L', 'I;16B', 'I;16N')
+
+
+class ImageRadiographique:
+    """Image en niveaux de gris conservant toute la dynamique du capteur"""
+
+    def __init__(self, donnees, profondeur_bits):
+        """
+        Args:
+            donnees: Tableau NumPy 2D (uint8 ou uint16)
+            profondeur_bits (int): Nombre de bits réellement utilisés (8 à 16)
+        """
+        self.donnees = np.ascontiguousarray(donnees)
+        self.profondeur_bits = profondeur_bits
+
+    @property
+    def largeur(self):
+        return self.donnees.shape[1]
+
+    @property
+    def hauteur(self):
+        return self.donnees.shape[0]
+
+    @property
+    def valeur_max(self):
+        """Valeur maximale représentable avec la profondeur détectée"""
+        return (1 << self.profondeur_bits) - 1
+
+    def fenetrage_par_defaut(self):
+        """
+        Calcule un fenêtrage initial en ignorant les valeurs extrêmes
+
+        Returns:
+            tuple: (centre, largeur) couvrant les percentiles 0.5 % - 99.5 %
+        """
+        # Un sous-échantillon suffit pour estimer les percentiles
+        echantillon = self.donnees[::4, ::4]
+        bas, haut = np.percentile(echantillon, (0.5, 99.5))
+        largeur = max(int(haut - bas), 1)
+        centre = int(bas + largeur / 2)
+        return centre, largeur
+
+    def rendre(self, centre, largeur, gamma=1.0, inverser=False):
+        """
+        Applique le fenêtrage et retourne une QImage 8 bits affichable
+
+        Args:
+            centre (int): Niveau (centre de la fenêtre)
+            largeur (int): Largeur de la fenêtre
+            gamma (float): Correction gamma
+            inverser (bool): Inversion négatif/positif
+        """
+        return tableau_vers_qimage(self.rendre_tableau(centre, largeur, gamma, inverser))
+
+    def rendre_tableau(self, centre, largeur, gamma=1.0, inverser=False):
+        """Comme rendre(), mais retourne le tableau NumPy 8 bits (entrée des filtres)"""
+        lut = calculer_lut(self.donnees.dtype.itemsize * 8, int(centre), int(largeur),
+                           round(float(gamma), 2), bool(inverser))
+        return lut[self.donnees]
+
+
+@lru_cache(maxsize=32)
+def calculer_lut(bits_stockage, centre, largeur, gamma=1.0, inverser=False):
+    """
+    Précalcule la table de correspondance valeur capteur -> niveau d'affichage
+
+    La table couvre toutes les valeurs du type de stockage (256 ou 65536 entrées),
+    l'application à l'image se réduit donc à une simple indexation vectorisée.
+    Les tables sont mises en cache : revenir à un réglage précédent est immédiat.
+    """
+    valeurs = np.arange(1 << bits_stockage, dtype=np.float32)
+    largeur = max(largeur, 1)
+    bas = centre - largeur / 2.0
+
+    t = np.clip((valeurs - bas) / largeur, 0.0, 1.0)
+    if gamma != 1.0:
+        t = np.power(t, 1.0 / gamma)
+    if inverser:
+        t = 1.0 - t
+
+    lut = (t * 255.0 + 0.5).astype(np.uint8)
+    lut.flags.writeable = False
+    return lut
+
+
+def tableau_vers_qimage(tableau):
+    """Convertit un tableau NumPy uint8 (2D niveaux de gris ou RGB) en QImage"""
+    tableau = np.ascontiguousarray(tableau, dtype=np.uint8)
+    hauteur, largeur = tableau.shape[:2]
+    format_image = QImage.Format.Format_Grayscale8 if tableau.ndim == 2 else QImage.Format.Format_RGB888
+    image = QImage(tableau.data, largeur, hauteur, tableau.strides[0], format_image)
+    # Copier pour que l'image ne dépende plus du tampon NumPy
+    return image.copy()
+
+
+def charger_raw(chemin):
+    """
+    Charge un export brut de capteur (pixels 16 bits little-endian sans en-tête)
+
+    Les dimensions sont lues dans un fichier JSON voisin (image.raw.json ou
+    image.json : {"largeur": ..., "hauteur": ..., "bits": 16, "ordre": "little"}).
+    À défaut, une image carrée est supposée.
+    """
+    parametres = {}
+    base = os.path.splitext(chemin)[0]
+    for chemin_json in (chemin + ".json", base + ".json"):
+        if os.path.exists(chemin_json):
+            with open(chemin_json, 'r', encoding='utf-8') as f:
+                parametres = json.load(f)
+            break
+
+    bits = int(parametres.get("bits", 16))
+    ordre = '>' if parametres.get("ordre", "little") == "big" else '<'
+    dtype = np.dtype(f"{ordre}u2") if bits > 8 else np.dtype(np.uint8)
+
+    donnees = np.fromfile(chemin, dtype=dtype)
+    largeur = parametres.get("largeur")
+    hauteur = parametres.get("hauteur")
+    if not largeur or not hauteur:
+        cote = int(np.sqrt(donnees.size))
+        if cote * cote != donnees.size:
+            return None
+        largeur = hauteur = cote
+
+    donnees = donnees[:largeur * hauteur].reshape(hauteur, largeur)
+    if dtype.itemsize == 2:
+        donnees = donnees.astype(np.uint16, copy=False)
+    return ImageRadiographique(donnees, profondeur_effective(donnees))
+
+
+def charger_image_radiographique(chemin):
+    """
+    Charge une image en niveaux de gris sans perte de dynamique
+
+    Args:
+        chemin (str): Chemin du fichier (TIFF, PNG 16 bits, RAW capteur, ...)
+
+    Returns:
+        ImageRadiographique ou None si l'image est en couleur ou illisible
+        (l'appelant retombe alors sur un chargement QPixmap classique)
+    """
+    if not NUMPY_AVAILABLE or not os.path.exists(chemin):
+        return None
+
+    try:
+        if os.path.splitext(chemin)[1].lower() in EXTENSIONS_RAW:
+            return charger_raw(chemin)
+
+        if not PIL_AVAILABLE:
+            return None
+
+        with Image.open(chemin) as image:
+            if image.mode in MODES_16_BITS:
+                donnees = np.array(image, dtype=np.uint16)
+            elif image.mode == 'I':
+                # Certains PNG 16 bits sont décodés en entiers 32 bits
+                donnees = np.clip(np.asarray(image), 0, 65535).astype(np.uint16)
+            elif image.mode in ('L', 'LA'):
+                donnees = np.array(image.convert('L'), dtype=np.uint8)
+            else:
+                return None
+
+        return ImageRadiographique(donnees, profondeur_effective(donnees))
+
+    except Exception:
+        return None
+
+
+def profondeur_effective(donnees):
+    """Nombre de bits réellement utilisés (capteurs 12 ou 14 bits stockés sur 16)"""
+    if donnees.dtype == np.uint8:
+        return 8
+    return min(16, max(8, int(donnees.max()).bit_length()))
@@ -0,0 +1,102 @@
+# -*- coding: utf-8 -*-
+"""
+Rappels de rendez-vous
+Les rappels de la période sont lus en une requête, rédigés à partir d'un modèle
+puis écrits dans un fichier de la boîte d'envoi (CSV ou JSON), que la passerelle
+SMS du cabinet peut reprendre. Chaque rappel écrit est mémorisé : une nouvelle
+exécution ne traite que les rendez-vous ajoutés ou déplacés depuis.
+"""
+
+import csv
+import json
+import os
+from datetime import date, datetime, timedelta
+from string import Template
+
+from database import db
+from src.path_manager import path_manager
+
+# Période par défaut : les rendez-vous de demain
+DECALAGE_JOURS = 1
+FENETRE_JOURS = 1
+
+# Champs disponibles : $prenom $nom $date $heure $type
+MODELE_RAPPEL = ("Bonjour $prenom $nom, nous vous rappelons votre rendez-vous ($type) "
+                 "le $date à $heure au cabinet dentaire. En cas d'empêchement, merci de nous prévenir.")
+
+FORMATS_ENVOI = ('csv', 'json')
+COLONNES_ENVOI = ('telephone', 'patient', 'date', 'heure', 'message', 'cle')
+
+
+def periode_rappels(jour=None, decalage=DECALAGE_JOURS, fenetre=FENETRE_JOURS):
+    """Bornes (YYYY-MM-DD) des rendez-vous à rappeler à partir de jour (aujourd'hui)"""
+    debut = (jour or date.today()) + timedelta(days=decalage)
+    return debut.isoformat(), (debut + timedelta(days=max(1, fenetre) - 1)).isoformat()
+
+
+def rediger_message(rdv, modele=MODELE_RAPPEL):
+    """Message d'un rappel ; les champs inconnus du modèle sont laissés tels quels"""
+    return Template(modele).safe_substitute(
+        prenom=rdv['prenom'] or "",
+        nom=rdv['nom'] or "",
+        date=date.fromisoformat(rdv['date_rdv']).strftime('%d/%m/%Y'),
+        heure=rdv['heure_rdv'][:5],
+        type=rdv.get('type_rdv') or "consultation"
+    ).strip()
+
+
+def ecrire_boite_envoi(fichier, messages, format_envoi='csv'):
+    """Écrit les messages dans un fichier temporaire puis le renomme (jamais de fichier partiel)"""
+    temporaire = fichier + ".tmp"
+    if format_envoi == 'json':
+        with open(temporaire, 'w', encoding='utf-8') as f:
+            json.dump(messages, f, ensure_ascii=False, indent=2)
+    else:
+        # utf-8-sig : accents lisibles à l'ouverture dans Excel
+        with open(temporaire, 'w', encoding='utf-8-sig', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=COLONNES_ENVOI, delimiter=';')
+            writer.writeheader()
+            writer.writerows(messages)
+    os.replace(temporaire, fichier)
+
+
+def generer_rappels(debut, fin, modele=MODELE_RAPPEL, format_envoi='csv', dossier=None):
+    """
+    Écrit les rappels non encore envoyés de la période dans la boîte d'envoi
+
+    Les patients sans téléphone ne sont pas écrits ni marqués : ils seront
+    repris dès que leur numéro sera renseigné.
+
+    Args:
+        debut / fin (str): Période des rendez-vous (YYYY-MM-DD, incluses)
+        modele (str): Modèle du message (voir MODELE_RAPPEL)
+        format_envoi (str): 'csv' ou 'json'
+        dossier (str): Boîte d'envoi (Documents/DentalSoft/rappels par défaut)
+
+    Returns:
+        dict: fichier (None si rien à écrire), envoyes, sans_telephone (noms des patients)
+    """
+    rappels = db.obtenir_rappels_a_envoyer(debut, fin)
+    a_envoyer = [rdv for rdv in rappels if (rdv['telephone'] or "").strip()]
+    sans_telephone = sorted({rdv['patient_nom'] for rdv in rappels if not (rdv['telephone'] or "").strip()})
+
+    fichier = None
+    if a_envoyer:
+        messages = [{
+            'telephone': rdv['telephone'].strip(),
+            'patient': rdv['patient_nom'],
+            'date': rdv['date_rdv'],
+            'heure': rdv['heure_rdv'][:5],
+            'message': rediger_message(rdv, modele),
+            'cle': rdv['cle_rappel']
+        } for rdv in a_envoyer]
+
+        dossier = dossier or path_manager.get_rappels_folder()
+        horodatage = datetime.now().strftime('%Y%m%d_%H%M%S')
+        fichier = os.path.join(dossier, f"rappels_{debut}_{horodatage}.{format_envoi}")
+        ecrire_boite_envoi(fichier, messages, format_envoi)
+
+        if not db.marquer_rappels_envoyes(a_envoyer, fichier):
+            raise RuntimeError(f"Rappels écrits dans {fichier} mais non marqués comme envoyés")
+
+    return {'fichier': fichier, 'envoyes': len(a_envoyer), 'sans_telephone': sans_telephone}
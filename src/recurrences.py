@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+"""
+Règles de récurrence des rendez-vous (suivis d'orthodontie, contrôles réguliers)
+Une série est enregistrée une seule fois ; ses occurrences sont calculées à la
+demande pour la période affichée, sans jamais être écrites en base.
+"""
+
+from datetime import date, timedelta
+
+# Fréquences possibles (équivalents RRULE : DAILY, WEEKLY, MONTHLY)
+FREQUENCES = {
+    'quotidien': "Chaque jour",
+    'hebdomadaire': "Chaque semaine",
+    'mensuel': "Chaque mois"
+}
+
+
+def _date(valeur):
+    return valeur if isinstance(valeur, date) else date.fromisoformat(valeur)
+
+
+def occurrences(regle, debut, fin):
+    """
+    Dates des occurrences d'une série comprises entre debut et fin (incluses)
+
+    Le calcul saute directement à la première occurrence de la période : le coût
+    ne dépend que du nombre d'occurrences visibles, pas de l'ancienneté de la série.
+    Comme RRULE, une série mensuelle du 31 ne produit rien les mois plus courts.
+
+    Args:
+        regle (dict): date_debut, frequence, intervalle, date_fin (None = sans fin)
+        debut, fin (date ou str YYYY-MM-DD): Période demandée
+    """
+    depart = _date(regle['date_debut'])
+    debut, fin = max(_date(debut), depart), _date(fin)
+    if regle.get('date_fin'):
+        fin = min(fin, _date(regle['date_fin']))
+    intervalle = max(1, regle.get('intervalle') or 1)
+    if debut > fin:
+        return
+
+    if regle['frequence'] == 'mensuel':
+        ecart = (debut.year - depart.year) * 12 + debut.month - depart.month
+        rang = ecart // intervalle
+        while True:
+            mois = depart.month - 1 + rang * intervalle
+            annee, mois = depart.year + mois // 12, mois % 12 + 1
+            if date(annee, mois, 1) > fin:
+                return
+            try:
+                jour = date(annee, mois, depart.day)
+            except ValueError:
+                jour = None  # Jour absent de ce mois
+            if jour is not None and debut <= jour <= fin:
+                yield jour
+            rang += 1
+    else:
+        pas = intervalle * (7 if regle['frequence'] == 'hebdomadaire' else 1)
+        rang = -(-(debut - depart).days // pas)
+        jour = depart + timedelta(days=rang * pas)
+        while jour <= fin:
+            yield jour
+            jour += timedelta(days=pas)
+
+
+def date_fin_pour_nombre(regle, nombre):
+    """Date de la dernière occurrence d'une série limitée à nombre séances"""
+    regle = dict(regle, date_fin=None)
+    derniere = None
+    debut = _date(regle['date_debut'])
+    # Parcours par tranches d'un an : la série peut sauter des mois (jour 31)
+    while nombre > 0:
+        fin = debut + timedelta(days=366)
+        for derniere in occurrences(regle, debut, fin):
+            nombre -= 1
+            if nombre == 0:
+                break
+        debut = fin + timedelta(days=1)
+    return derniere.isoformat()
@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+"""
+Préparation des images incorporées aux PDF (logo du cabinet, fonds de page)
+Chaque image est convertie une seule fois à la résolution d'impression et dans
+un format que ReportLab incorpore sans recompression (JPEG si opaque), puis
+conservée dans le cache disque : le rendu et la taille de chaque PDF en profitent.
+"""
+
+import os
+import math
+import hashlib
+
+from src.path_manager import path_manager
+
+try:
+    from PIL import Image
+    PIL_AVAILABLE = True
+except ImportError:
+    PIL_AVAILABLE = False
+
+# Résolution d'impression des images (dpi) : au-delà, le PDF grossit sans gain visible
+RESOLUTION_PDF = 200
+
+QUALITE_JPEG = 90
+
+# Préparations déjà faites dans ce processus : clé -> (signature source, chemin)
+_preparees = {}
+
+
+def _signature(chemin):
+    try:
+        stat = os.stat(chemin)
+        return (stat.st_mtime_ns, stat.st_size)
+    except OSError:
+        return None
+
+
+def _transparente(image):
+    """Indique si l'image a au moins un pixel non opaque"""
+    if image.mode in ('RGBA', 'LA') or 'transparency' in image.info:
+        alpha = image.convert('RGBA').getchannel('A')
+        return alpha.getextrema()[0] < 255
+    return False
+
+
+def preparer_image(chemin, largeur_pt, hauteur_pt, resolution=RESOLUTION_PDF, fond=None):
+    """
+    Retourne le chemin d'une version de l'image prête à incorporer dans un PDF
+
+    L'image est réduite (jamais agrandie) à la résolution cible pour sa taille
+    imprimée. Opaque, ou aplatie sur `fond`, elle est enregistrée en JPEG ;
+    transparente, en PNG optimisé.
+
+    Args:
+        chemin (str): Image source (PNG, JPEG, ICO, ...)
+        largeur_pt, hauteur_pt (float): Taille imprimée en points
+        fond (str): Couleur sur laquelle aplatir la transparence (ex. 'white')
+
+    Returns:
+        str: Chemin du fichier préparé (l'original si Pillow est absent), ou None
+        si l'image est absente ou illisible (le PDF est alors dessiné sans elle)
+    """
+    signature = _signature(chemin)
+    if signature is None:
+        return None
+    if not PIL_AVAILABLE:
+        return chemin
+
+    cle = (os.path.abspath(chemin), round(largeur_pt, 2), round(hauteur_pt, 2), resolution, fond)
+    deja = _preparees.get(cle)
+    if deja is not None and deja[0] == signature and os.path.exists(deja[1]):
+        return deja[1]
+
+    nom = hashlib.sha1(repr((cle, signature)).encode('utf-8')).hexdigest()[:20]
+    dossier = path_manager.get_cache_pdf_folder()
+
+    try:
+        for extension in ('.jpg', '.png'):
+            prepare = os.path.join(dossier, nom + extension)
+            if os.path.exists(prepare):
+                _preparees[cle] = (signature, prepare)
+                return prepare
+
+        taille_max = (max(1, math.ceil(largeur_pt / 72 * resolution)),
+                      max(1, math.ceil(hauteur_pt / 72 * resolution)))
+
+        with Image.open(chemin) as source:
+            source.draft('RGB', taille_max)  # Décodage JPEG réduit
+            transparente = _transparente(source)
+            image = source.convert('RGBA' if transparente else 'RGB')
+        image.thumbnail(taille_max, Image.LANCZOS)
+
+        if transparente and fond is not None:
+            aplatie = Image.new('RGB', image.size, fond)
+            aplatie.paste(image, mask=image.getchannel('A'))
+            image, transparente = aplatie, False
+
+        prepare = os.path.join(dossier, nom + ('.png' if transparente else '.jpg'))
+        chemin_temp = f"{prepare}.{os.getpid()}.tmp"
+        if transparente:
+            image.save(chemin_temp, format='PNG', optimize=True)
+        else:
+            image.save(chemin_temp, format='JPEG', quality=QUALITE_JPEG, optimize=True)
+        os.replace(chemin_temp, prepare)
+
+        _preparees[cle] = (signature, prepare)
+        return prepare
+
+    except Exception:
+        return None  # Image illisible : ReportLab ne saurait pas l'incorporer non plus
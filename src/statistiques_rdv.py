@@ -0,0 +1,97 @@
+# -*- coding: utf-8 -*-
+"""
+Absences et annulations des rendez-vous
+Les issues (terminé, annulé, absent) sont cumulées par patient, jour de la
+semaine, heure et type d'acte dans statistiques_rendez_vous, tenue à jour par
+déclencheurs SQLite. Ce module lit ces cumuls en une requête et en tire un
+risque d'absence pour chaque rendez-vous affiché, sans requête par ligne.
+"""
+
+from datetime import date
+
+from database import db
+
+# Poids du taux moyen du cabinet dans chaque taux (en rendez-vous) : lisse les petits effectifs
+POIDS_A_PRIORI = 5
+
+# Risque d'absence à partir duquel un rendez-vous est signalé
+SEUIL_RISQUE = 0.25
+
+# Jours de la semaine dans l'ordre de strftime('%w') (0 = dimanche)
+JOURS_SEMAINE = ["Dimanche", "Lundi", "Mardi", "Mercredi", "Jeudi", "Vendredi", "Samedi"]
+
+
+def taux_absence(cumul):
+    """Absences rapportées aux rendez-vous honorés ou manqués (les annulations prévenues ne comptent pas)"""
+    termines, annules, absents = cumul
+    return absents / (termines + absents) if termines + absents else None
+
+
+def taux_annulation(cumul):
+    """Annulations rapportées à toutes les issues connues"""
+    termines, annules, absents = cumul
+    total = termines + annules + absents
+    return annules / total if total else None
+
+
+def _cles(rdv):
+    """Valeur du rendez-vous sur chaque axe des cumuls (mêmes expressions qu'en SQL)"""
+    jour = date.fromisoformat(rdv['date_rdv'])
+    return {
+        'patient': rdv.get('patient_id'),
+        'jour_semaine': str(jour.isoweekday() % 7),
+        'heure': (rdv.get('heure_rdv') or "")[:2],
+        'type': rdv.get('type_rdv')
+    }
+
+
+class ScoresAbsence:
+    """
+    Risques d'absence calculés à partir des cumuls
+
+    Le risque part du taux d'absence lissé du patient, corrigé par l'écart au
+    taux moyen du jour, de l'heure et du type d'acte. Un patient ou un axe sans
+    historique prend le taux moyen du cabinet.
+    """
+
+    def __init__(self, cumuls, poids=POIDS_A_PRIORI):
+        self.cumuls = cumuls or {}
+        self.poids = poids
+        totaux = [sum(colonne) for colonne in zip(*self.cumuls.get('jour_semaine', {}).values())]
+        self.taux_moyen = taux_absence(totaux) if totaux else None
+
+    @classmethod
+    def pour(cls, rendez_vous):
+        """Scores des rendez-vous donnés : une seule lecture, limitée à leurs patients"""
+        patient_ids = sorted({rdv['patient_id'] for rdv in rendez_vous if rdv.get('patient_id')})
+        return cls(db.obtenir_statistiques_rendez_vous(patient_ids))
+
+    def _taux(self, dimension, valeur):
+        termines, annules, absents = self.cumuls.get(dimension, {}).get(valeur, (0, 0, 0))
+        return (absents + self.poids * self.taux_moyen) / (termines + absents + self.poids)
+
+    def risque(self, rdv):
+        """Risque d'absence (0 à 1) d'un rendez-vous, None sans historique"""
+        if not self.taux_moyen:
+            return None
+
+        cles = _cles(rdv)
+        risque = self._taux('patient', cles['patient'])
+        for dimension in ('jour_semaine', 'heure', 'type'):
+            risque *= self._taux(dimension, cles[dimension]) / self.taux_moyen
+        return min(risque, 1.0)
+
+
+def statistiques_par_jour():
+    """
+    Taux d'absence et d'annulation par jour de la semaine, sur tout l'historique
+
+    Returns:
+        list: [(jour, taux_absence, taux_annulation), ...] du lundi au dimanche
+    """
+    par_jour = db.obtenir_statistiques_rendez_vous([]).get('jour_semaine', {})
+    resultats = []
+    for numero in (1, 2, 3, 4, 5, 6, 0):
+        cumul = par_jour.get(str(numero), (0, 0, 0))
+        resultats.append((JOURS_SEMAINE[numero], taux_absence(cumul), taux_annulation(cumul)))
+    return resultats
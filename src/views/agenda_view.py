@@ -3,16 +3,62 @@ from PySide6.QtWidgets import (QWidget, QHBoxLayout, QVBoxLayout, QLabel,
                              QGroupBox, QLineEdit, QDateEdit, QComboBox, 
                              QTableWidget, QTableWidgetItem, QHeaderView, 
                              QSplitter, QCalendarWidget, QTimeEdit, QTextEdit,
-                             QDialog, QDialogButtonBox, QMessageBox, QFormLayout)
-from PySide6.QtCore import Qt, QDate, QTime, Signal
-from PySide6.QtGui import QFont
-from database import db
+                             QDialog, QDialogButtonBox, QMessageBox, QFormLayout,
+                             QStackedWidget, QAbstractItemView, QSpinBox, QTableView,
+                             QStyledItemDelegate, QStyle, QListWidget, QListWidgetItem)
+from PySide6.QtCore import Qt, QDate, QTime, Signal, QTimer, QAbstractTableModel, QModelIndex
+from PySide6.QtGui import QFont, QColor
+import time
+from bisect import bisect_right
+from collections import OrderedDict, namedtuple
+from database import db, DUREE_RDV_DEFAUT
 from src.context import context
+from src.creneaux_libres import chercher_creneaux, HEURE_OUVERTURE, HEURE_FERMETURE, FENETRE_JOURS
+from src.recurrences import FREQUENCES, date_fin_pour_nombre
+from src.rappels import (generer_rappels, periode_rappels, rediger_message, MODELE_RAPPEL,
+                         DECALAGE_JOURS, FENETRE_JOURS as FENETRE_RAPPELS, FORMATS_ENVOI)
+from src.statistiques_rdv import ScoresAbsence, SEUIL_RISQUE
+
+# Modes d'affichage du planning
+MODES_AGENDA = ["Jour", "Semaine", "Mois"]
+
+# Plages de dates (semaines, grilles mensuelles) gardées en mémoire
+TAILLE_CACHE_PLAGES = 12
+
+# Durée de validité d'une plage en cache (secondes) : les écritures des autres
+# postes ne passent pas par le flux de changements et sont relues à l'expiration
+DUREE_CACHE_PLAGES = 60
+
+# Rendez-vous listés par case dans la vue mois
+RDV_PAR_CASE_MOIS = 4
+
+# Prochains rendez-vous affichés pour le patient sélectionné
+PROCHAINS_RDV = 5
+
+# Couleur de la colonne Statut (les autres statuts : jaune)
+COULEURS_STATUT = {
+    'termine': QColor(Qt.GlobalColor.green),
+    'annule': QColor(Qt.GlobalColor.red),
+    'absent': QColor("#FF9800")
+}
+COULEUR_STATUT_DEFAUT = QColor(Qt.GlobalColor.yellow)
+
+# Ligne du planning du jour : textes affichés et rendez-vous du cache (référence, pas de copie)
+LigneRendezVous = namedtuple('LigneRendezVous', 'heure patient type description statut risque rdv')
+
+
+def texte_conflits(conflits):
+    """Message affiché sous le formulaire quand le créneau chevauche d'autres rendez-vous"""
+    lignes = ["⚠ Créneau déjà occupé sur ce fauteuil :"]
+    for rdv in conflits:
+        lignes.append(f"{rdv['heure_rdv']} ({rdv['duree'] or DUREE_RDV_DEFAUT} min) – "
+                      f"{rdv['patient_nom']}, {rdv['type_rdv']}")
+    return "\n".join(lignes)
 
 class AjouterRendezVousDialog(QDialog):
     """Dialog pour ajouter un nouveau rendez-vous"""
     
-    def __init__(self, date_selectionnee=None, parent=None):
+    def __init__(self, date_selectionnee=None, parent=None, creneau=None):
         super().__init__(parent)
         self.setWindowTitle("Nouveau Rendez-vous")
         self.setModal(True)
@@ -20,6 +66,12 @@ class AjouterRendezVousDialog(QDialog):
         
         self.date_selectionnee = date_selectionnee or QDate.currentDate()
         self.setup_ui()
+        
+        # Créneau proposé par la recherche de créneaux libres
+        if creneau:
+            self.heure_edit.setTime(QTime.fromString(creneau['debut'], 'HH:mm'))
+            self.duree_spin.setValue(creneau['duree'])
+            self.fauteuil_spin.setValue(creneau['fauteuil'])
     
     def setup_ui(self):
         layout = QVBoxLayout(self)
@@ -51,12 +103,45 @@ class AjouterRendezVousDialog(QDialog):
         self.heure_edit.setStyleSheet("QTimeEdit { padding: 5px; }")
         form_layout.addRow("Heure *:", self.heure_edit)
         
+        # Durée et fauteuil : vérification des chevauchements
+        self.duree_spin = QSpinBox()
+        self.duree_spin.setRange(5, 480)
+        self.duree_spin.setSingleStep(5)
+        self.duree_spin.setSuffix(" min")
+        self.duree_spin.setValue(DUREE_RDV_DEFAUT)
+        form_layout.addRow("Durée:", self.duree_spin)
+        
+        self.fauteuil_spin = QSpinBox()
+        self.fauteuil_spin.setRange(1, 9)
+        form_layout.addRow("Fauteuil:", self.fauteuil_spin)
+        
         # Type de rendez-vous
         self.type_combo = QComboBox()
         self.type_combo.addItems(["Contrôle", "Soin", "Urgence", "Consultation", "Détartrage", "Radiographie", "Chirurgie"])
         self.type_combo.setStyleSheet("QComboBox { padding: 5px; }")
         form_layout.addRow("Type *:", self.type_combo)
         
+        # Répétition (suivis d'orthodontie, contrôles réguliers)
+        self.repetition_combo = QComboBox()
+        self.repetition_combo.addItem("Non", None)
+        for frequence, libelle in FREQUENCES.items():
+            self.repetition_combo.addItem(libelle, frequence)
+        form_layout.addRow("Répéter:", self.repetition_combo)
+        
+        self.intervalle_spin = QSpinBox()
+        self.intervalle_spin.setRange(1, 12)
+        self.intervalle_spin.setPrefix("tous les ")
+        form_layout.addRow("Rythme:", self.intervalle_spin)
+        
+        self.seances_spin = QSpinBox()
+        self.seances_spin.setRange(0, 500)
+        self.seances_spin.setSpecialValueText("Sans fin")
+        self.seances_spin.setValue(12)
+        form_layout.addRow("Séances:", self.seances_spin)
+        
+        self.repetition_combo.currentIndexChanged.connect(self.repetition_change)
+        self.repetition_change()
+        
         # Description
         self.description_edit = QTextEdit()
         self.description_edit.setMaximumHeight(80)
@@ -65,6 +150,12 @@ class AjouterRendezVousDialog(QDialog):
         
         layout.addLayout(form_layout)
         
+        self.conflit_label = QLabel("")
+        self.conflit_label.setStyleSheet("color: #dc3545; font-weight: bold;")
+        self.conflit_label.setWordWrap(True)
+        self.conflit_label.setVisible(False)
+        layout.addWidget(self.conflit_label)
+        
         # Note sur les champs obligatoires
         note = QLabel("* Champs obligatoires")
         note.setStyleSheet("color: #666; font-style: italic; margin-top: 10px;")
@@ -72,11 +163,19 @@ class AjouterRendezVousDialog(QDialog):
         
         # Boutons
         button_box = QDialogButtonBox(QDialogButtonBox.StandardButton.Ok | QDialogButtonBox.StandardButton.Cancel)
+        self.btn_valider = button_box.button(QDialogButtonBox.StandardButton.Ok)
         button_box.button(QDialogButtonBox.StandardButton.Ok).setText("Ajouter")
         button_box.button(QDialogButtonBox.StandardButton.Cancel).setText("Annuler")
         button_box.accepted.connect(self.valider_et_accepter)
         button_box.rejected.connect(self.reject)
         layout.addWidget(button_box)
+        
+        # Chevauchements vérifiés pendant la saisie du créneau
+        self.date_edit.dateChanged.connect(self.verifier_conflits)
+        self.heure_edit.timeChanged.connect(self.verifier_conflits)
+        self.duree_spin.valueChanged.connect(self.verifier_conflits)
+        self.fauteuil_spin.valueChanged.connect(self.verifier_conflits)
+        self.verifier_conflits()
     
     def charger_patients(self):
         """Charge la liste des patients dans le combo box"""
@@ -91,6 +190,22 @@ class AjouterRendezVousDialog(QDialog):
             #print(f"Erreur lors du chargement des patients: {e}")
             QMessageBox.warning(self, "Erreur", "Impossible de charger la liste des patients")
     
+    def repetition_change(self):
+        """Active le rythme et le nombre de séances pour une série"""
+        serie = self.repetition_combo.currentData() is not None
+        self.intervalle_spin.setEnabled(serie)
+        self.seances_spin.setEnabled(serie)
+    
+    def verifier_conflits(self):
+        """Affiche les rendez-vous qui chevauchent le créneau saisi"""
+        conflits = db.obtenir_conflits_rendez_vous(
+            self.date_edit.date().toString('yyyy-MM-dd'), self.heure_edit.time().toString('HH:mm'),
+            self.duree_spin.value(), self.fauteuil_spin.value())
+        self.conflit_label.setText(texte_conflits(conflits) if conflits else "")
+        self.conflit_label.setVisible(bool(conflits))
+        self.btn_valider.setEnabled(not conflits)
+        return conflits
+    
     def valider_et_accepter(self):
         """Valide les données avant d'accepter"""
         if not self.patient_combo.currentData():
@@ -105,6 +220,10 @@ class AjouterRendezVousDialog(QDialog):
             QMessageBox.warning(self, "Validation", "Veuillez sélectionner une heure valide")
             return
         
+        if self.verifier_conflits():
+            QMessageBox.warning(self, "Validation", "Ce créneau chevauche un autre rendez-vous du même fauteuil")
+            return
+        
         self.accept()
     
     def get_rendez_vous_data(self):
@@ -113,9 +232,25 @@ class AjouterRendezVousDialog(QDialog):
             'patient_id': self.patient_combo.currentData(),
             'date': self.date_edit.date().toString('yyyy-MM-dd'),
             'heure': self.heure_edit.time().toString('HH:mm'),
+            'duree': self.duree_spin.value(),
+            'fauteuil': self.fauteuil_spin.value(),
             'type': self.type_combo.currentText(),
-            'description': self.description_edit.toPlainText().strip()
+            'description': self.description_edit.toPlainText().strip(),
+            'recurrence': self.get_recurrence()
         }
+    
+    def get_recurrence(self):
+        """Règle de la série, ou None pour un rendez-vous unique"""
+        frequence = self.repetition_combo.currentData()
+        if frequence is None:
+            return None
+        regle = {
+            'date_debut': self.date_edit.date().toString('yyyy-MM-dd'),
+            'frequence': frequence,
+            'intervalle': self.intervalle_spin.value()
+        }
+        regle['date_fin'] = date_fin_pour_nombre(regle, self.seances_spin.value()) if self.seances_spin.value() else None
+        return regle
 
 class ModifierRendezVousDialog(QDialog):
     """Dialog pour modifier un rendez-vous existant"""
@@ -129,6 +264,14 @@ class ModifierRendezVousDialog(QDialog):
         self.rdv_data = rdv_data
         self.setup_ui()
         self.charger_donnees()
+        
+        # Chevauchements vérifiés pendant la saisie du créneau
+        self.date_edit.dateChanged.connect(self.verifier_conflits)
+        self.heure_edit.timeChanged.connect(self.verifier_conflits)
+        self.duree_spin.valueChanged.connect(self.verifier_conflits)
+        self.fauteuil_spin.valueChanged.connect(self.verifier_conflits)
+        self.statut_combo.currentTextChanged.connect(self.verifier_conflits)
+        self.verifier_conflits()
     
     def setup_ui(self):
         layout = QVBoxLayout(self)
@@ -139,6 +282,12 @@ class ModifierRendezVousDialog(QDialog):
         title.setAlignment(Qt.AlignmentFlag.AlignCenter)
         layout.addWidget(title)
         
+        # Séance d'une série : modifiée seule, détachée de la série
+        if self.rdv_data.get('recurrence_id') and not self.rdv_data.get('id'):
+            serie_label = QLabel("🔁 Séance d'une série : seule cette séance sera modifiée.")
+            serie_label.setStyleSheet("color: #666; font-style: italic;")
+            layout.addWidget(serie_label)
+        
         # Formulaire
         form_layout = QFormLayout()
         
@@ -158,6 +307,18 @@ class ModifierRendezVousDialog(QDialog):
         self.heure_edit.setStyleSheet("QTimeEdit { padding: 5px; }")
         form_layout.addRow("Heure *:", self.heure_edit)
         
+        # Durée et fauteuil : vérification des chevauchements
+        self.duree_spin = QSpinBox()
+        self.duree_spin.setRange(5, 480)
+        self.duree_spin.setSingleStep(5)
+        self.duree_spin.setSuffix(" min")
+        self.duree_spin.setValue(DUREE_RDV_DEFAUT)
+        form_layout.addRow("Durée:", self.duree_spin)
+        
+        self.fauteuil_spin = QSpinBox()
+        self.fauteuil_spin.setRange(1, 9)
+        form_layout.addRow("Fauteuil:", self.fauteuil_spin)
+        
         # Type de rendez-vous
         self.type_combo = QComboBox()
         self.type_combo.addItems(["Contrôle", "Soin", "Urgence", "Consultation", "Détartrage", "Radiographie", "Chirurgie"])
@@ -166,7 +327,7 @@ class ModifierRendezVousDialog(QDialog):
         
         # Statut
         self.statut_combo = QComboBox()
-        self.statut_combo.addItems(["planifie", "termine", "annule", "reporte"])
+        self.statut_combo.addItems(["planifie", "termine", "annule", "absent", "reporte"])
         self.statut_combo.setStyleSheet("QComboBox { padding: 5px; }")
         form_layout.addRow("Statut:", self.statut_combo)
         
@@ -178,6 +339,12 @@ class ModifierRendezVousDialog(QDialog):
         
         layout.addLayout(form_layout)
         
+        self.conflit_label = QLabel("")
+        self.conflit_label.setStyleSheet("color: #dc3545; font-weight: bold;")
+        self.conflit_label.setWordWrap(True)
+        self.conflit_label.setVisible(False)
+        layout.addWidget(self.conflit_label)
+        
         # Note sur les champs obligatoires
         note = QLabel("* Champs obligatoires")
         note.setStyleSheet("color: #666; font-style: italic; margin-top: 10px;")
@@ -185,6 +352,7 @@ class ModifierRendezVousDialog(QDialog):
         
         # Boutons
         button_box = QDialogButtonBox(QDialogButtonBox.StandardButton.Ok | QDialogButtonBox.StandardButton.Cancel)
+        self.btn_valider = button_box.button(QDialogButtonBox.StandardButton.Ok)
         button_box.button(QDialogButtonBox.StandardButton.Ok).setText("Modifier")
         button_box.button(QDialogButtonBox.StandardButton.Cancel).setText("Annuler")
         button_box.accepted.connect(self.valider_et_accepter)
@@ -237,6 +405,10 @@ class ModifierRendezVousDialog(QDialog):
             if index >= 0:
                 self.statut_combo.setCurrentIndex(index)
             
+            # Durée et fauteuil
+            self.duree_spin.setValue(self.rdv_data.get('duree') or DUREE_RDV_DEFAUT)
+            self.fauteuil_spin.setValue(self.rdv_data.get('fauteuil') or 1)
+            
             # Description
             self.description_edit.setPlainText(self.rdv_data.get('description', ''))
             
@@ -258,8 +430,25 @@ class ModifierRendezVousDialog(QDialog):
             QMessageBox.warning(self, "Validation", "Veuillez sélectionner une heure valide")
             return
         
+        if self.verifier_conflits():
+            QMessageBox.warning(self, "Validation", "Ce créneau chevauche un autre rendez-vous du même fauteuil")
+            return
+        
         self.accept()
     
+    def verifier_conflits(self):
+        """Affiche les rendez-vous qui chevauchent le créneau saisi (sauf rendez-vous annulé)"""
+        conflits = []
+        if self.statut_combo.currentText() != 'annule':
+            conflits = db.obtenir_conflits_rendez_vous(
+                self.date_edit.date().toString('yyyy-MM-dd'), self.heure_edit.time().toString('HH:mm'),
+                self.duree_spin.value(), self.fauteuil_spin.value(), self.rdv_data.get('id'),
+                None if self.rdv_data.get('id') else self.rdv_data.get('recurrence_id'))
+        self.conflit_label.setText(texte_conflits(conflits) if conflits else "")
+        self.conflit_label.setVisible(bool(conflits))
+        self.btn_valider.setEnabled(not conflits)
+        return conflits
+    
     def get_rendez_vous_data(self):
         """Retourne les données modifiées du rendez-vous"""
         return {
@@ -267,20 +456,449 @@ class ModifierRendezVousDialog(QDialog):
             'patient_id': self.patient_combo.currentData(),
             'date': self.date_edit.date().toString('yyyy-MM-dd'),
             'heure': self.heure_edit.time().toString('HH:mm'),
+            'duree': self.duree_spin.value(),
+            'fauteuil': self.fauteuil_spin.value(),
             'type': self.type_combo.currentText(),
             'statut': self.statut_combo.currentText(),
             'description': self.description_edit.toPlainText().strip()
         }
 
+class RechercheCreneauDialog(QDialog):
+    """Recherche des prochains créneaux libres (durée, période, horaires, fauteuils)"""
+    
+    def __init__(self, date_debut=None, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Chercher un créneau")
+        self.setModal(True)
+        self.resize(480, 520)
+        
+        self.creneaux = []
+        self.creneau_choisi = None
+        self.setup_ui(date_debut or QDate.currentDate())
+        self.chercher()
+    
+    def setup_ui(self, date_debut):
+        layout = QVBoxLayout(self)
+        
+        title = QLabel("Prochains Créneaux Libres")
+        title.setStyleSheet("font-size: 16px; font-weight: bold; color: #333; margin-bottom: 10px;")
+        title.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        layout.addWidget(title)
+        
+        form_layout = QFormLayout()
+        
+        self.duree_spin = QSpinBox()
+        self.duree_spin.setRange(5, 480)
+        self.duree_spin.setSingleStep(5)
+        self.duree_spin.setSuffix(" min")
+        self.duree_spin.setValue(DUREE_RDV_DEFAUT)
+        form_layout.addRow("Durée:", self.duree_spin)
+        
+        self.date_debut_edit = QDateEdit(date_debut)
+        self.date_debut_edit.setCalendarPopup(True)
+        form_layout.addRow("À partir du:", self.date_debut_edit)
+        
+        self.fenetre_spin = QSpinBox()
+        self.fenetre_spin.setRange(1, 365)
+        self.fenetre_spin.setValue(FENETRE_JOURS)
+        self.fenetre_spin.setSuffix(" jours")
+        form_layout.addRow("Sur:", self.fenetre_spin)
+        
+        horaires_layout = QHBoxLayout()
+        self.ouverture_edit = QTimeEdit(QTime.fromString(HEURE_OUVERTURE, 'HH:mm'))
+        self.fermeture_edit = QTimeEdit(QTime.fromString(HEURE_FERMETURE, 'HH:mm'))
+        horaires_layout.addWidget(self.ouverture_edit)
+        horaires_layout.addWidget(QLabel("à"))
+        horaires_layout.addWidget(self.fermeture_edit)
+        form_layout.addRow("Horaires:", horaires_layout)
+        
+        self.fauteuils_spin = QSpinBox()
+        self.fauteuils_spin.setRange(1, 9)
+        form_layout.addRow("Fauteuils:", self.fauteuils_spin)
+        
+        self.nombre_spin = QSpinBox()
+        self.nombre_spin.setRange(1, 50)
+        self.nombre_spin.setValue(10)
+        form_layout.addRow("Résultats:", self.nombre_spin)
+        
+        layout.addLayout(form_layout)
+        
+        self.btn_chercher = QPushButton("Chercher")
+        self.btn_chercher.clicked.connect(self.chercher)
+        layout.addWidget(self.btn_chercher)
+        
+        self.resultats_table = QTableWidget(0, 4)
+        self.resultats_table.setHorizontalHeaderLabels(["Date", "Libre de", "à", "Fauteuil"])
+        self.resultats_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+        self.resultats_table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
+        self.resultats_table.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
+        self.resultats_table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.resultats_table.doubleClicked.connect(self.reserver)
+        layout.addWidget(self.resultats_table)
+        
+        self.info_label = QLabel("")
+        self.info_label.setStyleSheet("color: #666; font-style: italic;")
+        layout.addWidget(self.info_label)
+        
+        button_box = QDialogButtonBox(QDialogButtonBox.StandardButton.Ok | QDialogButtonBox.StandardButton.Cancel)
+        button_box.button(QDialogButtonBox.StandardButton.Ok).setText("Réserver")
+        button_box.button(QDialogButtonBox.StandardButton.Cancel).setText("Fermer")
+        button_box.accepted.connect(self.reserver)
+        button_box.rejected.connect(self.reject)
+        layout.addWidget(button_box)
+    
+    def chercher(self):
+        """Lance la recherche et affiche les créneaux trouvés"""
+        debut = time.perf_counter()
+        self.creneaux = chercher_creneaux(
+            self.duree_spin.value(),
+            self.date_debut_edit.date().toPython(),
+            self.fenetre_spin.value(),
+            range(1, self.fauteuils_spin.value() + 1),
+            self.ouverture_edit.time().toString('HH:mm'),
+            self.fermeture_edit.time().toString('HH:mm'),
+            self.nombre_spin.value()
+        )
+        duree_ms = (time.perf_counter() - debut) * 1000
+        
+        self.resultats_table.setRowCount(len(self.creneaux))
+        for row, creneau in enumerate(self.creneaux):
+            date = QDate.fromString(creneau['date'], 'yyyy-MM-dd')
+            self.resultats_table.setItem(row, 0, QTableWidgetItem(date.toString('ddd d MMM yyyy')))
+            self.resultats_table.setItem(row, 1, QTableWidgetItem(creneau['debut']))
+            self.resultats_table.setItem(row, 2, QTableWidgetItem(creneau['fin']))
+            self.resultats_table.setItem(row, 3, QTableWidgetItem(str(creneau['fauteuil'])))
+        
+        if self.creneaux:
+            self.resultats_table.selectRow(0)
+            self.info_label.setText(f"{len(self.creneaux)} créneau(x) trouvé(s) en {duree_ms:.0f} ms")
+        else:
+            self.info_label.setText("Aucun créneau libre sur cette période")
+    
+    def reserver(self):
+        """Retient le créneau sélectionné pour créer le rendez-vous"""
+        row = self.resultats_table.currentRow()
+        if row < 0 or row >= len(self.creneaux):
+            QMessageBox.warning(self, "Validation", "Veuillez sélectionner un créneau")
+            return
+        self.creneau_choisi = dict(self.creneaux[row], duree=self.duree_spin.value())
+        self.accept()
+
+
+class RappelsDialog(QDialog):
+    """Génère les rappels des prochains rendez-vous dans la boîte d'envoi"""
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Rappels de rendez-vous")
+        self.setModal(True)
+        self.resize(520, 480)
+        
+        self.rappels = []
+        self.setup_ui()
+        self.actualiser()
+    
+    def setup_ui(self):
+        layout = QVBoxLayout(self)
+        
+        title = QLabel("Rappels de Rendez-vous")
+        title.setStyleSheet("font-size: 16px; font-weight: bold; color: #333; margin-bottom: 10px;")
+        title.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        layout.addWidget(title)
+        
+        form_layout = QFormLayout()
+        
+        self.decalage_spin = QSpinBox()
+        self.decalage_spin.setRange(0, 30)
+        self.decalage_spin.setValue(DECALAGE_JOURS)
+        self.decalage_spin.setPrefix("dans ")
+        self.decalage_spin.setSuffix(" jour(s)")
+        form_layout.addRow("À partir de:", self.decalage_spin)
+        
+        self.fenetre_spin = QSpinBox()
+        self.fenetre_spin.setRange(1, 31)
+        self.fenetre_spin.setValue(FENETRE_RAPPELS)
+        self.fenetre_spin.setSuffix(" jour(s)")
+        form_layout.addRow("Sur:", self.fenetre_spin)
+        
+        self.format_combo = QComboBox()
+        self.format_combo.addItems([f.upper() for f in FORMATS_ENVOI])
+        form_layout.addRow("Format:", self.format_combo)
+        
+        self.modele_edit = QTextEdit()
+        self.modele_edit.setPlainText(MODELE_RAPPEL)
+        self.modele_edit.setMaximumHeight(80)
+        self.modele_edit.setToolTip("Champs : $prenom $nom $date $heure $type")
+        form_layout.addRow("Message:", self.modele_edit)
+        
+        layout.addLayout(form_layout)
+        
+        self.apercu_label = QLabel("")
+        self.apercu_label.setWordWrap(True)
+        self.apercu_label.setStyleSheet("background-color: #f5f5f5; padding: 8px; border-radius: 5px;")
+        layout.addWidget(self.apercu_label)
+        
+        self.info_label = QLabel("")
+        self.info_label.setWordWrap(True)
+        self.info_label.setStyleSheet("color: #666; font-style: italic;")
+        layout.addWidget(self.info_label)
+        layout.addStretch()
+        
+        button_box = QDialogButtonBox(QDialogButtonBox.StandardButton.Ok | QDialogButtonBox.StandardButton.Cancel)
+        self.btn_generer = button_box.button(QDialogButtonBox.StandardButton.Ok)
+        self.btn_generer.setText("Générer")
+        button_box.button(QDialogButtonBox.StandardButton.Cancel).setText("Fermer")
+        button_box.accepted.connect(self.generer)
+        button_box.rejected.connect(self.reject)
+        layout.addWidget(button_box)
+        
+        self.decalage_spin.valueChanged.connect(self.actualiser)
+        self.fenetre_spin.valueChanged.connect(self.actualiser)
+        self.modele_edit.textChanged.connect(self.actualiser_apercu)
+    
+    def periode(self):
+        return periode_rappels(decalage=self.decalage_spin.value(), fenetre=self.fenetre_spin.value())
+    
+    def actualiser(self):
+        """Compte les rappels restant à écrire pour la période"""
+        self.rappels = db.obtenir_rappels_a_envoyer(*self.periode())
+        sans_telephone = sum(1 for rdv in self.rappels if not (rdv['telephone'] or "").strip())
+        
+        texte = f"{len(self.rappels) - sans_telephone} rappel(s) à écrire"
+        if sans_telephone:
+            texte += f", {sans_telephone} patient(s) sans téléphone"
+        self.info_label.setText(texte)
+        self.btn_generer.setEnabled(len(self.rappels) > sans_telephone)
+        self.actualiser_apercu()
+    
+    def actualiser_apercu(self):
+        """Aperçu du message pour le premier rendez-vous de la période"""
+        if self.rappels:
+            self.apercu_label.setText(rediger_message(self.rappels[0], self.modele_edit.toPlainText()))
+        else:
+            self.apercu_label.setText("Aucun nouveau rappel pour cette période")
+    
+    def generer(self):
+        """Écrit les rappels dans la boîte d'envoi"""
+        try:
+            resultat = generer_rappels(*self.periode(), self.modele_edit.toPlainText(),
+                                       self.format_combo.currentText().lower())
+        except Exception as e:
+            QMessageBox.critical(self, "Erreur", f"Erreur lors de la génération des rappels: {e}")
+            return
+        
+        message = f"{resultat['envoyes']} rappel(s) écrit(s) dans :\n{resultat['fichier']}"
+        if resultat['sans_telephone']:
+            message += "\n\nSans téléphone : " + ", ".join(resultat['sans_telephone'])
+        QMessageBox.information(self, "Rappels", message)
+        self.actualiser()
+
+
+def texte_risque(rdv, scores):
+    """Risque d'absence affiché pour un rendez-vous encore planifié (⚠ au-delà du seuil)"""
+    if scores is None or (rdv.get('statut') or 'planifie') != 'planifie':
+        return ''
+    risque = scores.risque(rdv)
+    if risque is None:
+        return ''
+    texte = f"{risque * 100:.0f} %"
+    return f"⚠ {texte}" if risque >= SEUIL_RISQUE else texte
+
+
+def ligne_rendez_vous(rdv, scores=None):
+    """Ligne compacte du planning du jour pour un rendez-vous"""
+    if rdv.get('nom') and rdv.get('prenom'):
+        patient_nom = f"{rdv['nom']}, {rdv['prenom']}"
+    else:
+        patient_nom = rdv.get('patient_nom', 'Patient inconnu')
+    
+    # Type (🔁 : séance d'une série)
+    type_rdv = rdv.get('type_rdv') or ''
+    if rdv.get('recurrence_id'):
+        type_rdv = f"🔁 {type_rdv}"
+    
+    return LigneRendezVous(rdv.get('heure_rdv') or '', patient_nom, type_rdv,
+                           rdv.get('description') or '', rdv.get('statut') or 'planifie',
+                           texte_risque(rdv, scores), rdv)
+
+
+class ModeleRendezVous(QAbstractTableModel):
+    """Modèle du planning du jour : une ligne compacte par rendez-vous, triée par heure"""
+    COLONNES = ["Heure", "Patient", "Type", "Description", "Statut", "Risque"]
+    COLONNE_STATUT = 4
+    COLONNE_RISQUE = 5
+    
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.lignes = []
+        self.scores = None
+    
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.lignes)
+    
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.COLONNES)
+    
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        if role == Qt.ItemDataRole.DisplayRole:
+            return self.lignes[index.row()][index.column()]
+        if role == Qt.ItemDataRole.UserRole:
+            return self.lignes[index.row()].rdv
+        return None
+    
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if orientation == Qt.Orientation.Horizontal and role == Qt.ItemDataRole.DisplayRole:
+            return self.COLONNES[section]
+        return None
+    
+    def definir(self, rendez_vous, scores=None):
+        """Remplace toutes les lignes (rendez-vous déjà triés par heure, scores lus en une fois)"""
+        self.beginResetModel()
+        self.scores = scores
+        self.lignes = [ligne_rendez_vous(rdv, scores) for rdv in rendez_vous]
+        self.endResetModel()
+    
+    def definir_scores(self, scores):
+        """Remplace les risques d'absence sans reconstruire les lignes (seule la colonne Risque est repeinte)"""
+        self.scores = scores
+        if not self.lignes:
+            return
+        self.lignes = [ligne._replace(risque=texte_risque(ligne.rdv, scores)) for ligne in self.lignes]
+        self.dataChanged.emit(self.index(0, self.COLONNE_RISQUE),
+                              self.index(len(self.lignes) - 1, self.COLONNE_RISQUE))
+    
+    def rendez_vous(self, row):
+        """Rendez-vous complet d'une ligne (None hors du tableau)"""
+        return self.lignes[row].rdv if 0 <= row < len(self.lignes) else None
+    
+    def retirer(self, concerne):
+        """Retire les lignes dont le rendez-vous vérifie concerne(rdv)"""
+        for row in reversed(range(len(self.lignes))):
+            if concerne(self.lignes[row].rdv):
+                self.beginRemoveRows(QModelIndex(), row, row)
+                del self.lignes[row]
+                self.endRemoveRows()
+    
+    def inserer(self, rdv):
+        """Insère un rendez-vous à sa place dans l'ordre des heures"""
+        ligne = ligne_rendez_vous(rdv, self.scores)
+        row = bisect_right([l.heure for l in self.lignes], ligne.heure)
+        self.beginInsertRows(QModelIndex(), row, row)
+        self.lignes.insert(row, ligne)
+        self.endInsertRows()
+
+
+class DelegueStatut(QStyledItemDelegate):
+    """Peint le fond de la colonne Statut selon le statut, sans élément par case"""
+    
+    def paint(self, painter, option, index):
+        if not option.state & QStyle.StateFlag.State_Selected:
+            statut = index.data(Qt.ItemDataRole.DisplayRole)
+            painter.fillRect(option.rect, COULEURS_STATUT.get(statut, COULEUR_STATUT_DEFAUT))
+        super().paint(painter, option, index)
+
+
+class GrillePeriode(QTableWidget):
+    """Vue semaine ou mois : une case par jour avec ses rendez-vous"""
+    jour_choisi = Signal(QDate)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.debut, self.nombre_jours, self.mois = None, 0, None
+        self.setColumnCount(7)
+        self.setHorizontalHeaderLabels(["Lundi", "Mardi", "Mercredi", "Jeudi", "Vendredi", "Samedi", "Dimanche"])
+        self.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+        self.verticalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+        self.verticalHeader().setVisible(False)
+        self.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
+        self.setWordWrap(True)
+        self.setStyleSheet("""
+            QTableWidget {
+                border: 1px solid #D0D0D0;
+                background-color: white;
+                gridline-color: #E0E0E0;
+            }
+            QHeaderView::section {
+                background-color: #F0F0F0;
+                padding: 8px;
+                border: 1px solid #D0D0D0;
+                font-weight: bold;
+            }
+        """)
+        self.cellDoubleClicked.connect(self.case_double_cliquee)
+
+    def afficher(self, debut, nombre_jours, rendez_vous, mois=None):
+        """
+        Affiche nombre_jours jours à partir de debut (un lundi)
+
+        Args:
+            rendez_vous (list): Rendez-vous de la période, triés par date et heure
+            mois (int): Mois affiché (vue mois) : les jours hors du mois sont grisés
+        """
+        par_jour = {}
+        for rdv in rendez_vous:
+            par_jour.setdefault(rdv['date_rdv'], []).append(rdv)
+
+        self.debut, self.nombre_jours, self.mois = debut, nombre_jours, mois
+        self.clearContents()
+        self.setRowCount(nombre_jours // 7)
+        for i in range(nombre_jours):
+            date = debut.addDays(i)
+            self.afficher_jour(date, par_jour.get(date.toString('yyyy-MM-dd'), []))
+
+    def afficher_jour(self, date, rdvs):
+        """Remplit la case d'un jour (ignoré si le jour n'est pas affiché)"""
+        i = self.debut.daysTo(date) if self.debut is not None else -1
+        if not 0 <= i < self.nombre_jours:
+            return
+
+        lignes = [date.toString('d MMM')]
+        visibles = rdvs if self.mois is None else rdvs[:RDV_PAR_CASE_MOIS]
+        for rdv in visibles:
+            ligne = f"{rdv.get('heure_rdv', '')}  {rdv.get('patient_nom', '')}"
+            if rdv.get('recurrence_id'):
+                ligne = "🔁 " + ligne
+            if self.mois is None and rdv.get('type_rdv'):
+                ligne += f" ({rdv['type_rdv']})"
+            lignes.append(ligne)
+        if len(rdvs) > len(visibles):
+            lignes.append(f"+ {len(rdvs) - len(visibles)} autre(s)")
+
+        item = QTableWidgetItem("\n".join(lignes))
+        item.setTextAlignment(Qt.AlignmentFlag.AlignTop | Qt.AlignmentFlag.AlignLeft)
+        item.setData(Qt.ItemDataRole.UserRole, date)
+        if date == QDate.currentDate():
+            item.setBackground(QColor("#E3F2FD"))
+        elif self.mois is not None and date.month() != self.mois:
+            item.setForeground(QColor("#A0A0A0"))
+        self.setItem(i // 7, i % 7, item)
+
+    def case_double_cliquee(self, ligne, colonne):
+        item = self.item(ligne, colonne)
+        if item:
+            self.jour_choisi.emit(item.data(Qt.ItemDataRole.UserRole))
+
+
 class AgendaView(QWidget):
     def __init__(self):
         super().__init__()
         self.date_courante = QDate.currentDate()
+        self.mode = "Jour"
+        # Rendez-vous par plage : (debut, fin, patient_id ou None) -> liste, du plus ancien au plus récent
+        self.cache_plages = OrderedDict()
+        self.lecture_plages = {}  # Même clé -> instant de la lecture (time.monotonic)
+        self.relire_au_retour = False
         self.setup_ui()
         self.charger_rendez_vous()
+        self.charger_prochains_rendez_vous()
         
         # Connecter au contexte global pour les changements de patient
         context.patient_changed.connect(self.on_patient_changed)
+        # Écritures de la base (cette vue ou une autre) appliquées ligne par ligne
+        context.donnees_modifiees.connect(self.appliquer_changement)
     
     def setup_ui(self):
         # Layout principal horizontal
@@ -298,9 +916,9 @@ class AgendaView(QWidget):
         # Titre et navigation de date
         title_layout = QHBoxLayout()
         
-        # Bouton jour précédent
+        # Bouton période précédente
         self.prev_day_btn = QPushButton("◀ Jour Précédent")
-        self.prev_day_btn.clicked.connect(self.jour_precedent)
+        self.prev_day_btn.clicked.connect(self.periode_precedente)
         title_layout.addWidget(self.prev_day_btn)
         
         # Titre avec date courante
@@ -308,11 +926,17 @@ class AgendaView(QWidget):
         self.btn_aujourd_hui.clicked.connect(self.aller_aujourd_hui)
         title_layout.addWidget(self.btn_aujourd_hui)
         
-        # Bouton jour suivant
+        # Bouton période suivante
         self.next_day_btn = QPushButton("Jour Suivant ▶")
-        self.next_day_btn.clicked.connect(self.jour_suivant)
+        self.next_day_btn.clicked.connect(self.periode_suivante)
         title_layout.addWidget(self.next_day_btn)
         
+        # Vue jour / semaine / mois
+        self.mode_combo = QComboBox()
+        self.mode_combo.addItems(MODES_AGENDA)
+        self.mode_combo.currentTextChanged.connect(self.changer_mode)
+        title_layout.addWidget(self.mode_combo)
+        
         left_layout.addLayout(title_layout)
         
         # Calendrier
@@ -374,6 +998,25 @@ class AgendaView(QWidget):
         self.nouveau_rdv_btn.clicked.connect(self.nouveau_rendez_vous)
         left_layout.addWidget(self.nouveau_rdv_btn)
         
+        # Recherche des prochains créneaux libres
+        self.chercher_creneau_btn = QPushButton("🔍 Chercher un créneau")
+        self.chercher_creneau_btn.clicked.connect(self.chercher_creneau)
+        left_layout.addWidget(self.chercher_creneau_btn)
+        
+        # Rappels des prochains rendez-vous
+        self.rappels_btn = QPushButton("📨 Rappels")
+        self.rappels_btn.clicked.connect(self.ouvrir_rappels)
+        left_layout.addWidget(self.rappels_btn)
+        
+        # Prochains rendez-vous du patient sélectionné
+        self.prochains_group = QGroupBox("Prochains rendez-vous")
+        prochains_layout = QVBoxLayout(self.prochains_group)
+        self.prochains_list = QListWidget()
+        self.prochains_list.setMaximumHeight(130)
+        self.prochains_list.itemDoubleClicked.connect(self.ouvrir_prochain_rendez_vous)
+        prochains_layout.addWidget(self.prochains_list)
+        left_layout.addWidget(self.prochains_group)
+        
         # Liste des patients
         patients_group = self.create_patients_list_section()
         left_layout.addWidget(patients_group)
@@ -383,14 +1026,25 @@ class AgendaView(QWidget):
         right_layout = QVBoxLayout(right_widget)
         
         # Titre du planning
-        planning_title = QLabel("Planning du Jour")
-        planning_title.setStyleSheet("font-size: 16px; font-weight: bold; color: #333; margin-bottom: 10px;")
-        right_layout.addWidget(planning_title)
+        self.planning_title = QLabel("Planning du Jour")
+        self.planning_title.setStyleSheet("font-size: 16px; font-weight: bold; color: #333; margin-bottom: 10px;")
+        right_layout.addWidget(self.planning_title)
+        
+        # Planning : tableau du jour ou grille semaine / mois
+        self.planning_stack = QStackedWidget()
+        right_layout.addWidget(self.planning_stack)
+        
+        # Tableau des rendez-vous : modèle + délégué (aucun élément créé par case)
+        self.modele_rdv = ModeleRendezVous(self)
+        self.rdv_table = QTableView()
+        self.rdv_table.setModel(self.modele_rdv)
+        self.delegue_statut = DelegueStatut(self.rdv_table)
+        self.rdv_table.setItemDelegateForColumn(ModeleRendezVous.COLONNE_STATUT, self.delegue_statut)
         
-        # Tableau des rendez-vous
-        self.rdv_table = QTableWidget()
-        self.rdv_table.setColumnCount(5)
-        self.rdv_table.setHorizontalHeaderLabels(["Heure", "Patient", "Type", "Description", "Statut"])
+        # Lignes de hauteur fixe : pas de mesure du contenu à chaque affichage
+        self.rdv_table.verticalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+        self.rdv_table.verticalHeader().setDefaultSectionSize(36)
+        self.rdv_table.setWordWrap(False)
         
         # Configuration du tableau
         header = self.rdv_table.horizontalHeader()
@@ -399,24 +1053,26 @@ class AgendaView(QWidget):
         header.setSectionResizeMode(2, QHeaderView.ResizeMode.Fixed)  # Type
         header.setSectionResizeMode(3, QHeaderView.ResizeMode.Stretch)  # Description
         header.setSectionResizeMode(4, QHeaderView.ResizeMode.Fixed)  # Statut
+        header.setSectionResizeMode(5, QHeaderView.ResizeMode.Fixed)  # Risque d'absence
         
         # Largeurs fixes pour certaines colonnes
         self.rdv_table.setColumnWidth(0, 80)   # Heure - plus petite
         self.rdv_table.setColumnWidth(2, 100)  # Type
         self.rdv_table.setColumnWidth(4, 100)  # Statut
+        self.rdv_table.setColumnWidth(5, 80)   # Risque
         
         self.rdv_table.setStyleSheet("""
-            QTableWidget {
+            QTableView {
                 border: 1px solid #D0D0D0;
                 background-color: white;
                 gridline-color: #E0E0E0;
                 border-radius: 3px;
             }
-            QTableWidget::item {
+            QTableView::item {
                 padding: 8px;
                 border-bottom: 1px solid #E0E0E0;
             }
-            QTableWidget::item:selected {
+            QTableView::item:selected {
                 background-color: #C0D0E0;
                 color: black;
             }
@@ -428,8 +1084,13 @@ class AgendaView(QWidget):
             }
         """)
         
-        self.rdv_table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
-        right_layout.addWidget(self.rdv_table)
+        self.rdv_table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.rdv_table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.planning_stack.addWidget(self.rdv_table)
+        
+        self.grille_periode = GrillePeriode()
+        self.grille_periode.jour_choisi.connect(self.ouvrir_jour)
+        self.planning_stack.addWidget(self.grille_periode)
         
         # Boutons d'action
         actions_layout = QHBoxLayout()
@@ -480,7 +1141,8 @@ class AgendaView(QWidget):
         right_layout.addLayout(actions_layout)
         
         # Connecter la sélection du tableau
-        self.rdv_table.itemSelectionChanged.connect(self.on_selection_changed)
+        self.rdv_table.selectionModel().selectionChanged.connect(self.on_selection_changed)
+        self.modele_rdv.modelReset.connect(self.on_selection_changed)
         
         # Ajouter les widgets au splitter
         splitter.addWidget(left_widget)
@@ -576,23 +1238,190 @@ class AgendaView(QWidget):
         # Note: titre supprimé de l'interface mais méthode gardée pour compatibilité
         pass
     
-    def jour_precedent(self):
-        """Navigue vers le jour précédent"""
-        self.date_courante = self.date_courante.addDays(-1)
+    def decaler(self, date, sens):
+        """Date d'une période avant (sens=-1) ou après (sens=1) selon le mode"""
+        if self.mode == "Mois":
+            return date.addMonths(sens)
+        if self.mode == "Semaine":
+            return date.addDays(7 * sens)
+        return date.addDays(sens)
+    
+    def plage_visible(self, date):
+        """
+        Plage de dates chargée pour afficher la date dans le mode courant
+        
+        Le mode jour charge la semaine entière : passer d'un jour à l'autre de la
+        semaine ne relit pas la base.
+        
+        Returns:
+            tuple: (premier jour (lundi), nombre de jours)
+        """
+        if self.mode == "Mois":
+            premier = QDate(date.year(), date.month(), 1)
+            return premier.addDays(1 - premier.dayOfWeek()), 42
+        return date.addDays(1 - date.dayOfWeek()), 7
+    
+    def rendez_vous_plage(self, debut, nombre_jours):
+        """
+        Rendez-vous d'une plage, lus en une requête puis gardés en cache
+        
+        Quand un patient est sélectionné, le filtre est fait par SQL (index patient,
+        date) et la plage filtrée a sa propre entrée dans le cache.
+        """
+        cle = (debut.toString('yyyy-MM-dd'), debut.addDays(nombre_jours - 1).toString('yyyy-MM-dd'),
+               context.selected_patient_id or None)
+        rendez_vous = self.cache_plages.get(cle)
+        if rendez_vous is None or time.monotonic() - self.lecture_plages[cle] > DUREE_CACHE_PLAGES:
+            rendez_vous = db.obtenir_rendez_vous_range(*cle)
+            self.cache_plages[cle] = rendez_vous
+            self.lecture_plages[cle] = time.monotonic()
+            self.cache_plages.move_to_end(cle)
+            while len(self.cache_plages) > TAILLE_CACHE_PLAGES:
+                ancienne, _ = self.cache_plages.popitem(last=False)
+                del self.lecture_plages[ancienne]
+        else:
+            self.cache_plages.move_to_end(cle)
+        return rendez_vous
+    
+    def vider_cache_plages(self):
+        """Oublie toutes les plages : la prochaine lecture voit aussi les écritures des autres postes"""
+        self.cache_plages.clear()
+        self.lecture_plages.clear()
+    
+    def hideEvent(self, event):
+        """Agenda masqué (autre vue) : les plages seront relues au retour"""
+        super().hideEvent(event)
+        if not event.spontaneous():
+            self.relire_au_retour = True
+    
+    def showEvent(self, event):
+        """Relit la période affichée quand l'agenda redevient visible"""
+        super().showEvent(event)
+        if not event.spontaneous() and self.relire_au_retour:
+            self.relire_au_retour = False
+            self.vider_cache_plages()
+            self.charger_rendez_vous()
+    
+    def prechauffer_plages_voisines(self):
+        """Charge à l'avance les plages précédente et suivante (navigation instantanée)"""
+        for sens in (-1, 1):
+            if self.mode == "Mois":
+                date = self.date_courante.addMonths(sens)
+            else:
+                date = self.date_courante.addDays(7 * sens)
+            self.rendez_vous_plage(*self.plage_visible(date))
+    
+    def appliquer_changement(self, table, operation, identifiant):
+        """
+        Répercute une écriture de la base sans recharger la période affichée
+        
+        Les plages en cache sont corrigées sur place (une lecture du rendez-vous
+        ou des occurrences de la série concernée), puis seules les lignes du
+        tableau ou les cases de la grille touchées sont mises à jour.
+        """
+        if table == 'rendez_vous':
+            def concerne(rdv):
+                return rdv.get('id') == identifiant
+        elif table == 'rendez_vous_recurrents':
+            def concerne(rdv):
+                return rdv.get('recurrence_id') == identifiant and not rdv.get('id')
+        else:
+            return
+        
+        self.charger_prochains_rendez_vous()
+        if not self.cache_plages:
+            return
+        debut_cache = min(debut for debut, fin, patient_id in self.cache_plages)
+        fin_cache = max(fin for debut, fin, patient_id in self.cache_plages)
+        
+        # Nouvel état de la ligne ou de la série, lu une seule fois pour toutes les plages
+        ajoutes = []
+        if operation != 'suppression':
+            if table == 'rendez_vous':
+                rdv = db.obtenir_rendez_vous(identifiant)
+                ajoutes = [rdv] if rdv and debut_cache <= rdv['date_rdv'] <= fin_cache else []
+            else:
+                ajoutes = db.obtenir_occurrences_serie(identifiant, debut_cache, fin_cache)
+        
+        dates_touchees = {rdv['date_rdv'] for rdv in ajoutes}
+        for (debut, fin, patient_id), rendez_vous in self.cache_plages.items():
+            restants = [rdv for rdv in rendez_vous if not concerne(rdv)]
+            dates_touchees.update(rdv['date_rdv'] for rdv in rendez_vous if concerne(rdv))
+            nouveaux = [rdv for rdv in ajoutes if debut <= rdv['date_rdv'] <= fin
+                        and patient_id in (None, rdv['patient_id'])]
+            if nouveaux or len(restants) != len(rendez_vous):
+                rendez_vous[:] = sorted(restants + nouveaux, key=lambda rdv: (rdv['date_rdv'], rdv['heure_rdv']))
+        
+        if self.mode == "Jour":
+            self.appliquer_au_tableau(concerne, ajoutes)
+        else:
+            debut, nombre_jours = self.plage_visible(self.date_courante)
+            rendez_vous = self.rendez_vous_plage(debut, nombre_jours)
+            for date_str in dates_touchees:
+                self.grille_periode.afficher_jour(QDate.fromString(date_str, 'yyyy-MM-dd'),
+                                                  [rdv for rdv in rendez_vous if rdv['date_rdv'] == date_str])
+    
+    def appliquer_au_tableau(self, concerne, ajoutes):
+        """Retire du tableau du jour les lignes concernées et insère les nouvelles à leur heure"""
+        self.modele_rdv.retirer(concerne)
+        
+        date_str = self.date_courante.toString('yyyy-MM-dd')
+        patient_id = context.selected_patient_id
+        for rdv in ajoutes:
+            if rdv['date_rdv'] == date_str and patient_id in (None, 0, rdv['patient_id']):
+                self.modele_rdv.inserer(rdv)
+        
+        # Un statut changé modifie les cumuls du patient, du jour, de l'heure et du type :
+        # risques de la journée relus en une requête
+        rendez_vous = [ligne.rdv for ligne in self.modele_rdv.lignes]
+        self.modele_rdv.definir_scores(ScoresAbsence.pour(rendez_vous))
+    
+    def changer_mode(self, mode):
+        """Passe en vue jour, semaine ou mois"""
+        self.mode = mode
+        libelles = {
+            "Jour": ("◀ Jour Précédent", "Jour Suivant ▶", "Planning du Jour"),
+            "Semaine": ("◀ Semaine Précédente", "Semaine Suivante ▶", "Planning de la Semaine"),
+            "Mois": ("◀ Mois Précédent", "Mois Suivant ▶", "Planning du Mois")
+        }
+        precedent, suivant, titre = libelles[mode]
+        self.prev_day_btn.setText(precedent)
+        self.next_day_btn.setText(suivant)
+        self.planning_title.setText(titre)
+        self.planning_stack.setCurrentWidget(self.rdv_table if mode == "Jour" else self.grille_periode)
+        self.rdv_table.clearSelection()
+        self.on_selection_changed()
+        self.charger_rendez_vous()
+    
+    def ouvrir_jour(self, date):
+        """Affiche le planning du jour double-cliqué dans la grille"""
+        self.date_courante = date
+        self.calendar.setSelectedDate(date)
+        if self.mode_combo.currentText() == "Jour":
+            # Pas de changement de mode, donc pas de signal : recharger ici
+            self.mettre_a_jour_titre()
+            self.charger_rendez_vous()
+        else:
+            self.mode_combo.setCurrentText("Jour")
+    
+    def periode_precedente(self):
+        """Navigue vers le jour, la semaine ou le mois précédent"""
+        self.date_courante = self.decaler(self.date_courante, -1)
         self.calendar.setSelectedDate(self.date_courante)
         self.mettre_a_jour_titre()
         self.charger_rendez_vous()
 
     def aller_aujourd_hui(self):
-        """Retourne à la date d'aujourd'hui"""
+        """Retourne à la date d'aujourd'hui (plages relues)"""
+        self.vider_cache_plages()
         self.date_courante = QDate.currentDate()
         self.calendar.setSelectedDate(self.date_courante)
         self.mettre_a_jour_titre()
         self.charger_rendez_vous()
     
-    def jour_suivant(self):
-        """Navigue vers le jour suivant"""
-        self.date_courante = self.date_courante.addDays(1)
+    def periode_suivante(self):
+        """Navigue vers le jour, la semaine ou le mois suivant"""
+        self.date_courante = self.decaler(self.date_courante, 1)
         self.calendar.setSelectedDate(self.date_courante)
         self.mettre_a_jour_titre()
         self.charger_rendez_vous()
@@ -604,65 +1433,26 @@ class AgendaView(QWidget):
         self.charger_rendez_vous()
     
     def charger_rendez_vous(self):
-        """Charge les rendez-vous du jour sélectionné - VERSION CORRIGÉE"""
+        """Charge les rendez-vous du jour, de la semaine ou du mois sélectionné"""
         try:
-            date_str = self.date_courante.toString('yyyy-MM-dd')
-            #print(f"🔍 Chargement des RDV pour la date: {date_str}")  # Debug
+            # Récupérer les rendez-vous de la plage visible (cache ou une requête)
+            debut, nombre_jours = self.plage_visible(self.date_courante)
+            # (seulement ceux du patient sélectionné, filtrés par la requête)
+            rendez_vous = self.rendez_vous_plage(debut, nombre_jours)
             
-            # Récupérer les rendez-vous de la date
-            rendez_vous = db.obtenir_rendez_vous_date(date_str)
-            #print(f"🔍 Nombre de RDV trouvés: {len(rendez_vous)}")  # Debug
+            # Plages voisines chargées une fois l'affichage terminé
+            QTimer.singleShot(0, self.prechauffer_plages_voisines)
             
-            # Filtrer par patient si un patient est sélectionné
-            if context.selected_patient_id:
-                rendez_vous_filtres = [rdv for rdv in rendez_vous if rdv.get('patient_id') == context.selected_patient_id]
-                #print(f"🔍 RDV filtrés pour patient {context.selected_patient_id}: {len(rendez_vous_filtres)}")
-                rendez_vous = rendez_vous_filtres
+            if self.mode != "Jour":
+                mois = self.date_courante.month() if self.mode == "Mois" else None
+                self.grille_periode.afficher(debut, nombre_jours, rendez_vous, mois)
+                return
             
-            # Vider le tableau et définir le nombre de lignes
-            self.rdv_table.setRowCount(len(rendez_vous))
+            date_str = self.date_courante.toString('yyyy-MM-dd')
+            rendez_vous = [rdv for rdv in rendez_vous if rdv.get('date_rdv') == date_str]
             
-            # Remplir le tableau avec les données
-            for row, rdv in enumerate(rendez_vous):
-                #print(f"🔍 RDV {row}: {rdv}")  # Debug
-                
-                # Heure
-                heure_item = QTableWidgetItem(rdv.get('heure_rdv', ''))
-                self.rdv_table.setItem(row, 0, heure_item)
-                
-                # Patient - Construire le nom complet
-                if rdv.get('nom') and rdv.get('prenom'):
-                    patient_nom = f"{rdv.get('nom')}, {rdv.get('prenom')}"
-                else:
-                    patient_nom = rdv.get('patient_nom', 'Patient inconnu')
-                
-                patient_item = QTableWidgetItem(patient_nom)
-                self.rdv_table.setItem(row, 1, patient_item)
-                
-                # Type
-                type_item = QTableWidgetItem(rdv.get('type_rdv', ''))
-                self.rdv_table.setItem(row, 2, type_item)
-                
-                # Description
-                desc_item = QTableWidgetItem(rdv.get('description', ''))
-                self.rdv_table.setItem(row, 3, desc_item)
-                
-                # Statut avec couleur
-                statut = rdv.get('statut', 'planifie')
-                statut_item = QTableWidgetItem(statut)
-                
-                # Couleur selon le statut
-                if statut == 'termine':
-                    statut_item.setBackground(Qt.GlobalColor.green)
-                elif statut == 'annule':
-                    statut_item.setBackground(Qt.GlobalColor.red)
-                else:
-                    statut_item.setBackground(Qt.GlobalColor.yellow)
-                
-                self.rdv_table.setItem(row, 4, statut_item)
-                
-                # Stocker l'ID du rendez-vous et toutes les données pour les actions
-                heure_item.setData(Qt.ItemDataRole.UserRole, rdv)
+            # Remplacer les lignes du modèle (risques d'absence lus en une requête)
+            self.modele_rdv.definir(rendez_vous, ScoresAbsence.pour(rendez_vous))
             
             #print(f"✅ Tableau mis à jour avec {len(rendez_vous)} rendez-vous")  # Debug
                 
@@ -671,26 +1461,60 @@ class AgendaView(QWidget):
             import traceback
             traceback.print_exc()
             # En cas d'erreur, vider le tableau
-            self.rdv_table.setRowCount(0)
+            self.modele_rdv.definir([])
     
     def nouveau_rendez_vous(self):
         """Ouvre le dialogue pour ajouter un nouveau rendez-vous"""
-        dialog = AjouterRendezVousDialog(self.date_courante, self)
+        self.enregistrer_nouveau_rendez_vous(AjouterRendezVousDialog(self.date_courante, self))
+    
+    def chercher_creneau(self):
+        """Cherche les prochains créneaux libres et réserve celui choisi"""
+        dialog = RechercheCreneauDialog(max(self.date_courante, QDate.currentDate()), self)
+        if dialog.exec() == QDialog.DialogCode.Accepted and dialog.creneau_choisi:
+            creneau = dialog.creneau_choisi
+            date = QDate.fromString(creneau['date'], 'yyyy-MM-dd')
+            self.enregistrer_nouveau_rendez_vous(AjouterRendezVousDialog(date, self, creneau))
+    
+    def ouvrir_rappels(self):
+        """Ouvre la génération des rappels de rendez-vous"""
+        RappelsDialog(self).exec()
+    
+    def enregistrer_nouveau_rendez_vous(self, dialog):
+        """Enregistre le rendez-vous saisi dans le dialogue d'ajout"""
         if dialog.exec() == QDialog.DialogCode.Accepted:
             data = dialog.get_rendez_vous_data()
             
             try:
-                rdv_id = db.ajouter_rendez_vous(
-                    data['patient_id'],
-                    data['date'],
-                    data['heure'],
-                    data['type'],
-                    data['description']
-                )
+                regle = data['recurrence']
+                if regle:
+                    rdv_id, date_conflit = db.ajouter_rendez_vous_recurrent(
+                        data['patient_id'], regle['date_debut'], data['heure'], data['type'],
+                        data['description'], data['duree'], data['fauteuil'],
+                        regle['frequence'], regle['intervalle'], regle['date_fin']
+                    )
+                    if date_conflit:
+                        jour = QDate.fromString(date_conflit, 'yyyy-MM-dd').toString('ddd d MMM yyyy')
+                        QMessageBox.warning(self, "Erreur",
+                                            f"La séance du {jour} chevauche un rendez-vous existant sur ce fauteuil")
+                        return
+                    if not rdv_id:
+                        QMessageBox.warning(self, "Erreur", "Erreur lors de l'ajout de la série")
+                        return
+                else:
+                    rdv_id = db.ajouter_rendez_vous(
+                        data['patient_id'],
+                        data['date'],
+                        data['heure'],
+                        data['type'],
+                        data['description'],
+                        data['duree'],
+                        data['fauteuil']
+                    )
                 
                 if rdv_id:
                     QMessageBox.information(self, "Succès", "Rendez-vous ajouté avec succès!")
-                    self.charger_rendez_vous()
+                elif db.obtenir_conflits_rendez_vous(data['date'], data['heure'], data['duree'], data['fauteuil']):
+                    QMessageBox.warning(self, "Erreur", "Ce créneau vient d'être réservé sur ce fauteuil")
                 else:
                     QMessageBox.warning(self, "Erreur", "Erreur lors de l'ajout du rendez-vous")
                     
@@ -699,24 +1523,37 @@ class AgendaView(QWidget):
     
     def on_selection_changed(self):
         """Gère le changement de sélection dans le tableau"""
-        has_selection = len(self.rdv_table.selectedItems()) > 0
+        has_selection = self.rdv_table.selectionModel().hasSelection()
         self.modifier_btn.setEnabled(has_selection)
         self.supprimer_btn.setEnabled(has_selection)
     
     def modifier_rendez_vous(self):
         """Modifie le rendez-vous sélectionné"""
-        current_row = self.rdv_table.currentRow()
+        current_row = self.rdv_table.currentIndex().row()
         if current_row >= 0:
-            rdv_id_item = self.rdv_table.item(current_row, 0)
-            if rdv_id_item:
-                rdv_data = rdv_id_item.data(Qt.ItemDataRole.UserRole)
-                
-                if rdv_data:
-                    dialog = ModifierRendezVousDialog(rdv_data, self)
-                    if dialog.exec() == QDialog.DialogCode.Accepted:
-                        modified_data = dialog.get_rendez_vous_data()
-                        
-                        try:
+            rdv_data = self.modele_rdv.rendez_vous(current_row)
+            
+            if rdv_data:
+                dialog = ModifierRendezVousDialog(rdv_data, self)
+                if dialog.exec() == QDialog.DialogCode.Accepted:
+                    modified_data = dialog.get_rendez_vous_data()
+                    
+                    try:
+                        if rdv_data.get('recurrence_id') and not rdv_data.get('id'):
+                            # Séance d'une série : devient un rendez-vous à part entière
+                            success = db.detacher_occurrence(
+                                rdv_data['recurrence_id'],
+                                rdv_data['date_rdv'],
+                                modified_data['patient_id'],
+                                modified_data['date'],
+                                modified_data['heure'],
+                                modified_data['type'],
+                                modified_data['description'],
+                                modified_data['statut'],
+                                modified_data['duree'],
+                                modified_data['fauteuil']
+                            )
+                        else:
                             success = db.modifier_rendez_vous(
                                 modified_data['id'],
                                 modified_data['patient_id'],
@@ -724,51 +1561,98 @@ class AgendaView(QWidget):
                                 modified_data['heure'],
                                 modified_data['type'],
                                 modified_data['description'],
-                                modified_data['statut']
+                                modified_data['statut'],
+                                modified_data['duree'],
+                                modified_data['fauteuil']
                             )
+                        
+                        if success:
+                            QMessageBox.information(self, "Succès", "Rendez-vous modifié avec succès!")
+                        else:
+                            QMessageBox.warning(self, "Erreur", "Erreur lors de la modification")
                             
-                            if success:
-                                QMessageBox.information(self, "Succès", "Rendez-vous modifié avec succès!")
-                                self.charger_rendez_vous()
-                            else:
-                                QMessageBox.warning(self, "Erreur", "Erreur lors de la modification")
-                                
-                        except Exception as e:
-                            QMessageBox.critical(self, "Erreur", f"Erreur: {e}")
-                else:
-                    QMessageBox.warning(self, "Erreur", "Impossible de récupérer les données du rendez-vous")
+                    except Exception as e:
+                        QMessageBox.critical(self, "Erreur", f"Erreur: {e}")
+            else:
+                QMessageBox.warning(self, "Erreur", "Impossible de récupérer les données du rendez-vous")
     
     def supprimer_rendez_vous(self):
         """Supprime le rendez-vous sélectionné"""
-        current_row = self.rdv_table.currentRow()
+        current_row = self.rdv_table.currentIndex().row()
         if current_row >= 0:
-            rdv_id_item = self.rdv_table.item(current_row, 0)
-            if rdv_id_item:
-                rdv_data = rdv_id_item.data(Qt.ItemDataRole.UserRole)
+            rdv_data = self.modele_rdv.rendez_vous(current_row)
+            
+            if rdv_data and rdv_data.get('recurrence_id') and not rdv_data.get('id'):
+                self.supprimer_seance(rdv_data)
+            elif rdv_data and rdv_data.get('id'):
+                reply = QMessageBox.question(
+                    self, 
+                    "Confirmer la suppression",
+                    f"Êtes-vous sûr de vouloir supprimer le rendez-vous de {rdv_data.get('heure_rdv', '')} ?",
+                    QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
+                )
                 
-                if rdv_data and rdv_data.get('id'):
-                    reply = QMessageBox.question(
-                        self, 
-                        "Confirmer la suppression",
-                        f"Êtes-vous sûr de vouloir supprimer le rendez-vous de {rdv_data.get('heure_rdv', '')} ?",
-                        QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No
-                    )
-                    
-                    if reply == QMessageBox.StandardButton.Yes:
-                        try:
-                            success = db.supprimer_rendez_vous(rdv_data['id'])
-                            if success:
-                                QMessageBox.information(self, "Succès", "Rendez-vous supprimé avec succès!")
-                                self.charger_rendez_vous()
-                            else:
-                                QMessageBox.warning(self, "Erreur", "Erreur lors de la suppression")
-                        except Exception as e:
-                            QMessageBox.critical(self, "Erreur", f"Erreur: {e}")
-                else:
-                    QMessageBox.warning(self, "Erreur", "Impossible de récupérer l'ID du rendez-vous")
+                if reply == QMessageBox.StandardButton.Yes:
+                    try:
+                        success = db.supprimer_rendez_vous(rdv_data['id'])
+                        if success:
+                            QMessageBox.information(self, "Succès", "Rendez-vous supprimé avec succès!")
+                        else:
+                            QMessageBox.warning(self, "Erreur", "Erreur lors de la suppression")
+                    except Exception as e:
+                        QMessageBox.critical(self, "Erreur", f"Erreur: {e}")
+            else:
+                QMessageBox.warning(self, "Erreur", "Impossible de récupérer l'ID du rendez-vous")
+    
+    def supprimer_seance(self, rdv_data):
+        """Supprime une séance d'une série, ou la série entière"""
+        message = QMessageBox(self)
+        message.setWindowTitle("Confirmer la suppression")
+        message.setText(f"Ce rendez-vous de {rdv_data.get('heure_rdv', '')} fait partie d'une série.")
+        btn_seance = message.addButton("Cette séance", QMessageBox.ButtonRole.AcceptRole)
+        btn_serie = message.addButton("Toute la série", QMessageBox.ButtonRole.DestructiveRole)
+        message.addButton("Annuler", QMessageBox.ButtonRole.RejectRole)
+        message.exec()
+        
+        if message.clickedButton() == btn_seance:
+            success = db.supprimer_occurrence(rdv_data['recurrence_id'], rdv_data['date_rdv'])
+        elif message.clickedButton() == btn_serie:
+            success = db.supprimer_rendez_vous_recurrent(rdv_data['recurrence_id'])
+        else:
+            return
+        
+        if not success:
+            QMessageBox.warning(self, "Erreur", "Erreur lors de la suppression")
     
     def on_patient_changed(self, patient_id):
         """Gère le changement de patient sélectionné"""
         #print(f"🔍 Patient changé: {patient_id}")  # Debug
         # Recharger les rendez-vous pour le nouveau patient
-        self.charger_rendez_vous()
\ No newline at end of file
+        self.charger_rendez_vous()
+        self.charger_prochains_rendez_vous()
+    
+    def charger_prochains_rendez_vous(self):
+        """Liste les PROCHAINS_RDV prochains rendez-vous du patient sélectionné (une requête limitée)"""
+        patient_id = context.selected_patient_id
+        self.prochains_group.setVisible(bool(patient_id))
+        if not patient_id:
+            return
+        
+        self.prochains_list.clear()
+        prochains = db.obtenir_prochains_rendez_vous_patient(patient_id, PROCHAINS_RDV)
+        for rdv in prochains:
+            date = QDate.fromString(rdv['date_rdv'], 'yyyy-MM-dd')
+            texte = f"{date.toString('ddd d MMM yyyy')}  {rdv['heure_rdv']}  {rdv.get('type_rdv') or ''}"
+            if rdv.get('recurrence_id'):
+                texte = "🔁 " + texte
+            item = QListWidgetItem(texte)
+            item.setData(Qt.ItemDataRole.UserRole, date)
+            self.prochains_list.addItem(item)
+        if not prochains:
+            self.prochains_list.addItem("Aucun rendez-vous à venir")
+    
+    def ouvrir_prochain_rendez_vous(self, item):
+        """Affiche le jour d'un des prochains rendez-vous"""
+        date = item.data(Qt.ItemDataRole.UserRole)
+        if date:
+            self.ouvrir_jour(date)
\ No newline at end of file
@@ -3,14 +3,39 @@ from PySide6.QtWidgets import (QWidget, QHBoxLayout, QVBoxLayout, QLabel,
                              QGroupBox, QListWidget, QListWidgetItem, QSplitter,
                              QComboBox, QDateEdit, QTextEdit, QFileDialog,
                              QMessageBox, QProgressBar, QTabWidget, QFormLayout,
-                             QDialog, QDialogButtonBox, QLineEdit)
-from PySide6.QtCore import Qt, QDate, QSize, Signal
-from PySide6.QtGui import QPixmap, QIcon, QFont
+                             QDialog, QDialogButtonBox, QLineEdit, QSlider,
+                             QCheckBox, QInputDialog, QSpinBox)
+from PySide6.QtCore import Qt, QDate, QSize, Signal, QTimer, QRectF
+from PySide6.QtGui import QPixmap, QIcon, QFont, QPainter
 import os
 import shutil
 from database import db
 from src.patient_context import patient_context
 from src.path_manager import path_manager
+from src.radiographie import (charger_image_radiographique, tableau_vers_qimage,
+                              ImageRadiographique, profondeur_effective)
+from src.image_mappee import ouvrir_image_mappee
+from src.import_images import (ImportLotWorker, SurveillanceDossierCapteur, lister_images,
+                               chemin_miniature, charger_config_imagerie,
+                               sauvegarder_config_imagerie, extraire_metadonnees,
+                               calculer_hash, generer_miniature, copier_parametres_raw)
+from src.empreinte_perceptuelle import (calculer_dhash, rechercher_similaires, RechercheSimilairesWorker,
+                                        RattrapageEmpreintesWorker)
+from src.comparaison_images import ComparaisonWorker
+from src.archivage_images import ArchivageWorker, rendre_disponible, retirer_de_archive
+from src.filtres_images import (FiltrageWorker, appliquer_filtres, reduire_apercu, parametres_actifs,
+                                cle_parametres, lire_cache, ecrire_cache, charger_tableau_couleur)
+
+# Types d'images proposés à l'ajout et à l'import par lot
+TYPES_IMAGES = [
+    "Radiographie Panoramique",
+    "Radiographie Rétro-alvéolaire",
+    "Scanner 3D",
+    "Photo Intra-orale",
+    "Photo Extra-orale",
+    "Empreinte Numérique",
+    "Autre"
+]
 
 class AjouterImageDialog(QDialog):
     """Dialog pour ajouter une nouvelle image"""
@@ -42,15 +67,7 @@ class AjouterImageDialog(QDialog):
         
         # Type d'image
         self.type_combo = QComboBox()
-        self.type_combo.addItems([
-            "Radiographie Panoramique",
-            "Radiographie Rétro-alvéolaire", 
-            "Scanner 3D",
-            "Photo Intra-orale",
-            "Photo Extra-orale",
-            "Empreinte Numérique",
-            "Autre"
-        ])
+        self.type_combo.addItems(TYPES_IMAGES)
         form_layout.addRow("Type *:", self.type_combo)
         
         # Nom de l'image
@@ -129,7 +146,7 @@ class AjouterImageDialog(QDialog):
             self,
             "Sélectionner une image",
             initial_dir,
-            "Images (*.png *.jpg *.jpeg *.bmp *.tiff *.dcm);;Tous les fichiers (*)"
+            "Images (*.png *.jpg *.jpeg *.bmp *.tif *.tiff *.raw *.dcm);;Tous les fichiers (*)"
         )
         
         if fichier:
@@ -169,6 +186,356 @@ class AjouterImageDialog(QDialog):
             'chemin_source': self.chemin_fichier
         }
 
+class ImportLotDialog(QDialog):
+    """Dialog d'import d'un lot d'images (fichiers multiples ou dossier)"""
+
+    def __init__(self, parent=None, fichiers=None):
+        super().__init__(parent)
+        self.setWindowTitle("Import par lot")
+        self.setModal(True)
+        self.resize(480, 420)
+        self.fichiers = list(fichiers or [])
+        self.worker = None
+        self.images_importees = []
+        self.import_interrompu = False
+        self.config = charger_config_imagerie()
+        self.setup_ui()
+        self.mettre_a_jour_label_fichiers()
+
+    def setup_ui(self):
+        layout = QVBoxLayout(self)
+
+        # Titre
+        title = QLabel("Importer un Lot d'Images")
+        title.setStyleSheet("font-size: 16px; font-weight: bold; color: #333; margin-bottom: 10px;")
+        title.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        layout.addWidget(title)
+
+        form_layout = QFormLayout()
+
+        # Sélection du patient
+        self.patient_combo = QComboBox()
+        self.charger_patients()
+        form_layout.addRow("Patient *:", self.patient_combo)
+
+        # Type appliqué à toutes les images du lot
+        self.type_combo = QComboBox()
+        self.type_combo.addItems(TYPES_IMAGES)
+        self.type_combo.setCurrentText(self.config.get("type_capteur", TYPES_IMAGES[1]))
+        form_layout.addRow("Type *:", self.type_combo)
+
+        self.description_edit = QLineEdit()
+        self.description_edit.setPlaceholderText("Description commune (optionnelle)...")
+        form_layout.addRow("Description:", self.description_edit)
+
+        # Sélection des fichiers
+        fichiers_layout = QHBoxLayout()
+        self.btn_fichiers = QPushButton("Fichiers...")
+        self.btn_fichiers.clicked.connect(self.selectionner_fichiers)
+        fichiers_layout.addWidget(self.btn_fichiers)
+
+        self.btn_dossier = QPushButton("Dossier...")
+        self.btn_dossier.clicked.connect(self.selectionner_dossier)
+        fichiers_layout.addWidget(self.btn_dossier)
+        form_layout.addRow("Source *:", fichiers_layout)
+
+        self.check_recursif = QCheckBox("Inclure les sous-dossiers")
+        form_layout.addRow("", self.check_recursif)
+
+        self.label_fichiers = QLabel()
+        form_layout.addRow("", self.label_fichiers)
+
+        layout.addLayout(form_layout)
+
+        # Dossier d'export du capteur surveillé
+        capteur_group = QGroupBox("Dossier du capteur")
+        capteur_layout = QFormLayout(capteur_group)
+
+        dossier_layout = QHBoxLayout()
+        self.dossier_capteur_edit = QLineEdit(self.config.get("dossier_capteur", ""))
+        self.dossier_capteur_edit.setPlaceholderText("Dossier d'export du logiciel du capteur...")
+        dossier_layout.addWidget(self.dossier_capteur_edit)
+        btn_parcourir = QPushButton("...")
+        btn_parcourir.setMaximumWidth(40)
+        btn_parcourir.clicked.connect(self.selectionner_dossier_capteur)
+        dossier_layout.addWidget(btn_parcourir)
+        capteur_layout.addRow("Dossier:", dossier_layout)
+
+        self.check_surveillance = QCheckBox("Importer automatiquement les nouvelles images pour le patient actif")
+        self.check_surveillance.setChecked(self.config.get("surveillance_active", False))
+        capteur_layout.addRow("", self.check_surveillance)
+
+        layout.addWidget(capteur_group)
+
+        # Progression
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setVisible(False)
+        layout.addWidget(self.progress_bar)
+
+        # Boutons
+        self.button_box = QDialogButtonBox(QDialogButtonBox.StandardButton.Ok | QDialogButtonBox.StandardButton.Cancel)
+        self.button_box.button(QDialogButtonBox.StandardButton.Ok).setText("Importer")
+        self.button_box.button(QDialogButtonBox.StandardButton.Cancel).setText("Fermer")
+        self.button_box.accepted.connect(self.lancer_import)
+        self.button_box.rejected.connect(self.fermer)
+        layout.addWidget(self.button_box)
+
+    def charger_patients(self):
+        """Charge la liste des patients"""
+        try:
+            patients = db.obtenir_patients()
+            self.patient_combo.clear()
+
+            for patient in patients:
+                self.patient_combo.addItem(patient['nom_complet'], patient['id'])
+
+            # Sélectionner le patient actuel si disponible
+            if patient_context.selected_patient_id:
+                for i in range(self.patient_combo.count()):
+                    if self.patient_combo.itemData(i) == patient_context.selected_patient_id:
+                        self.patient_combo.setCurrentIndex(i)
+                        break
+
+        except Exception as e:
+            QMessageBox.warning(self, "Erreur", f"Erreur lors du chargement des patients: {e}")
+
+    def selectionner_fichiers(self):
+        """Sélection de plusieurs fichiers images"""
+        fichiers, _ = QFileDialog.getOpenFileNames(
+            self,
+            "Sélectionner des images",
+            path_manager.get_app_data_folder(),
+            "Images (*.png *.jpg *.jpeg *.bmp *.tif *.tiff *.raw *.dcm);;Tous les fichiers (*)"
+        )
+        if fichiers:
+            self.fichiers = fichiers
+            self.mettre_a_jour_label_fichiers()
+
+    def selectionner_dossier(self):
+        """Sélection d'un dossier dont toutes les images seront importées"""
+        dossier = QFileDialog.getExistingDirectory(self, "Sélectionner un dossier", path_manager.get_app_data_folder())
+        if dossier:
+            self.fichiers = lister_images(dossier, self.check_recursif.isChecked())
+            self.mettre_a_jour_label_fichiers()
+
+    def selectionner_dossier_capteur(self):
+        dossier = QFileDialog.getExistingDirectory(self, "Dossier d'export du capteur", self.dossier_capteur_edit.text())
+        if dossier:
+            self.dossier_capteur_edit.setText(dossier)
+
+    def mettre_a_jour_label_fichiers(self):
+        if self.fichiers:
+            self.label_fichiers.setText(f"{len(self.fichiers)} fichier(s) sélectionné(s)")
+            self.label_fichiers.setStyleSheet("color: green;")
+        else:
+            self.label_fichiers.setText("Aucun fichier sélectionné")
+            self.label_fichiers.setStyleSheet("color: gray; font-style: italic;")
+
+    def sauvegarder_config(self):
+        """Enregistre le dossier capteur et le type par défaut"""
+        self.config.update({
+            "dossier_capteur": self.dossier_capteur_edit.text().strip(),
+            "surveillance_active": self.check_surveillance.isChecked(),
+            "type_capteur": self.type_combo.currentText()
+        })
+        try:
+            sauvegarder_config_imagerie(self.config)
+        except Exception as e:
+            QMessageBox.warning(self, "Erreur", f"Erreur lors de la sauvegarde de la configuration: {e}")
+
+    def lancer_import(self):
+        """Valide la sélection et démarre l'import en arrière-plan"""
+        self.sauvegarder_config()
+
+        if not self.fichiers:
+            # Seule la configuration du capteur a pu être modifiée
+            self.accept()
+            return
+
+        if not self.patient_combo.currentData():
+            QMessageBox.warning(self, "Validation", "Veuillez sélectionner un patient.")
+            return
+
+        self.worker = ImportLotWorker(
+            self.fichiers,
+            self.patient_combo.currentData(),
+            self.type_combo.currentText(),
+            self.description_edit.text().strip(),
+            self
+        )
+        self.worker.progression.connect(self.maj_progression)
+        self.worker.termine.connect(self.import_termine)
+
+        self.progress_bar.setRange(0, len(self.fichiers))
+        self.progress_bar.setValue(0)
+        self.progress_bar.setVisible(True)
+        self.button_box.button(QDialogButtonBox.StandardButton.Ok).setEnabled(False)
+        self.button_box.button(QDialogButtonBox.StandardButton.Cancel).setText("Annuler")
+        for widget in (self.btn_fichiers, self.btn_dossier, self.patient_combo, self.type_combo):
+            widget.setEnabled(False)
+
+        self.worker.start()
+
+    def maj_progression(self, traites, total):
+        self.progress_bar.setMaximum(total)
+        self.progress_bar.setValue(traites)
+
+    def import_termine(self, images, erreurs):
+        """Affiche le bilan de l'import"""
+        if self.worker is None:
+            # Dialog fermé pendant l'import (voir reject)
+            return
+        self.images_importees = images
+        self.worker = None
+
+        message = f"{len(images)} image(s) importée(s) avec succès."
+        if erreurs:
+            details = "\n".join(erreurs[:10])
+            if len(erreurs) > 10:
+                details += f"\n... et {len(erreurs) - 10} autre(s)"
+            QMessageBox.warning(self, "Import par lot", f"{message}\n\n{len(erreurs)} avertissement(s):\n{details}")
+        else:
+            QMessageBox.information(self, "Import par lot", message)
+
+        self.accept()
+
+    def fermer(self):
+        """Annule l'import en cours ou ferme le dialog"""
+        if self.worker is not None and self.worker.isRunning():
+            self.worker.annuler()
+            return
+        self.reject()
+
+    def reject(self):
+        # Échap et fermeture de la fenêtre passent aussi par ici : arrêter l'import avant de masquer
+        if self.worker is not None and self.worker.isRunning():
+            self.worker.annuler()
+            self.worker.wait()
+            self.worker = None
+            self.import_interrompu = True
+        super().reject()
+
+    def get_patient_id(self):
+        return self.patient_combo.currentData()
+
+class ArchivageDialog(QDialog):
+    """Recompression sans perte et archivage des images anciennes"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Archivage des images")
+        self.setModal(True)
+        self.resize(460, 320)
+        self.worker = None
+        self.config = charger_config_imagerie()
+        self.setup_ui()
+
+    def setup_ui(self):
+        layout = QVBoxLayout(self)
+
+        title = QLabel("Archivage des Images")
+        title.setStyleSheet("font-size: 16px; font-weight: bold; color: #333; margin-bottom: 10px;")
+        title.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        layout.addWidget(title)
+
+        form_layout = QFormLayout()
+
+        self.spin_recompression = QSpinBox()
+        self.spin_recompression.setRange(0, 3650)
+        self.spin_recompression.setSuffix(" jours")
+        self.spin_recompression.setValue(self.config.get("jours_recompression", 30))
+        form_layout.addRow("Recompresser (BMP/TIFF/RAW) après:", self.spin_recompression)
+
+        self.spin_archivage = QSpinBox()
+        self.spin_archivage.setRange(1, 3650)
+        self.spin_archivage.setSuffix(" jours")
+        self.spin_archivage.setValue(self.config.get("jours_archivage", 365))
+        form_layout.addRow("Archiver sans consultation depuis:", self.spin_archivage)
+
+        layout.addLayout(form_layout)
+
+        note = QLabel("Les images archivées sont restaurées automatiquement à l'ouverture.")
+        note.setStyleSheet("color: #666; font-style: italic;")
+        note.setWordWrap(True)
+        layout.addWidget(note)
+
+        self.label_etape = QLabel("")
+        layout.addWidget(self.label_etape)
+
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setVisible(False)
+        layout.addWidget(self.progress_bar)
+
+        self.label_resultat = QLabel("")
+        self.label_resultat.setWordWrap(True)
+        layout.addWidget(self.label_resultat)
+
+        layout.addStretch()
+
+        self.button_box = QDialogButtonBox(QDialogButtonBox.StandardButton.Ok | QDialogButtonBox.StandardButton.Close)
+        self.button_box.button(QDialogButtonBox.StandardButton.Ok).setText("Lancer")
+        self.button_box.button(QDialogButtonBox.StandardButton.Close).setText("Fermer")
+        self.button_box.accepted.connect(self.lancer_archivage)
+        self.button_box.rejected.connect(self.fermer)
+        layout.addWidget(self.button_box)
+
+    def lancer_archivage(self):
+        """Enregistre les seuils et démarre le traitement en arrière-plan"""
+        self.config.update({
+            "jours_recompression": self.spin_recompression.value(),
+            "jours_archivage": self.spin_archivage.value()
+        })
+        try:
+            sauvegarder_config_imagerie(self.config)
+        except Exception as e:
+            QMessageBox.warning(self, "Erreur", f"Erreur lors de la sauvegarde de la configuration: {e}")
+
+        self.worker = ArchivageWorker(self.spin_recompression.value(), self.spin_archivage.value(), self)
+        self.worker.progression.connect(self.maj_progression)
+        self.worker.termine.connect(self.archivage_termine)
+
+        self.button_box.button(QDialogButtonBox.StandardButton.Ok).setEnabled(False)
+        self.button_box.button(QDialogButtonBox.StandardButton.Close).setText("Annuler")
+        self.progress_bar.setRange(0, 0)
+        self.progress_bar.setVisible(True)
+        self.label_resultat.setText("")
+        self.worker.start()
+
+    def maj_progression(self, etape, traites, total):
+        self.label_etape.setText(f"{etape}: {traites}/{total}")
+        self.progress_bar.setRange(0, max(total, 1))
+        self.progress_bar.setValue(traites)
+
+    def archivage_termine(self, metriques):
+        """Affiche les métriques : volume traité, débit et espace libéré"""
+        self.worker = None
+        self.progress_bar.setVisible(False)
+        self.label_etape.setText("Terminé")
+        self.button_box.button(QDialogButtonBox.StandardButton.Ok).setEnabled(True)
+        self.button_box.button(QDialogButtonBox.StandardButton.Close).setText("Fermer")
+
+        resultat = (f"Images recompressées: {metriques['recompressees']}\n"
+                    f"Images archivées: {metriques['archivees']}\n"
+                    f"Volume traité: {metriques['octets_traites'] / 1048576:.1f} Mo "
+                    f"en {metriques['duree']:.1f} s ({metriques['debit_mo_s']:.1f} Mo/s)\n"
+                    f"Espace libéré: {metriques['octets_gagnes'] / 1048576:.1f} Mo")
+        if metriques['erreurs']:
+            resultat += f"\n{len(metriques['erreurs'])} erreur(s): " + "; ".join(metriques['erreurs'][:3])
+        self.label_resultat.setText(resultat)
+
+    def fermer(self):
+        if self.worker is not None and self.worker.isRunning():
+            self.worker.annuler()
+            return
+        self.reject()
+
+    def reject(self):
+        # Échap et fermeture de la fenêtre : l'archivage s'arrête avant que le dialog disparaisse
+        if self.worker is not None and self.worker.isRunning():
+            self.worker.annuler()
+            self.worker.wait()
+        super().reject()
+
 class ImageViewer(QLabel):
     """Widget personnalisé pour afficher et manipuler les images médicales - VERSION CORRIGÉE"""
     
@@ -189,13 +556,44 @@ class ImageViewer(QLabel):
         self.current_pixmap = None
         self.scale_factor = 1.0
         self.original_size = None
-    
+
+        # Données en pleine dynamique (radiographies en niveaux de gris)
+        self.radiographie = None
+        self.fenetrage = None  # (centre, largeur, gamma, inverser)
+
+        # Image source et tableau 8 bits non filtré (entrée des filtres)
+        self.chemin = None
+        self._tableau_couleur = None
+        self._apercu_base = (None, None)
+
+        # Fichiers volumineux non compressés : lecture par région (mmap)
+        self.image_mappee = None
+        self.pas_apercu = 1
+        self._region_cache = None
+
     def load_image(self, image_path):
         """Charge et affiche une image - VERSION CORRIGÉE"""
         #print(f"🔍 Chargement de l'image: {image_path}")  # Debug
+
+        self.chemin = image_path
+        self._tableau_couleur = None
+        self._apercu_base = (None, None)
+        self.fermer_image_mappee()
+        
+        if os.path.exists(image_path) and self.charger_image_mappee(image_path):
+            return
         
         if os.path.exists(image_path):
-            self.current_pixmap = QPixmap(image_path)
+            # Les radiographies 8/16 bits sont conservées en pleine dynamique
+            self.radiographie = charger_image_radiographique(image_path)
+            if self.radiographie is not None:
+                centre, largeur = self.radiographie.fenetrage_par_defaut()
+                self.fenetrage = (centre, largeur, 1.0, False)
+                self.current_pixmap = QPixmap.fromImage(self.radiographie.rendre(*self.fenetrage))
+            else:
+                self.fenetrage = None
+                self.current_pixmap = QPixmap(image_path)
+
             if not self.current_pixmap.isNull():
                 self.original_size = self.current_pixmap.size()
                 self.scale_factor = 1.0
@@ -208,8 +606,95 @@ class ImageViewer(QLabel):
             self.setText("Image non trouvée")
             #print(f"❌ Fichier non trouvé: {image_path}")  # Debug
     
+    def charger_image_mappee(self, image_path):
+        """
+        Ouvre un grand fichier non compressé sans le charger entièrement
+
+        Seule une vue d'ensemble réduite est gardée en mémoire (fenêtrage et
+        filtres s'y appliquent) ; aux forts grossissements, la partie visible
+        est lue à pleine résolution dans paintEvent.
+        """
+        self.image_mappee = ouvrir_image_mappee(image_path)
+        if self.image_mappee is None:
+            return False
+
+        apercu, self.pas_apercu = self.image_mappee.apercu()
+        if self.image_mappee.niveaux_de_gris:
+            self.radiographie = ImageRadiographique(apercu, profondeur_effective(apercu))
+            centre, largeur = self.radiographie.fenetrage_par_defaut()
+            self.fenetrage = (centre, largeur, 1.0, False)
+            self.current_pixmap = QPixmap.fromImage(self.radiographie.rendre(*self.fenetrage))
+        else:
+            self.radiographie = None
+            self.fenetrage = None
+            self._tableau_couleur = apercu
+            self.current_pixmap = QPixmap.fromImage(tableau_vers_qimage(apercu))
+
+        self.clear()
+        self.original_size = QSize(self.image_mappee.largeur, self.image_mappee.hauteur)
+        self.scale_factor = 1.0
+        self.update_display()
+        return True
+
+    def fermer_image_mappee(self):
+        """Libère la projection mémoire du fichier affiché"""
+        if getattr(self, 'image_mappee', None) is not None:
+            self.image_mappee.fermer()
+            self.image_mappee = None
+            self._region_cache = None
+
+    def setText(self, texte):
+        """Affiche un message à la place de l'image (libère le fichier projeté)"""
+        self.fermer_image_mappee()
+        super().setText(texte)
+
+    def paintEvent(self, event):
+        """Lecture par région : seule la zone exposée est lue et dessinée"""
+        if self.image_mappee is None or self.current_pixmap is None:
+            super().paintEvent(event)
+            return
+
+        zone = QRectF(event.rect())
+        echelle = self.scale_factor
+        painter = QPainter(self)
+
+        if echelle * self.pas_apercu <= 1.0:
+            # La vue d'ensemble (éventuellement filtrée) suffit à ce grossissement
+            ratio = self.current_pixmap.width() / self.original_size.width() / echelle
+            source = QRectF(zone.x() * ratio, zone.y() * ratio, zone.width() * ratio, zone.height() * ratio)
+            painter.drawPixmap(zone, self.current_pixmap, source)
+            painter.end()
+            return
+
+        pas = max(1, int(1.0 / echelle))
+        x0 = int(zone.left() / echelle)
+        y0 = int(zone.top() / echelle)
+        x1 = int(zone.right() / echelle) + 2
+        y1 = int(zone.bottom() / echelle) + 2
+
+        cle = (x0, y0, x1, y1, pas, self.fenetrage)
+        if self._region_cache is None or self._region_cache[0] != cle:
+            region = self.image_mappee.lire_region(x0, y0, x1 - x0, y1 - y0, pas)
+            if self.image_mappee.niveaux_de_gris:
+                region = ImageRadiographique(region, self.radiographie.profondeur_bits).rendre_tableau(*self.fenetrage)
+            image = tableau_vers_qimage(region)
+            cible = QRectF(x0 * echelle, y0 * echelle,
+                           region.shape[1] * pas * echelle, region.shape[0] * pas * echelle)
+            self._region_cache = (cle, image, cible)
+
+        _, image, cible = self._region_cache
+        painter.drawImage(cible, image)
+        painter.end()
+
     def update_display(self):
         """Met à jour l'affichage de l'image avec le facteur de zoom - VERSION CORRIGÉE"""
+        if self.image_mappee is not None and self.current_pixmap is not None:
+            # Pas de pixmap à la taille zoomée : paintEvent dessine la zone visible
+            self._region_cache = None
+            self.resize(self.original_size * self.scale_factor)
+            self.update()
+            return
+
         if self.current_pixmap and not self.current_pixmap.isNull():
             # Calculer la nouvelle taille
             new_size = self.original_size * self.scale_factor
@@ -251,6 +736,235 @@ class ImageViewer(QLabel):
         """Retourne le pourcentage de zoom actuel"""
         return int(self.scale_factor * 100)
 
+    def est_radiographie(self):
+        """Indique si l'image affichée supporte le fenêtrage"""
+        return self.radiographie is not None
+
+    def appliquer_fenetrage(self, centre, largeur, gamma=1.0, inverser=False):
+        """Applique niveau/fenêtre, gamma et inversion via une table précalculée"""
+        if self.radiographie is None:
+            return
+
+        fenetrage = (centre, largeur, gamma, inverser)
+        if fenetrage == self.fenetrage:
+            return
+
+        self.fenetrage = fenetrage
+        self.current_pixmap = QPixmap.fromImage(self.radiographie.rendre(*fenetrage))
+        self.update_display()
+
+    def tableau_base(self):
+        """Image affichée avant filtres, en tableau NumPy 8 bits"""
+        if self.radiographie is not None:
+            return self.radiographie.rendre_tableau(*self.fenetrage)
+
+        if self._tableau_couleur is None:
+            self._tableau_couleur = charger_tableau_couleur(self.chemin)
+        return self._tableau_couleur
+
+    def cle_filtrage(self, parametres):
+        """Clé de cache d'un rendu filtré : image, fenêtrage et réglages"""
+        return (self.chemin, self.fenetrage, cle_parametres(parametres))
+
+    def apercu_filtres(self, parametres):
+        """Applique les filtres à une version réduite (réactivité pendant le réglage)"""
+        cle_base = (self.chemin, self.fenetrage)
+        if self._apercu_base[0] != cle_base:
+            self._apercu_base = (cle_base, reduire_apercu(self.tableau_base()))
+        self.afficher_qimage(tableau_vers_qimage(appliquer_filtres(self._apercu_base[1], parametres)))
+
+    def retirer_filtres(self):
+        """Revient à l'image non filtrée"""
+        if self.radiographie is not None:
+            self.current_pixmap = QPixmap.fromImage(self.radiographie.rendre(*self.fenetrage))
+        elif self.image_mappee is not None:
+            self.current_pixmap = QPixmap.fromImage(tableau_vers_qimage(self._tableau_couleur))
+        elif self.chemin:
+            self.current_pixmap = QPixmap(self.chemin)
+        self.update_display()
+
+    def afficher_qimage(self, image):
+        """Affiche un rendu (aperçu réduit ou pleine résolution) à la taille d'origine"""
+        self.current_pixmap = QPixmap.fromImage(image)
+        self.update_display()
+
+class ComparaisonDialog(QDialog):
+    """Comparaison de deux images : côte à côte, différence ou superposition"""
+
+    MODES = ["Côte à côte", "Différence", "Superposition"]
+
+    def __init__(self, image_reference, image_comparaison, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Comparaison d'images")
+        self.resize(1200, 750)
+        self.image_reference = image_reference
+        self.image_comparaison = image_comparaison
+        self.resultat = None
+        self.worker = None
+        self._synchronisation = False
+        self.setup_ui()
+
+        self.viewer_gauche.load_image(image_reference.get("chemin_fichier", ""))
+        self.viewer_droite.load_image(image_comparaison.get("chemin_fichier", ""))
+
+    def setup_ui(self):
+        layout = QVBoxLayout(self)
+
+        # Barre d'outils : mode et zoom communs aux deux vues
+        outils = QHBoxLayout()
+        outils.addWidget(QLabel("Mode:"))
+        self.mode_combo = QComboBox()
+        self.mode_combo.addItems(self.MODES)
+        self.mode_combo.currentIndexChanged.connect(self.mode_change)
+        outils.addWidget(self.mode_combo)
+
+        self.label_recalage = QLabel("")
+        self.label_recalage.setStyleSheet("color: #666; font-style: italic;")
+        outils.addWidget(self.label_recalage)
+        outils.addStretch()
+
+        for texte, action in (("Zoom -", self.zoom_out), ("100%", self.reset_zoom), ("Zoom +", self.zoom_in)):
+            bouton = QPushButton(texte)
+            bouton.clicked.connect(action)
+            outils.addWidget(bouton)
+        layout.addLayout(outils)
+
+        # Deux vues synchronisées
+        vues = QHBoxLayout()
+        self.titre_gauche, self.viewer_gauche, self.scroll_gauche = self.creer_vue(vues, self.image_reference)
+        self.titre_droite, self.viewer_droite, self.scroll_droite = self.creer_vue(vues, self.image_comparaison)
+        layout.addLayout(vues)
+
+        for source, cible in ((self.scroll_gauche, self.scroll_droite), (self.scroll_droite, self.scroll_gauche)):
+            source.horizontalScrollBar().valueChanged.connect(
+                lambda valeur, s=source.horizontalScrollBar(), c=cible.horizontalScrollBar(): self.synchroniser_defilement(s, c))
+            source.verticalScrollBar().valueChanged.connect(
+                lambda valeur, s=source.verticalScrollBar(), c=cible.verticalScrollBar(): self.synchroniser_defilement(s, c))
+
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setRange(0, 0)
+        self.progress_bar.setVisible(False)
+        layout.addWidget(self.progress_bar)
+
+        button_box = QDialogButtonBox(QDialogButtonBox.StandardButton.Close)
+        button_box.button(QDialogButtonBox.StandardButton.Close).setText("Fermer")
+        button_box.rejected.connect(self.reject)
+        layout.addWidget(button_box)
+
+    def creer_vue(self, layout_parent, image):
+        colonne = QVBoxLayout()
+        titre = QLabel(self.titre_image(image))
+        titre.setStyleSheet("font-weight: bold; color: #333;")
+        titre.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        colonne.addWidget(titre)
+
+        scroll_area = QScrollArea()
+        scroll_area.setWidgetResizable(False)
+        scroll_area.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        viewer = ImageViewer()
+        scroll_area.setWidget(viewer)
+        colonne.addWidget(scroll_area)
+
+        layout_parent.addLayout(colonne)
+        return titre, viewer, scroll_area
+
+    def titre_image(self, image):
+        date = (image.get("date_capture") or image.get("date_creation") or "")[:10]
+        return f"{image.get('nom_fichier', '-')} ({date})"
+
+    def synchroniser_defilement(self, source, cible):
+        """Reporte la position relative de défilement d'une vue sur l'autre"""
+        if self._synchronisation:
+            return
+        self._synchronisation = True
+        if source.maximum() > 0:
+            cible.setValue(round(source.value() / source.maximum() * cible.maximum()))
+        self._synchronisation = False
+
+    def appliquer_zoom(self, facteur=None):
+        """Même facteur de zoom pour les deux vues (None = 100%)"""
+        scale_factor = 1.0 if facteur is None else max(0.1, self.viewer_gauche.scale_factor * facteur)
+        for viewer in (self.viewer_gauche, self.viewer_droite):
+            viewer.scale_factor = scale_factor
+            viewer.update_display()
+
+    def zoom_in(self):
+        self.appliquer_zoom(1.25)
+
+    def zoom_out(self):
+        self.appliquer_zoom(1 / 1.25)
+
+    def reset_zoom(self):
+        self.appliquer_zoom(None)
+
+    def mode_change(self):
+        """Affiche les deux clichés, la carte de différence ou la superposition"""
+        mode = self.mode_combo.currentText()
+        if mode == "Côte à côte":
+            self.titre_droite.setText(self.titre_image(self.image_comparaison))
+            self.viewer_droite.load_image(self.image_comparaison.get("chemin_fichier", ""))
+            self.viewer_droite.scale_factor = self.viewer_gauche.scale_factor
+            self.viewer_droite.update_display()
+            return
+
+        if self.resultat is None:
+            self.lancer_comparaison()
+        else:
+            self.afficher_resultat()
+
+    def lancer_comparaison(self):
+        """Recalage et différence calculés hors du thread de l'interface"""
+        if self.worker is not None:
+            return
+        self.mode_combo.setEnabled(False)
+        self.progress_bar.setVisible(True)
+        self.worker = ComparaisonWorker(self.image_reference.get("chemin_fichier", ""),
+                                        self.image_comparaison.get("chemin_fichier", ""), self)
+        self.worker.termine.connect(self.comparaison_terminee)
+        self.worker.erreur.connect(self.comparaison_echouee)
+        self.worker.start()
+
+    def comparaison_terminee(self, resultat):
+        self.worker = None
+        self.resultat = resultat
+        self.progress_bar.setVisible(False)
+        self.mode_combo.setEnabled(True)
+        self.label_recalage.setText(f"Recalage: {resultat['dx']:+d} px, {resultat['dy']:+d} px")
+        self.afficher_resultat()
+
+    def comparaison_echouee(self, message):
+        self.worker = None
+        self.progress_bar.setVisible(False)
+        self.mode_combo.setEnabled(True)
+        self.mode_combo.setCurrentIndex(0)
+        QMessageBox.critical(self, "Erreur", f"Erreur lors de la comparaison: {message}")
+
+    def afficher_resultat(self):
+        mode = self.mode_combo.currentText()
+        if mode == "Différence":
+            image = self.resultat['difference']
+            self.titre_droite.setText("Différence (clair = plus dense, sombre = moins dense)")
+        else:
+            image = self.resultat['superposition']
+            self.titre_droite.setText("Superposition (magenta = référence, vert = comparaison)")
+
+        # Affichage dans la vue droite avec le zoom de la vue gauche
+        viewer = self.viewer_droite
+        # L'image calculée remplace le fichier projeté : plus de lecture de tuiles au zoom
+        viewer.fermer_image_mappee()
+        viewer.pas_apercu = 1
+        viewer.radiographie = None
+        viewer.fenetrage = None
+        viewer.current_pixmap = QPixmap.fromImage(image)
+        viewer.original_size = viewer.current_pixmap.size()
+        viewer.scale_factor = self.viewer_gauche.scale_factor
+        viewer.update_display()
+
+    def reject(self):
+        if self.worker is not None and self.worker.isRunning():
+            self.worker.wait()
+        super().reject()
+
 class ImageListWidget(QListWidget):
     """Widget personnalisé pour la liste des images - VERSION CORRIGÉE"""
     image_selected = Signal(str, dict)  # path, metadata
@@ -307,9 +1021,18 @@ class ImageListWidget(QListWidget):
         
         # Créer l'icône à partir de l'image
         chemin_image = image_data.get("chemin_fichier", "")
-        if chemin_image and os.path.exists(chemin_image):
+        miniature = chemin_miniature(image_data.get("nom_fichier", ""))
+        if os.path.exists(miniature):
+            # Miniature générée à l'import : évite de décoder l'image complète
+            item.setIcon(QIcon(QPixmap(miniature)))
+        elif chemin_image and os.path.exists(chemin_image):
             try:
                 pixmap = QPixmap(chemin_image)
+                if pixmap.isNull():
+                    # RAW capteur ou TIFF 16 bits non gérés par QPixmap
+                    radiographie = charger_image_radiographique(chemin_image)
+                    if radiographie is not None:
+                        pixmap = QPixmap.fromImage(radiographie.rendre(*radiographie.fenetrage_par_defaut()))
                 if not pixmap.isNull():
                     # Redimensionner pour l'icône
                     icon_pixmap = pixmap.scaled(80, 80, Qt.AspectRatioMode.KeepAspectRatio, Qt.TransformationMode.SmoothTransformation)
@@ -322,7 +1045,7 @@ class ImageListWidget(QListWidget):
         # Texte de l'élément
         nom = image_data.get('nom_fichier', 'Image sans nom')
         type_img = image_data.get('type_image', 'Type inconnu')
-        date_creation = image_data.get('date_creation', '')
+        date_creation = image_data.get('date_capture') or image_data.get('date_creation', '')
         date_affichage = date_creation[:10] if date_creation else 'Date inconnue'
         
         item.setText(f"{nom}\n{type_img} - {date_affichage}")
@@ -346,8 +1069,18 @@ class ImagerieView(QWidget):
         super().__init__()
         self.patient_actuel = None
         self.image_actuelle = None
+        self.imports_capteur = []
         self.setup_ui()
         
+        # Surveillance du dossier d'export du capteur
+        self.surveillance_capteur = SurveillanceDossierCapteur(self)
+        self.surveillance_capteur.nouveaux_fichiers.connect(self.importer_fichiers_capteur)
+        self.configurer_surveillance_capteur()
+        
+        # Empreintes des images importées avant la recherche de similaires (une fois par lancement)
+        self.rattrapage_empreintes = RattrapageEmpreintesWorker(self)
+        self.rattrapage_empreintes.start()
+        
         # Connecter au contexte patient global
         patient_context.patient_changed.connect(self.on_patient_changed)
         
@@ -435,6 +1168,29 @@ class ImagerieView(QWidget):
         date_layout.addWidget(self.date_combo)
         layout.addLayout(date_layout)
         
+        # Résolution minimale (plus grand côté : les panoramiques restent visibles)
+        resolution_layout = QHBoxLayout()
+        resolution_layout.addWidget(QLabel("Résolution (grand côté):"))
+        self.resolution_combo = QComboBox()
+        for libelle, cote in [("Toutes", None), ("≥ 1000 px", 1000), ("≥ 2000 px", 2000), ("≥ 3000 px", 3000)]:
+            self.resolution_combo.addItem(libelle, cote)
+        resolution_layout.addWidget(self.resolution_combo)
+        layout.addLayout(resolution_layout)
+        
+        # Tri
+        tri_layout = QHBoxLayout()
+        tri_layout.addWidget(QLabel("Trier par:"))
+        self.tri_combo = QComboBox()
+        for libelle, cle in [("Date de prise (récentes)", ("date_capture", True)),
+                             ("Date de prise (anciennes)", ("date_capture", False)),
+                             ("Nom", ("nom", False)),
+                             ("Type", ("type", False)),
+                             ("Taille du fichier", ("taille", True)),
+                             ("Résolution", ("resolution", True))]:
+            self.tri_combo.addItem(libelle, cle)
+        tri_layout.addWidget(self.tri_combo)
+        layout.addLayout(tri_layout)
+        
         # Bouton appliquer filtres - CORRIGÉ
         self.btn_appliquer = QPushButton("Appliquer Filtres")
         self.btn_appliquer.setStyleSheet("""
@@ -490,6 +1246,24 @@ class ImagerieView(QWidget):
         self.btn_ajouter.clicked.connect(self.ajouter_image)
         layout.addWidget(self.btn_ajouter)
         
+        # Bouton import par lot
+        self.btn_import_lot = QPushButton("Import par lot")
+        self.btn_import_lot.setStyleSheet("""
+            QPushButton {
+                background-color: #2196F3;
+                color: white;
+                border: none;
+                padding: 10px;
+                border-radius: 5px;
+                font-weight: bold;
+            }
+            QPushButton:hover {
+                background-color: #1976D2;
+            }
+        """)
+        self.btn_import_lot.clicked.connect(self.importer_lot)
+        layout.addWidget(self.btn_import_lot)
+        
         # Bouton supprimer - CORRIGÉ
         self.btn_supprimer = QPushButton("Supprimer")
         self.btn_supprimer.setStyleSheet("""
@@ -534,6 +1308,74 @@ class ImagerieView(QWidget):
         self.btn_exporter.setEnabled(False)
         layout.addWidget(self.btn_exporter)
         
+        # Bouton recherche des images similaires (toute la clinique)
+        self.btn_similaires = QPushButton("Images similaires")
+        self.btn_similaires.setStyleSheet("""
+            QPushButton {
+                background-color: #607D8B;
+                color: white;
+                border: none;
+                padding: 10px;
+                border-radius: 5px;
+                font-weight: bold;
+            }
+            QPushButton:hover {
+                background-color: #455A64;
+            }
+            QPushButton:disabled {
+                background-color: #C0C0C0;
+            }
+        """)
+        self.btn_similaires.clicked.connect(self.rechercher_images_similaires)
+        self.btn_similaires.setEnabled(False)
+        layout.addWidget(self.btn_similaires)
+        
+        # Bouton comparaison avec une autre image du patient
+        self.btn_comparer = QPushButton("Comparer...")
+        self.btn_comparer.setStyleSheet("""
+            QPushButton {
+                background-color: #9C27B0;
+                color: white;
+                border: none;
+                padding: 10px;
+                border-radius: 5px;
+                font-weight: bold;
+            }
+            QPushButton:hover {
+                background-color: #7B1FA2;
+            }
+            QPushButton:disabled {
+                background-color: #C0C0C0;
+            }
+        """)
+        self.btn_comparer.clicked.connect(self.comparer_images)
+        self.btn_comparer.setEnabled(False)
+        layout.addWidget(self.btn_comparer)
+        
+        # Bouton archivage (recompression et déplacement des images anciennes)
+        self.btn_archivage = QPushButton("Archivage...")
+        self.btn_archivage.setStyleSheet("""
+            QPushButton {
+                background-color: #795548;
+                color: white;
+                border: none;
+                padding: 10px;
+                border-radius: 5px;
+                font-weight: bold;
+            }
+            QPushButton:hover {
+                background-color: #5D4037;
+            }
+        """)
+        self.btn_archivage.clicked.connect(self.archiver_images)
+        layout.addWidget(self.btn_archivage)
+        
+        # État de la surveillance du dossier capteur
+        self.label_capteur = QLabel()
+        self.label_capteur.setStyleSheet("color: #666; font-style: italic;")
+        self.label_capteur.setWordWrap(True)
+        layout.addWidget(self.label_capteur)
+        
         return group
     
     def create_viewer_section(self):
@@ -597,7 +1439,13 @@ class ImagerieView(QWidget):
         zoom_layout.addWidget(self.btn_zoom_in)
         
         layout.addLayout(zoom_layout)
-        
+
+        # Réglages de contraste (radiographies en niveaux de gris)
+        layout.addLayout(self.create_contraste_layout())
+
+        # Filtres d'amélioration (aperçu réduit puis pleine résolution)
+        layout.addLayout(self.create_filtres_layout())
+
         # Visualiseur d'image - CORRIGÉ
         scroll_area = QScrollArea()
         scroll_area.setWidgetResizable(False)
@@ -608,9 +1456,224 @@ class ImagerieView(QWidget):
         scroll_area.setWidget(self.image_viewer)
         
         layout.addWidget(scroll_area)
-        
+
         return group
-    
+
+    def create_contraste_layout(self):
+        """Crée les curseurs niveau/fenêtre, gamma et inversion"""
+        contraste_layout = QGridLayout()
+
+        self.slider_niveau = QSlider(Qt.Orientation.Horizontal)
+        self.slider_fenetre = QSlider(Qt.Orientation.Horizontal)
+        self.slider_fenetre.setMinimum(1)
+        self.slider_gamma = QSlider(Qt.Orientation.Horizontal)
+        self.slider_gamma.setRange(20, 300)  # gamma x 100
+        self.slider_gamma.setValue(100)
+
+        self.label_niveau = QLabel("-")
+        self.label_fenetre = QLabel("-")
+        self.label_gamma = QLabel("1.00")
+
+        contraste_layout.addWidget(QLabel("Niveau:"), 0, 0)
+        contraste_layout.addWidget(self.slider_niveau, 0, 1)
+        contraste_layout.addWidget(self.label_niveau, 0, 2)
+        contraste_layout.addWidget(QLabel("Fenêtre:"), 1, 0)
+        contraste_layout.addWidget(self.slider_fenetre, 1, 1)
+        contraste_layout.addWidget(self.label_fenetre, 1, 2)
+        contraste_layout.addWidget(QLabel("Gamma:"), 2, 0)
+        contraste_layout.addWidget(self.slider_gamma, 2, 1)
+        contraste_layout.addWidget(self.label_gamma, 2, 2)
+
+        self.check_inverser = QCheckBox("Inverser")
+        contraste_layout.addWidget(self.check_inverser, 3, 0)
+
+        self.btn_reset_contraste = QPushButton("Contraste par défaut")
+        self.btn_reset_contraste.clicked.connect(self.reset_contraste)
+        contraste_layout.addWidget(self.btn_reset_contraste, 3, 1, 1, 2)
+
+        # Mise à jour en temps réel pendant le glissement des curseurs
+        self.slider_niveau.valueChanged.connect(self.contraste_change)
+        self.slider_fenetre.valueChanged.connect(self.contraste_change)
+        self.slider_gamma.valueChanged.connect(self.contraste_change)
+        self.check_inverser.toggled.connect(self.contraste_change)
+
+        self.activer_contraste(False)
+        return contraste_layout
+
+    def activer_contraste(self, actif):
+        """Active ou désactive les réglages de contraste"""
+        for widget in (self.slider_niveau, self.slider_fenetre, self.slider_gamma,
+                       self.check_inverser, self.btn_reset_contraste):
+            widget.setEnabled(actif)
+
+    def initialiser_contraste(self):
+        """Synchronise les curseurs avec le fenêtrage de l'image chargée"""
+        if not self.image_viewer.est_radiographie():
+            self.activer_contraste(False)
+            return
+
+        centre, largeur, gamma, inverser = self.image_viewer.fenetrage
+        valeur_max = self.image_viewer.radiographie.valeur_max
+
+        widgets = (self.slider_niveau, self.slider_fenetre, self.slider_gamma, self.check_inverser)
+        for widget in widgets:
+            widget.blockSignals(True)
+        self.slider_niveau.setRange(0, valeur_max)
+        self.slider_fenetre.setRange(1, valeur_max + 1)
+        self.slider_niveau.setValue(centre)
+        self.slider_fenetre.setValue(largeur)
+        self.slider_gamma.setValue(int(gamma * 100))
+        self.check_inverser.setChecked(inverser)
+        for widget in widgets:
+            widget.blockSignals(False)
+
+        self.mettre_a_jour_labels_contraste()
+        self.activer_contraste(True)
+
+    def mettre_a_jour_labels_contraste(self):
+        """Affiche les valeurs courantes des curseurs"""
+        self.label_niveau.setText(str(self.slider_niveau.value()))
+        self.label_fenetre.setText(str(self.slider_fenetre.value()))
+        self.label_gamma.setText(f"{self.slider_gamma.value() / 100:.2f}")
+
+    def contraste_change(self):
+        """Applique le nouveau fenêtrage à l'image affichée"""
+        self.mettre_a_jour_labels_contraste()
+        self.image_viewer.appliquer_fenetrage(
+            self.slider_niveau.value(),
+            self.slider_fenetre.value(),
+            self.slider_gamma.value() / 100,
+            self.check_inverser.isChecked()
+        )
+        if parametres_actifs(self.parametres_filtres()):
+            self.filtres_change()
+
+    def reset_contraste(self):
+        """Revient au fenêtrage calculé automatiquement"""
+        if not self.image_viewer.est_radiographie():
+            return
+        centre, largeur = self.image_viewer.radiographie.fenetrage_par_defaut()
+        self.image_viewer.appliquer_fenetrage(centre, largeur, 1.0, False)
+        self.initialiser_contraste()
+        if parametres_actifs(self.parametres_filtres()):
+            self.filtres_change()
+
+    def create_filtres_layout(self):
+        """Crée les réglages des filtres d'amélioration"""
+        filtres_layout = QGridLayout()
+
+        self.slider_clahe = QSlider(Qt.Orientation.Horizontal)
+        self.slider_clahe.setRange(0, 40)  # limite d'écrêtage x 10
+        self.slider_nettete = QSlider(Qt.Orientation.Horizontal)
+        self.slider_nettete.setRange(0, 300)  # %
+        self.slider_contours = QSlider(Qt.Orientation.Horizontal)
+        self.slider_contours.setRange(0, 200)  # %
+
+        self.debruitage_combo = QComboBox()
+        self.debruitage_combo.addItem("Aucun", 0)
+        self.debruitage_combo.addItem("Léger (3x3)", 3)
+        self.debruitage_combo.addItem("Fort (5x5)", 5)
+
+        filtres_layout.addWidget(QLabel("Égalisation:"), 0, 0)
+        filtres_layout.addWidget(self.slider_clahe, 0, 1)
+        filtres_layout.addWidget(QLabel("Netteté:"), 0, 2)
+        filtres_layout.addWidget(self.slider_nettete, 0, 3)
+        filtres_layout.addWidget(QLabel("Contours:"), 1, 0)
+        filtres_layout.addWidget(self.slider_contours, 1, 1)
+        filtres_layout.addWidget(QLabel("Débruitage:"), 1, 2)
+        filtres_layout.addWidget(self.debruitage_combo, 1, 3)
+
+        self.btn_reset_filtres = QPushButton("Sans filtre")
+        self.btn_reset_filtres.clicked.connect(self.reset_filtres)
+        filtres_layout.addWidget(self.btn_reset_filtres, 2, 3)
+
+        # Pleine résolution calculée quand les réglages ne bougent plus
+        self.timer_filtrage = QTimer(self)
+        self.timer_filtrage.setSingleShot(True)
+        self.timer_filtrage.setInterval(300)
+        self.timer_filtrage.timeout.connect(self.lancer_filtrage_complet)
+        self.filtrage_workers = []
+
+        self.slider_clahe.valueChanged.connect(self.filtres_change)
+        self.slider_nettete.valueChanged.connect(self.filtres_change)
+        self.slider_contours.valueChanged.connect(self.filtres_change)
+        self.debruitage_combo.currentIndexChanged.connect(self.filtres_change)
+
+        self.activer_filtres(False)
+        return filtres_layout
+
+    def activer_filtres(self, actif):
+        """Active ou désactive les réglages des filtres"""
+        for widget in (self.slider_clahe, self.slider_nettete, self.slider_contours,
+                       self.debruitage_combo, self.btn_reset_filtres):
+            widget.setEnabled(actif)
+
+    def parametres_filtres(self):
+        return {
+            'clahe': self.slider_clahe.value(),
+            'nettete': self.slider_nettete.value(),
+            'debruitage': self.debruitage_combo.currentData(),
+            'contours': self.slider_contours.value()
+        }
+
+    def filtres_change(self):
+        """Aperçu immédiat sur image réduite, pleine résolution différée"""
+        if not self.image_viewer.chemin or self.image_viewer.current_pixmap is None:
+            return
+
+        parametres = self.parametres_filtres()
+        if not parametres_actifs(parametres):
+            self.timer_filtrage.stop()
+            self.image_viewer.retirer_filtres()
+            return
+
+        image = lire_cache(self.image_viewer.cle_filtrage(parametres))
+        if image is not None:
+            self.timer_filtrage.stop()
+            self.image_viewer.afficher_qimage(image)
+            return
+
+        try:
+            self.image_viewer.apercu_filtres(parametres)
+        except Exception as e:
+            QMessageBox.warning(self, "Erreur", f"Erreur lors de l'application des filtres: {e}")
+            return
+        self.timer_filtrage.start()
+
+    def lancer_filtrage_complet(self):
+        """Calcule les filtres en pleine résolution dans un thread"""
+        parametres = self.parametres_filtres()
+        cle = self.image_viewer.cle_filtrage(parametres)
+        try:
+            tableau = self.image_viewer.tableau_base()
+        except Exception:
+            return
+
+        worker = FiltrageWorker(cle, tableau, parametres, self)
+        worker.termine.connect(self.filtrage_termine)
+        worker.finished.connect(lambda w=worker: self.filtrage_workers.remove(w))
+        self.filtrage_workers.append(worker)
+        worker.start()
+
+    def filtrage_termine(self, cle, image):
+        ecrire_cache(cle, image)
+        # Ignorer un résultat devenu obsolète (réglages ou image changés entre-temps)
+        if cle == self.image_viewer.cle_filtrage(self.parametres_filtres()):
+            self.image_viewer.afficher_qimage(image)
+
+    def reset_filtres(self):
+        """Désactive tous les filtres"""
+        widgets = (self.slider_clahe, self.slider_nettete, self.slider_contours, self.debruitage_combo)
+        for widget in widgets:
+            widget.blockSignals(True)
+        self.slider_clahe.setValue(0)
+        self.slider_nettete.setValue(0)
+        self.slider_contours.setValue(0)
+        self.debruitage_combo.setCurrentIndex(0)
+        for widget in widgets:
+            widget.blockSignals(False)
+        self.filtres_change()
+
     def create_image_info_section(self):
         """Crée la section des informations de l'image"""
         group = QGroupBox("Informations de l'Image")
@@ -627,11 +1690,15 @@ class ImagerieView(QWidget):
         self.meta_type = QLabel("-")
         self.meta_date = QLabel("-")
         self.meta_patient = QLabel("-")
+        self.meta_dimensions = QLabel("-")
+        self.meta_taille = QLabel("-")
         
         general_layout.addRow("Nom:", self.meta_nom)
         general_layout.addRow("Type:", self.meta_type)
         general_layout.addRow("Date:", self.meta_date)
         general_layout.addRow("Patient:", self.meta_patient)
+        general_layout.addRow("Dimensions:", self.meta_dimensions)
+        general_layout.addRow("Taille:", self.meta_taille)
         
         tabs.addTab(general_tab, "Général")
         
@@ -672,10 +1739,14 @@ class ImagerieView(QWidget):
         
         # Vider l'affichage actuel
         self.image_viewer.setText("Aucune image sélectionnée")
+        self.activer_contraste(False)
+        self.activer_filtres(False)
         self.clear_image_info()
         self.image_actuelle = None
         self.btn_supprimer.setEnabled(False)
         self.btn_exporter.setEnabled(False)
+        self.btn_similaires.setEnabled(False)
+        self.btn_comparer.setEnabled(False)
         
         # Charger les images du nouveau patient
         self.image_list.charger_images_patient(self.patient_actuel)
@@ -693,12 +1764,17 @@ class ImagerieView(QWidget):
             return
         
         try:
-            # Charger toutes les images du patient d'abord
-            images = db.obtenir_images_patient(patient_id)
-            
-            # Filtrer par type si spécifié
-            if type_filtre and type_filtre != "Tous":
-                images = [img for img in images if img.get('type_image') == type_filtre]
+            # Filtrage et tri délégués à SQLite (colonnes indexées)
+            tri, descendant = self.tri_combo.currentData()
+            cote_min = self.resolution_combo.currentData()
+            images = db.rechercher_images(
+                patient_id,
+                type_image=type_filtre if type_filtre and type_filtre != "Tous" else None,
+                date_debut=self.date_debut_filtre(),
+                cote_min=cote_min,
+                tri=tri,
+                descendant=descendant
+            )
             
             # Mettre à jour la liste avec les images filtrées
             self.image_list.clear()
@@ -711,31 +1787,70 @@ class ImagerieView(QWidget):
             QMessageBox.critical(self, "Erreur", f"Erreur lors du filtrage: {str(e)}")
 
     
+    def date_debut_filtre(self):
+        """Date de début correspondant au filtre « Depuis » (YYYY-MM-DD ou None)"""
+        aujourd_hui = QDate.currentDate()
+        periode = self.date_combo.currentText()
+        
+        if periode == "Aujourd'hui":
+            debut = aujourd_hui
+        elif periode == "Cette semaine":
+            debut = aujourd_hui.addDays(1 - aujourd_hui.dayOfWeek())
+        elif periode == "Ce mois":
+            debut = QDate(aujourd_hui.year(), aujourd_hui.month(), 1)
+        elif periode == "Cette année":
+            debut = QDate(aujourd_hui.year(), 1, 1)
+        else:
+            return None
+        
+        return debut.toString("yyyy-MM-dd")
+    
     def on_image_selected(self, image_path, metadata):
         """Gère la sélection d'une image - VERSION CORRIGÉE"""
         
         # Stocker l'image actuelle
         self.image_actuelle = metadata
         
-        # Charger l'image dans le visualiseur
+        # Charger l'image dans le visualiseur (restaurée si archivée)
+        image_path = rendre_disponible(metadata) or image_path
         self.image_viewer.load_image(image_path)
+        self.initialiser_contraste()
         
+        # Les réglages de filtres sont conservés d'une image à l'autre
+        self.activer_filtres(self.image_viewer.current_pixmap is not None
+                             and not self.image_viewer.current_pixmap.isNull())
+        if parametres_actifs(self.parametres_filtres()):
+            self.filtres_change()
+
         # Mettre à jour les métadonnées
         self.update_image_info(metadata)
         
         # Activer les boutons d'action
         self.btn_supprimer.setEnabled(True)
         self.btn_exporter.setEnabled(True)
+        self.btn_similaires.setEnabled(True)
+        self.btn_comparer.setEnabled(True)
     
     def update_image_info(self, metadata):
         """Met à jour les informations de l'image"""
         self.meta_nom.setText(metadata.get("nom_fichier", "-"))
         self.meta_type.setText(metadata.get("type_image", "-"))
         
-        date_creation = metadata.get("date_creation", "")
+        date_creation = metadata.get("date_capture") or metadata.get("date_creation", "")
         date_affichage = date_creation[:10] if date_creation else "-"
         self.meta_date.setText(date_affichage)
         
+        if metadata.get("largeur") and metadata.get("hauteur"):
+            dimensions = f"{metadata['largeur']} x {metadata['hauteur']} px"
+            if metadata.get("profondeur_bits"):
+                dimensions += f" ({metadata['profondeur_bits']} bits)"
+            self.meta_dimensions.setText(dimensions)
+        else:
+            self.meta_dimensions.setText("-")
+        
+        taille = metadata.get("taille_fichier")
+        self.meta_taille.setText(f"{taille / 1024:.0f} Ko" if taille else "-")
+        
         # Obtenir le nom du patient
         try:
             patient_id = metadata.get("patient_id")
@@ -758,6 +1873,8 @@ class ImagerieView(QWidget):
         self.meta_type.setText("-")
         self.meta_date.setText("-")
         self.meta_patient.setText("-")
+        self.meta_dimensions.setText("-")
+        self.meta_taille.setText("-")
         self.meta_description.setPlainText("")
     
     def zoom_in(self):
@@ -800,6 +1917,13 @@ class ImagerieView(QWidget):
                 
                 # Copier le fichier vers le dossier de données
                 shutil.copy2(image_data['chemin_source'], chemin_dest)
+                copier_parametres_raw(image_data['chemin_source'], chemin_dest)
+                
+                # Métadonnées indexées (dimensions, date de prise de vue, empreinte)
+                metadonnees = extraire_metadonnees(image_data['chemin_source'])
+                metadonnees['hash_fichier'] = calculer_hash(chemin_dest)
+                metadonnees['hash_perceptuel'] = calculer_dhash(chemin_dest)
+                generer_miniature(chemin_dest, chemin_miniature(nom_fichier))
                 
                 # Ajouter à la base de données
                 image_id = db.ajouter_image(
@@ -807,11 +1931,20 @@ class ImagerieView(QWidget):
                     nom_fichier,
                     image_data['type'],
                     chemin_dest,
-                    image_data['description']
+                    image_data['description'],
+                    metadonnees
                 )
                 
                 if image_id:
-                    QMessageBox.information(self, "Succès", "Image ajoutée avec succès!")
+                    similaires = rechercher_similaires(metadonnees['hash_perceptuel'],
+                                                       image_data['patient_id'], image_id)
+                    if similaires:
+                        reference = db.obtenir_image_par_id(similaires[0][1])
+                        QMessageBox.warning(self, "Image similaire",
+                                            f"Image ajoutée, mais elle semble identique à "
+                                            f"'{reference.get('nom_fichier', '?')}' déjà présente dans le dossier du patient.")
+                    else:
+                        QMessageBox.information(self, "Succès", "Image ajoutée avec succès!")
                     # Recharger les images si c'est le patient actuel
                     if self.patient_actuel == image_data['patient_id']:
                         self.image_list.charger_images_patient(self.patient_actuel)
@@ -822,6 +1955,129 @@ class ImagerieView(QWidget):
                 QMessageBox.critical(self, "Erreur", f"Erreur lors de l'ajout de l'image: {str(e)}")
                 #print(f"❌ Erreur lors de l'ajout: {e}")
     
+    def importer_lot(self, fichiers=None):
+        """Importe un lot d'images (fichiers multiples, dossier)"""
+        dialog = ImportLotDialog(self, fichiers)
+        
+        accepte = dialog.exec() == QDialog.DialogCode.Accepted
+        if (accepte and dialog.images_importees) or dialog.import_interrompu:
+            # Un import interrompu a pu enregistrer une partie du lot
+            if self.patient_actuel == dialog.get_patient_id():
+                self.image_list.charger_images_patient(self.patient_actuel)
+        
+        # La configuration du capteur a pu changer
+        self.configurer_surveillance_capteur()
+    
+    def configurer_surveillance_capteur(self):
+        """Démarre ou arrête la surveillance selon la configuration"""
+        config = charger_config_imagerie()
+        dossier = config.get("dossier_capteur", "")
+        
+        if config.get("surveillance_active") and dossier:
+            if self.surveillance_capteur.dossier != dossier:
+                if not self.surveillance_capteur.demarrer(dossier):
+                    self.label_capteur.setText(f"Dossier capteur introuvable: {dossier}")
+                    return
+            self.label_capteur.setText(f"Surveillance du capteur: {dossier}")
+        else:
+            self.surveillance_capteur.arreter()
+            self.label_capteur.setText("")
+    
+    def importer_fichiers_capteur(self, fichiers):
+        """Importe en arrière-plan les nouvelles images du capteur pour le patient actif"""
+        if not self.patient_actuel:
+            self.label_capteur.setText(f"{len(fichiers)} nouvelle(s) image(s) capteur ignorée(s): aucun patient sélectionné")
+            return
+        
+        config = charger_config_imagerie()
+        worker = ImportLotWorker(fichiers, self.patient_actuel, config.get("type_capteur", TYPES_IMAGES[1]), parent=self)
+        worker.termine.connect(lambda images, erreurs, w=worker: self.import_capteur_termine(w, images, erreurs))
+        self.imports_capteur.append(worker)
+        worker.start()
+    
+    def import_capteur_termine(self, worker, images, erreurs):
+        if worker in self.imports_capteur:
+            self.imports_capteur.remove(worker)
+        
+        message = f"{len(images)} image(s) capteur importée(s)"
+        if erreurs:
+            message += f", {len(erreurs)} avertissement(s)"
+        self.label_capteur.setText(message)
+        
+        if images and self.patient_actuel == images[0]['patient_id']:
+            self.image_list.charger_images_patient(self.patient_actuel)
+    
+    def rechercher_images_similaires(self):
+        """Recherche dans toute la clinique les images quasi identiques à l'image sélectionnée"""
+        if not self.image_actuelle or not self.image_actuelle.get("id"):
+            QMessageBox.warning(self, "Erreur", "Aucune image sélectionnée.")
+            return
+        
+        self.btn_similaires.setEnabled(False)
+        self.btn_similaires.setText("Recherche...")
+        self.recherche_similaires = RechercheSimilairesWorker(self.image_actuelle, parent=self)
+        self.recherche_similaires.termine.connect(self.afficher_images_similaires)
+        self.recherche_similaires.start()
+    
+    def afficher_images_similaires(self, resultats):
+        self.btn_similaires.setText("Images similaires")
+        self.btn_similaires.setEnabled(self.image_actuelle is not None)
+        
+        if not resultats:
+            QMessageBox.information(self, "Images similaires", "Aucune image similaire trouvée.")
+            return
+        
+        lignes = []
+        for distance, image in resultats[:20]:
+            patient = db.obtenir_patient(image['patient_id'])
+            nom_patient = f"{patient['nom']} {patient['prenom']}" if patient else f"patient {image['patient_id']}"
+            date = (image.get('date_capture') or image.get('date_creation') or '')[:10]
+            lignes.append(f"• {image['nom_fichier']} ({nom_patient}, {date}) - distance {distance}")
+        if len(resultats) > 20:
+            lignes.append(f"... et {len(resultats) - 20} autre(s)")
+        
+        QMessageBox.information(self, "Images similaires",
+                                f"{len(resultats)} image(s) similaire(s):\n\n" + "\n".join(lignes))
+    
+    def comparer_images(self):
+        """Compare l'image sélectionnée à une autre image du même patient"""
+        if not self.image_actuelle:
+            QMessageBox.warning(self, "Erreur", "Aucune image sélectionnée.")
+            return
+        
+        autres = [img for img in db.obtenir_images_patient(self.image_actuelle.get("patient_id"))
+                  if img['id'] != self.image_actuelle.get("id")]
+        if not autres:
+            QMessageBox.information(self, "Comparaison", "Aucune autre image pour ce patient.")
+            return
+        
+        libelles = [f"{img['nom_fichier']} - {img['type_image']} ({(img.get('date_capture') or img.get('date_creation') or '')[:10]})"
+                    for img in autres]
+        choix, ok = QInputDialog.getItem(self, "Comparer avec...", "Image de comparaison:", libelles, 0, False)
+        if not ok:
+            return
+        
+        # L'image la plus ancienne sert de référence (avant / après)
+        autre = autres[libelles.index(choix)]
+        reference, comparaison = sorted(
+            (self.image_actuelle, autre),
+            key=lambda img: img.get("date_capture") or img.get("date_creation") or "")
+        
+        for image in (reference, comparaison):
+            image["chemin_fichier"] = rendre_disponible(image) or image.get("chemin_fichier", "")
+        
+        dialog = ComparaisonDialog(reference, comparaison, self)
+        dialog.exec()
+    
+    def archiver_images(self):
+        """Ouvre le dialog d'archivage du dossier des images"""
+        dialog = ArchivageDialog(self)
+        dialog.exec()
+        
+        # Chemins et formats ont pu changer
+        if self.patient_actuel:
+            self.image_list.charger_images_patient(self.patient_actuel)
+    
     def supprimer_image(self):
         """Supprime l'image sélectionnée - VERSION CORRIGÉE"""
         if not self.image_actuelle:
@@ -846,8 +2102,17 @@ class ImagerieView(QWidget):
                     success = db.supprimer_image(image_id)
                     
                     if success:
+                        # Retirer aussi la copie archivée
+                        try:
+                            retirer_de_archive(self.image_actuelle)
+                        except Exception:
+                            pass
                         # Supprimer le fichier physique
+                        miniature = chemin_miniature(nom_image)
+                        if os.path.exists(miniature):
+                            os.remove(miniature)
                         chemin_fichier = self.image_actuelle.get("chemin_fichier")
+                        self.image_viewer.fermer_image_mappee()
                         if chemin_fichier and os.path.exists(chemin_fichier):
                             try:
                                 os.remove(chemin_fichier)
@@ -858,10 +2123,14 @@ class ImagerieView(QWidget):
                         # Recharger la liste et vider l'affichage
                         self.image_list.charger_images_patient(self.patient_actuel)
                         self.image_viewer.setText("Aucune image sélectionnée")
+                        self.activer_contraste(False)
+                        self.activer_filtres(False)
                         self.clear_image_info()
                         self.image_actuelle = None
                         self.btn_supprimer.setEnabled(False)
                         self.btn_exporter.setEnabled(False)
+                        self.btn_similaires.setEnabled(False)
+                        self.btn_comparer.setEnabled(False)
                     else:
                         QMessageBox.warning(self, "Erreur", "Erreur lors de la suppression de l'image.")
                 else:
@@ -877,15 +2146,15 @@ class ImagerieView(QWidget):
             return
         
         # Obtenir le chemin source
-        chemin_source = self.image_actuelle.get("chemin_fichier")
+        chemin_source = rendre_disponible(self.image_actuelle)
         if not chemin_source or not os.path.exists(chemin_source):
             QMessageBox.warning(self, "Erreur", "Fichier image non trouvé.")
             return
         
-        # Proposer un nom de fichier par défaut
+        # Proposer un nom de fichier par défaut (le format a pu changer à la recompression)
         nom_original = self.image_actuelle.get("nom_fichier", "image")
-        extension = os.path.splitext(nom_original)[1]
-        nom_propose = f"{nom_original}"
+        extension = os.path.splitext(chemin_source)[1]
+        nom_propose = f"{os.path.splitext(nom_original)[0]}{extension}"
         default_path = os.path.join(path_manager.get_exports_folder(), nom_propose)
         # Dialogue de sauvegarde
         chemin_dest, _ = QFileDialog.getSaveFileName(
@@ -919,7 +2188,11 @@ class ImagerieView(QWidget):
         
         # Vider l'affichage actuel
         self.image_viewer.setText("Aucune image sélectionnée")
+        self.activer_contraste(False)
+        self.activer_filtres(False)
         self.clear_image_info()
         self.image_actuelle = None
         self.btn_supprimer.setEnabled(False)
-        self.btn_exporter.setEnabled(False)
\ No newline at end of file
+        self.btn_exporter.setEnabled(False)
+        self.btn_similaires.setEnabled(False)
+        self.btn_comparer.setEnabled(False)
\ No newline at end of file
@@ -5,7 +5,7 @@ from PySide6.QtWidgets import (QWidget, QHBoxLayout, QVBoxLayout, QLabel,
                              QSplitter, QTextEdit, QSpinBox, QFormLayout,
                              QDialog, QDialogButtonBox, QMessageBox, QFileDialog,
                              QTabWidget, QCheckBox)
-from PySide6.QtCore import Qt, QDate, Signal
+from PySide6.QtCore import Qt, QDate, Signal, QTimer
 from PySide6.QtGui import QFont, QPixmap, QPainter, QPen
 from PySide6.QtPrintSupport import QPrinter, QPrintDialog
 import os
@@ -15,17 +15,9 @@ from datetime import datetime
 from database import db
 from src.patient_context import patient_context
 from src.path_manager import path_manager
+from src.modele_ordonnance import charger_config_cabinet, REPORTLAB_AVAILABLE
+from src.file_pdf import file_pdf
 
-# Import pour la génération PDF
-try:
-    from reportlab.lib.pagesizes import A4
-    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Image
-    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-    from reportlab.lib.units import cm
-    from reportlab.lib import colors
-    REPORTLAB_AVAILABLE = True
-except ImportError:
-    REPORTLAB_AVAILABLE = False
 
 class ConfigurationCabinetDialog(QDialog):
     """Dialogue pour configurer les informations du cabinet"""
@@ -333,9 +325,19 @@ class ConfigurationCabinetDialog(QDialog):
         except Exception as e:
             QMessageBox.critical(self, "Erreur", f"Erreur lors de la sauvegarde:\n{str(e)}")
 
+# Délai sans saisie avant de mettre l'aperçu à jour (ms)
+DELAI_APERCU = 250
+
+
+def formater_posologie(data):
+    """Posologie d'un médicament telle qu'imprimée sur l'ordonnance"""
+    return f"{data['quantite']}{data['forme']} x {data['frequence']} par jour – pendant {data['duree']}"
+
+
 class MedicamentWidget(QWidget):
     """Widget pour un médicament dans l'ordonnance - CHAMPS SÉPARÉS"""
     supprimer_clicked = Signal(object)
+    modifie = Signal()  # N'importe quel champ a changé (aperçu à mettre à jour)
     
     def __init__(self, medicament_data=None):
         super().__init__()
@@ -343,6 +345,13 @@ class MedicamentWidget(QWidget):
         
         if medicament_data:
             self.charger_medicament(medicament_data)
+        
+        self.nom_edit.textChanged.connect(self.modifie)
+        self.dosage_edit.textChanged.connect(self.modifie)
+        self.forme_combo.currentTextChanged.connect(self.modifie)
+        self.quantite_spin.valueChanged.connect(self.modifie)
+        self.frequence_spin.valueChanged.connect(self.modifie)
+        self.duree_edit.textChanged.connect(self.modifie)
     
     def setup_ui(self):
         layout = QHBoxLayout(self)
@@ -442,8 +451,7 @@ class MedicamentWidget(QWidget):
     
     def get_posologie_formatee(self):
         """Retourne la posologie formatée pour l'ordonnance"""
-        data = self.get_medicament_data()
-        return f"{data['quantite']}{data['forme']} x {data['frequence']} par jour – pendant {data['duree']}"
+        return formater_posologie(self.get_medicament_data())
 
 class OrdonnanceView(QWidget):
     def __init__(self):
@@ -451,6 +459,15 @@ class OrdonnanceView(QWidget):
         self.medicaments_widgets = []
         self.patient_actuel = None
         self.config_cabinet = self.charger_configuration_cabinet()
+        
+        # Aperçu : fragments HTML en cache (clé -> (entrées, html)), rendu différé pendant la saisie
+        self.fragments_apercu = {}
+        self.html_apercu = None
+        self.timer_apercu = QTimer(self)
+        self.timer_apercu.setSingleShot(True)
+        self.timer_apercu.setInterval(DELAI_APERCU)
+        self.timer_apercu.timeout.connect(self.actualiser_apercu)
+        
         self.setup_ui()
         self.charger_patients()
         
@@ -471,31 +488,7 @@ class OrdonnanceView(QWidget):
     
     def charger_configuration_cabinet(self):
         """Charge la configuration du cabinet depuis le dossier DentalSoft"""
-        config_file = os.path.join(path_manager.get_app_data_folder(), "config_cabinet.json")
-        
-        config_defaut = {
-            "nom_cabinet": "Cabinet Dentaire",
-            "nom_medecin": "Dr. Médecin",
-            "specialite": "Chirurgien-Dentiste",
-            "adresse": "",
-            "ville": "Tunis",
-            "code_postal": "",
-            "telephone1": "",
-            "telephone2": "",
-            "email": "",
-            "site_web": "",
-            "numero_ordre": "",
-            "chemin_logo": ""
-        }
-        
-        try:
-            if os.path.exists(config_file):
-                with open(config_file, 'r', encoding='utf-8') as f:
-                    config = json.load(f)
-                    config_defaut.update(config)
-            return config_defaut
-        except Exception:
-            return config_defaut
+        return charger_config_cabinet()
     
     def setup_ui(self):
         # Layout principal horizontal
@@ -595,6 +588,7 @@ class OrdonnanceView(QWidget):
         self.date_edit = QDateEdit()
         self.date_edit.setDate(QDate.currentDate())
         self.date_edit.setCalendarPopup(True)
+        self.date_edit.dateChanged.connect(self.planifier_apercu)
         layout.addRow("Date:", self.date_edit)
         
         return group
@@ -651,6 +645,7 @@ class OrdonnanceView(QWidget):
             "- Conserver les médicaments dans un endroit sec et frais"
         )
         self.recommandations_edit.setMaximumHeight(80)
+        self.recommandations_edit.textChanged.connect(self.planifier_apercu)
         layout.addWidget(self.recommandations_edit)
         
         return group
@@ -793,6 +788,7 @@ class OrdonnanceView(QWidget):
         """Ajoute un nouveau widget médicament"""
         medicament_widget = MedicamentWidget()
         medicament_widget.supprimer_clicked.connect(self.supprimer_medicament)
+        medicament_widget.modifie.connect(self.planifier_apercu)
         
         # Insérer avant le stretch
         self.medicaments_layout.insertWidget(len(self.medicaments_widgets), medicament_widget)
@@ -802,54 +798,99 @@ class OrdonnanceView(QWidget):
         """Supprime un widget médicament"""
         if len(self.medicaments_widgets) > 1:
             self.medicaments_widgets.remove(widget)
+            self.fragments_apercu.pop(widget, None)
             widget.deleteLater()
+            self.planifier_apercu()
+    
+    def planifier_apercu(self):
+        """Reporte la mise à jour de l'aperçu jusqu'à la fin de la saisie"""
+        self.timer_apercu.start()
+    
+    def fragment_apercu(self, cle, entrees, construire):
+        """Fragment HTML de l'aperçu, reconstruit seulement si ses entrées ont changé"""
+        en_cache = self.fragments_apercu.get(cle)
+        if en_cache is not None and en_cache[0] == entrees:
+            return en_cache[1]
+        html = construire(*entrees)
+        self.fragments_apercu[cle] = (entrees, html)
+        return html
     
     def actualiser_apercu(self):
         """Met à jour l'aperçu de l'ordonnance selon le format exact du modèle"""
+        self.timer_apercu.stop()
+        config = self.config_cabinet
+        
+        fragments = [
+            self.fragment_apercu('entete', (config['nom_medecin'], config['specialite'], config['nom_cabinet']),
+                                 self._html_entete),
+            self.fragment_apercu('date', (config.get('ville', 'Monastir'), self.date_edit.date().toString('dd/MM/yyyy')),
+                                 self._html_date),
+            self.fragment_apercu('patient', (self.patient_combo.currentText(), self.age_label.text()),
+                                 self._html_patient),
+            # Prescription avec format exact du modèle
+            "<h3 style='color: #2c3e50; font-size: 18px; margin: 30px 0 20px 0; font-weight: bold;'>Prescription:</h3>"
+        ]
+        
+        # Médicaments : un fragment par widget
+        for widget in self.medicaments_widgets:
+            fragments.append(self.fragment_apercu(widget, (widget.get_medicament_data(),), self._html_medicament))
+        
+        fragments.append(self.fragment_apercu('recommandations', (self.recommandations_edit.toPlainText(),),
+                                              self._html_recommandations))
+        fragments.append(self.fragment_apercu('pied', tuple(config.get(cle, '') for cle in (
+            'nom_medecin', 'telephone1', 'telephone2', 'email', 'adresse', 'code_postal', 'ville')),
+                                              self._html_pied))
+        
+        html = "".join(fragments)
+        if html == self.html_apercu:
+            return  # Rien n'a changé : le document affiché est conservé
+        self.html_apercu = html
+        
+        # Remplacer le document sans faire sauter la position de lecture
+        defilement = self.apercu_text.verticalScrollBar().value()
+        self.apercu_text.setHtml(html)
+        self.apercu_text.verticalScrollBar().setValue(defilement)
+    
+    def _html_entete(self, nom_medecin, specialite, nom_cabinet):
         # En-tête simple et propre
-        html = f"""
+        return f"""
         <div style="text-align: left; margin-bottom: 40px;">
-            <h1 style="color: #2c3e50; margin: 0; font-size: 24px; font-weight: bold;">{self.config_cabinet['nom_medecin']}</h1>
-            <h2 style="color: #34495e; margin: 5px 0; font-size: 18px;">{self.config_cabinet['specialite']}</h2>
-            <h3 style="color: #7f8c8d; margin: 5px 0; font-size: 16px; font-style: italic;">{self.config_cabinet['nom_cabinet']}</h3>
+            <h1 style="color: #2c3e50; margin: 0; font-size: 24px; font-weight: bold;">{nom_medecin}</h1>
+            <h2 style="color: #34495e; margin: 5px 0; font-size: 18px;">{specialite}</h2>
+            <h3 style="color: #7f8c8d; margin: 5px 0; font-size: 16px; font-style: italic;">{nom_cabinet}</h3>
         </div>
         """
-        
+    
+    def _html_date(self, ville, date):
         # Date et ville en haut à droite
-        date = self.date_edit.date().toString('dd/MM/yyyy')
-        ville = self.config_cabinet.get('ville', 'Monastir')
-        html += f"""
+        return f"""
         <div style="text-align: right; margin-bottom: 30px;">
             <p style="margin: 0; font-weight: bold; font-size: 14px;">{ville}, le {date}</p>
         </div>
         """
-        
+    
+    def _html_patient(self, patient_nom, age):
         # Informations patient
-        patient_nom = self.patient_combo.currentText()
-        if patient_nom != "Sélectionner un patient...":
-            age = self.age_label.text()
-            html += f"""
+        if patient_nom == "Sélectionner un patient...":
+            return ""
+        return f"""
             <div style="margin-bottom: 10px;">
                 <p style="margin: 0; font-size: 16px; font-weight: bold;">Nom & Prénom: {patient_nom}</p>
                 <p style="margin: 5px 0 0 0; font-size: 14px;">Âge: {age}</p>
             </div>
             """
+    
+    def _html_medicament(self, data):
+        # Format exact: Nom (dosage) puis posologie avec flèche
+        if not data['nom']:
+            return ""
+        nom_complet = data['nom']
+        if data['dosage']:
+            nom_complet += f" ({data['dosage']})"
         
-        # Prescription avec format exact du modèle
-        html += "<h3 style='color: #2c3e50; font-size: 18px; margin: 30px 0 20px 0; font-weight: bold;'>Prescription:</h3>"
+        posologie = formater_posologie(data)
         
-        # Médicaments avec format EXACT du modèle
-        for i, widget in enumerate(self.medicaments_widgets, 1):
-            data = widget.get_medicament_data()
-            if data['nom']:
-                # Format exact: Nom (dosage) puis posologie avec flèche
-                nom_complet = data['nom']
-                if data['dosage']:
-                    nom_complet += f" ({data['dosage']})"
-                
-                posologie = widget.get_posologie_formatee()
-                
-                html += f"""
+        return f"""
                 <div style="margin-bottom: 25px;">
                     <p style="margin: 0; font-size: 16px; font-weight: bold; color: #2c3e50;">{nom_complet}</p>
                     <p style="margin: 5px 0 0 20px; font-size: 14px; color: #555;">
@@ -857,21 +898,22 @@ class OrdonnanceView(QWidget):
                     </p>
                 </div>
                 """
-        
-        # Recommandations
-        recommandations = self.recommandations_edit.toPlainText()
-        if recommandations:
-            html += "<h3 style='color: #2c3e50; font-size: 18px; margin: 40px 0 20px 0; font-weight: bold;'>Recommandations:</h3>"
-            for ligne in recommandations.split('\n'):
-                if ligne.strip():
-                    html += f"<p style='margin: 5px 0; font-size: 14px;'>{ligne}</p>"
-        
-
+    
+    def _html_recommandations(self, recommandations):
+        if not recommandations:
+            return ""
+        html = "<h3 style='color: #2c3e50; font-size: 18px; margin: 40px 0 20px 0; font-weight: bold;'>Recommandations:</h3>"
+        for ligne in recommandations.split('\n'):
+            if ligne.strip():
+                html += f"<p style='margin: 5px 0; font-size: 14px;'>{ligne}</p>"
+        return html
+    
+    def _html_pied(self, nom_medecin, telephone1, telephone2, email, adresse, code_postal, ville):
         # Signature
-        html += f"""
+        html = f"""
         <div style="margin-top: 50px; text-align: right;">
             <p style="margin: 0; font-weight: bold; font-size: 14px;">Signature du médecin</p>
-            <p style="margin: 0; font-weight: bold; font-size: 14px;">{self.config_cabinet['nom_medecin']}</p>
+            <p style="margin: 0; font-weight: bold; font-size: 14px;">{nom_medecin}</p>
         </div>
         """
 
@@ -882,27 +924,20 @@ class OrdonnanceView(QWidget):
 
         # Informations de contact
         contact_info = []
-        if self.config_cabinet.get('telephone1'):
-            contact_info.append(f"Tél: {self.config_cabinet['telephone1']}")
-        if self.config_cabinet.get('telephone2'):
-            contact_info.append(f"Mobile: {self.config_cabinet['telephone2']}")
-        if self.config_cabinet.get('email'):
-            contact_info.append(f"Email: {self.config_cabinet['email']}")
+        if telephone1:
+            contact_info.append(f"Tél: {telephone1}")
+        if telephone2:
+            contact_info.append(f"Mobile: {telephone2}")
+        if email:
+            contact_info.append(f"Email: {email}")
 
-
-        if contact_info:
-            for info in contact_info:
-                html += f"<p style='margin: 5px 0; font-size: 12px; color: #7f8c8d;'>{info}</p>"
+        for info in contact_info:
+            html += f"<p style='margin: 5px 0; font-size: 12px; color: #7f8c8d;'>{info}</p>"
 
         # Adresse
-        adresse = self.config_cabinet.get('adresse', '')
-        code_postal = self.config_cabinet.get('code_postal', '')
-        ville = self.config_cabinet.get('ville', '')
-
         adresse_complete = f"{adresse}, {code_postal} {ville}".strip(", ")
         html += f"<p style='margin: 5px 0; font-size: 12px; color: #7f8c8d;'>{adresse_complete}</p>"
-
-        self.apercu_text.setHtml(html)
+        return html
     
     def generer_pdf(self):
         """Génère un PDF de l'ordonnance avec mise en page professionnelle"""
@@ -931,178 +966,22 @@ class OrdonnanceView(QWidget):
         if not fichier:
             return
         
-        try:
-            self._generer_pdf_reportlab_professionnel(fichier)
-            
-            # Sauvegarder en base de données
-            medicaments_json = json.dumps([w.get_medicament_data() for w in self.medicaments_widgets])
-            ordonnance_id = db.ajouter_ordonnance(
-                self.patient_actuel,
-                medicaments_json,
-                self.recommandations_edit.toPlainText(),
-                fichier,
-                self.date_edit.date().toString('yyyy-MM-dd')
-            )
-            
-            if ordonnance_id:
-                QMessageBox.information(self, "Succès", f"Ordonnance générée et sauvegardée:\n{fichier}")
-            else:
-                QMessageBox.warning(self, "Avertissement", f"PDF généré mais erreur de sauvegarde en base:\n{fichier}")
-                
-        except Exception as e:
-            QMessageBox.critical(self, "Erreur", f"Erreur lors de la génération du PDF:\n{str(e)}")
-    
-    def _generer_pdf_reportlab_professionnel(self, fichier):
-        """Génère le PDF avec mise en page EXACTE du modèle d'ordonnance"""
-        doc = SimpleDocTemplate(
-            fichier, 
-            pagesize=A4, 
-            topMargin=1*cm, 
-            bottomMargin=1*cm,
-            leftMargin=0.5*cm,
-            rightMargin=0.5*cm
-        )
-        styles = getSampleStyleSheet()
-        story = []
-        
-        # Styles personnalisés pour correspondre au modèle
-        title_style = ParagraphStyle(
-            'DoctorName',
-            parent=styles['Heading1'],
-            fontSize=22,
-            spaceAfter=5,
-            alignment=0,  # GAUCHE
-            textColor=colors.HexColor('#2c3e50'),
-            fontName='Helvetica-Bold'
-        )
-        
-        subtitle_style = ParagraphStyle(
-            'Specialty',
-            parent=styles['Heading2'],
-            fontSize=18,
-            spaceAfter=5,
-            alignment=0,  # GAUCHE
-            textColor=colors.HexColor('#34495e'),
-            fontName='Helvetica'
-        )
-        
-        cabinet_style = ParagraphStyle(
-            'Cabinet',
-            parent=styles['Heading3'],
-            fontSize=16,
-            spaceAfter=30,
-            alignment=0,  # GAUCHE
-            textColor=colors.HexColor('#7f8c8d'),
-            fontName='Helvetica-Oblique'
-        )
-        
-        # En-tête avec logo (si disponible)
-        logo_path = None
-        if self.config_cabinet.get('chemin_logo'):
-            if self.config_cabinet['chemin_logo'] == "defaut":
-                # Chercher le logo par défaut
-                logo_defaut = os.path.join(os.path.dirname(__file__), "..", "..", "assets", "icons", "logo_cabinet_defaut.png")
-                if os.path.exists(logo_defaut):
-                    logo_path = logo_defaut
-            elif os.path.exists(self.config_cabinet['chemin_logo']):
-                logo_path = self.config_cabinet['chemin_logo']
-        
-        if logo_path:
-            try:
-                # Table avec logo et informations
-                logo_img = Image(logo_path, width=2*cm, height=2*cm)
-                
-                # Informations du médecin
-                info_text = f"""
-                <b>{self.config_cabinet['nom_medecin']}</b><br/>
-                {self.config_cabinet['specialite']}<br/>
-                <i>{self.config_cabinet['nom_cabinet']}</i>
-                """
-                info_para = Paragraph(info_text, title_style)
-                
-                header_table = Table([[logo_img, info_para]], colWidths=[3*cm, 18*cm])
-                header_table.setStyle(TableStyle([
-                    ('ALIGN', (0, 0), (0, 0), 'CENTER'),
-                    ('ALIGN', (1, 0), (1, 0), 'CENTER'),
-                    ('VALIGN', (0, 0), (-1, -1), 'MIDDLE'),
-                ]))
-                story.append(header_table)
-            except Exception:
-                # Si erreur avec le logo, afficher sans logo
-                story.append(Paragraph(self.config_cabinet['nom_medecin'], title_style))
-                story.append(Paragraph(self.config_cabinet['specialite'], subtitle_style))
-                story.append(Paragraph(self.config_cabinet['nom_cabinet'], cabinet_style))
-        else:
-            # Sans logo - format simple et élégant
-            story.append(Paragraph(self.config_cabinet['nom_medecin'], title_style))
-            story.append(Paragraph(self.config_cabinet['specialite'], subtitle_style))
-            story.append(Paragraph(self.config_cabinet['nom_cabinet'], cabinet_style))
-        
-        story.append(Spacer(1, 20))
-        
-        # Date et ville en haut à droite
-        date = self.date_edit.date().toString('dd/MM/yyyy')
-        ville = self.config_cabinet.get('ville', 'Monastir')
-        
-        date_style = ParagraphStyle(
-            'DateStyle',
-            parent=styles['Normal'],
-            fontSize=14,
-            alignment=2,  # Aligné à droite
-            fontName='Helvetica-Bold'
-        )
-        
-        story.append(Paragraph(f"{ville}, le {date}", date_style))
-        story.append(Spacer(1, 30))
-        
-        # Informations patient
-        patient_nom = self.patient_combo.currentText()
-        age = self.age_label.text()
-        
-        patient_style = ParagraphStyle(
-            'PatientStyle',
-            parent=styles['Normal'],
-            fontSize=16,
-            spaceAfter=10,
-            fontName='Helvetica-Bold'
-        )
-        
-        story.append(Paragraph(f"Nom & Prénom: {patient_nom}", patient_style))
-        story.append(Paragraph(f"Âge: {age}", patient_style))
-        story.append(Spacer(1, 30))
-        
-        # Prescription
-        prescription_style = ParagraphStyle(
-            'PrescriptionTitle',
-            parent=styles['Heading2'],
-            fontSize=18,
-            spaceAfter=20,
-            textColor=colors.HexColor('#2c3e50'),
-            fontName='Helvetica-Bold'
-        )
-        
-        story.append(Paragraph("Prescription:", prescription_style))
-        
-        # Médicaments avec format EXACT du modèle
-        medicament_nom_style = ParagraphStyle(
-            'MedicamentNom',
-            parent=styles['Normal'],
-            fontSize=16,
-            spaceAfter=5,
-            textColor=colors.HexColor('#2c3e50'),
-            fontName='Helvetica-Bold'
-        )
-        
-        posologie_style = ParagraphStyle(
-            'PosologieStyle',
-            parent=styles['Normal'],
-            fontSize=14,
-            spaceAfter=20,
-            leftIndent=20,
-            textColor=colors.HexColor('#555555'),
-            fontName='Helvetica'
-        )
+        # Ordonnance enregistrée en base par la file, une fois le PDF écrit
+        donnees = self.donnees_ordonnance()
+        donnees['enregistrement'] = {
+            'patient_id': self.patient_actuel,
+            'medicaments': json.dumps([w.get_medicament_data() for w in self.medicaments_widgets]),
+            'recommandations': self.recommandations_edit.toPlainText(),
+            'date_ordonnance': self.date_edit.date().toString('yyyy-MM-dd')
+        }
         
+        # Rendu en arrière-plan : la fenêtre principale signale la fin de la génération
+        if file_pdf.ajouter('ordonnance', fichier, donnees) is None:
+            QMessageBox.critical(self, "Erreur", "Impossible de programmer la génération du PDF.")
+    
+    def donnees_ordonnance(self):
+        """Contenu variable de l'ordonnance (rendu PDF en arrière-plan)"""
+        medicaments = []
         for widget in self.medicaments_widgets:
             data = widget.get_medicament_data()
             if data['nom']:
@@ -1110,86 +989,15 @@ class OrdonnanceView(QWidget):
                 nom_complet = data['nom']
                 if data['dosage']:
                     nom_complet += f" ({data['dosage']})"
-                
-                story.append(Paragraph(nom_complet, medicament_nom_style))
-                
-                # Posologie avec flèche
-                posologie = widget.get_posologie_formatee()
-                story.append(Paragraph(f"➤ {posologie}", posologie_style))
-        
-        # Recommandations
-        recommandations = self.recommandations_edit.toPlainText()
-        if recommandations:
-            story.append(Spacer(1, 30))
-            story.append(Paragraph("Recommandations:", prescription_style))
-            
-            recommandation_style = ParagraphStyle(
-                'RecommandationStyle',
-                parent=styles['Normal'],
-                fontSize=14,
-                spaceAfter=5,
-                fontName='Helvetica'
-            )
-            
-            for ligne in recommandations.split('\n'):
-                if ligne.strip():
-                    story.append(Paragraph(ligne, recommandation_style))
-        
-        # Signature
-        story.append(Spacer(1, 70))
-        
-        signature_style = ParagraphStyle(
-            'SignatureStyle',
-            parent=styles['Normal'],
-            fontSize=14,
-            alignment=2,  # Aligné à droite
-            fontName='Helvetica-Bold'
-        )
-        
-        story.append(Paragraph("Signature du médecin", signature_style))
-        story.append(Spacer(1, 10))
-        story.append(Paragraph(self.config_cabinet['nom_medecin'], signature_style))
-
-
-        # Ligne séparatrice
-        story.append(Spacer(1, 70))
-        from reportlab.platypus import HRFlowable
-        story.append(HRFlowable(width="100%", thickness=1, color=colors.grey))
-        
-        # Coordonnées du cabinet en bas
-        story.append(Spacer(1, 10))
-        
-        contact_info = []
-        if self.config_cabinet.get('telephone1'):
-            contact_info.append(f"Tél: {self.config_cabinet['telephone1']}")
-        if self.config_cabinet.get('telephone2'):
-            contact_info.append(f"Mobile: {self.config_cabinet['telephone2']}")
-        if self.config_cabinet.get('email'):
-            contact_info.append(f"Email: {self.config_cabinet['email']}")
-        
-        contact_style = ParagraphStyle(
-            'ContactStyle',
-            parent=styles['Normal'],
-            fontSize=12,
-            alignment=0,  # Aligné à gauche
-            textColor=colors.HexColor('#7f8c8d'),
-            fontName='Helvetica'
-        )
-
-        if contact_info:
-            for info in contact_info:
-                story.append(Paragraph(info, contact_style))
-        
-        adresse = self.config_cabinet.get('adresse', '')
-        code_postal = self.config_cabinet.get('code_postal', '')
-        ville = self.config_cabinet.get('ville', '')
-        adresse_complete = f"{adresse}, {code_postal} {ville}".strip(", ")
+                medicaments.append({'nom': nom_complet, 'posologie': widget.get_posologie_formatee()})
 
-        if adresse_complete:
-            story.append(Paragraph(f"Adresse: {adresse_complete}", contact_style))
-
-        # Construire le PDF
-        doc.build(story)
+        return {
+            'date': self.date_edit.date().toString('dd/MM/yyyy'),
+            'patient': self.patient_combo.currentText(),
+            'age': self.age_label.text(),
+            'medicaments': medicaments,
+            'recommandations': self.recommandations_edit.toPlainText()
+        }
     
     def imprimer(self):
         """Imprime l'ordonnance"""
@@ -4,7 +4,7 @@ from PySide6.QtWidgets import (QWidget, QHBoxLayout, QVBoxLayout, QLabel,
                              QTableWidget, QTableWidgetItem, QHeaderView, 
                              QSplitter, QTextEdit, QSpinBox, QFormLayout,
                              QDialog, QDialogButtonBox, QMessageBox, QFileDialog,
-                             QTabWidget, QCalendarWidget, QDoubleSpinBox)
+                             QTabWidget, QCalendarWidget, QDoubleSpinBox, QProgressBar)
 from PySide6.QtCore import Qt, QDate, Signal, QDateTime
 from PySide6.QtGui import QFont, QColor, QIcon, QPainter, QPen, QBrush
 from PySide6.QtPrintSupport import QPrinter, QPrintDialog, QPrintPreviewDialog
@@ -16,15 +16,18 @@ from datetime import datetime, timedelta
 from database import db
 from src.patient_context import patient_context
 from src.path_manager import path_manager
+from src.factures_pdf import nom_fichier_facture
+from src.file_pdf import file_pdf
+from src.export_factures import ExportFacturesWorker, ExportRelevesWorker
+from src.occupation_fauteuils import calculer_occupation
+from src.statistiques_rdv import statistiques_par_jour
 
 
 try:
-    from reportlab.lib.pagesizes import A4
     from reportlab.pdfgen.canvas import Canvas
     from reportlab.lib.utils import ImageReader
-    from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
-    from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-    from reportlab.lib.units import cm
+    from reportlab.platypus import Table, TableStyle
+    from reportlab.lib.styles import ParagraphStyle
     from reportlab.lib import colors
     REPORTLAB_AVAILABLE = True
 except ImportError:
@@ -427,6 +430,177 @@ class PaiementDialog(QDialog):
         else:
             QMessageBox.critical(self, "Erreur", "Une erreur est survenue lors de l'enregistrement du paiement.")
 
+class ExportFacturesDialog(QDialog):
+    """Export par lot des factures PDF (mois, patient) dans le dossier factures/"""
+
+    LIBELLE_AUCUN = "Aucune facture pour cette sélection."
+    LIBELLE_GENERES = "Factures générées"
+
+    def __init__(self, parent=None, patient_id=None):
+        super().__init__(parent)
+        self.setWindowTitle("Export des factures")
+        self.setModal(True)
+        self.resize(460, 340)
+        self.worker = None
+        self.setup_ui()
+
+        for i in range(self.patient_combo.count()):
+            if self.patient_combo.itemData(i) == patient_id:
+                self.patient_combo.setCurrentIndex(i)
+                break
+
+    def setup_ui(self):
+        layout = QVBoxLayout(self)
+
+        self.titre_label = QLabel("Export des Factures PDF")
+        self.titre_label.setStyleSheet("font-size: 16px; font-weight: bold; color: #333; margin-bottom: 10px;")
+        self.titre_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        layout.addWidget(self.titre_label)
+
+        form_layout = QFormLayout()
+
+        self.periode_combo = QComboBox()
+        self.periode_combo.addItems(["Ce mois", "Mois précédent", "Cette année", "Toutes", "Période personnalisée"])
+        self.periode_combo.currentIndexChanged.connect(self.periode_change)
+        form_layout.addRow("Période:", self.periode_combo)
+
+        aujourd_hui = QDate.currentDate()
+        self.date_debut_edit = QDateEdit(QDate(aujourd_hui.year(), aujourd_hui.month(), 1))
+        self.date_debut_edit.setCalendarPopup(True)
+        form_layout.addRow("Du:", self.date_debut_edit)
+
+        self.date_fin_edit = QDateEdit(aujourd_hui)
+        self.date_fin_edit.setCalendarPopup(True)
+        form_layout.addRow("Au:", self.date_fin_edit)
+
+        self.patient_combo = QComboBox()
+        self.patient_combo.addItem("Tous les patients", None)
+        for patient in db.obtenir_patients():
+            self.patient_combo.addItem(f"{patient['nom']}, {patient['prenom']}", patient['id'])
+        form_layout.addRow("Patient:", self.patient_combo)
+
+        layout.addLayout(form_layout)
+
+        self.note_label = QLabel(f"Les PDF sont enregistrés dans {path_manager.get_factures_folder()}")
+        self.note_label.setStyleSheet("color: #666; font-style: italic;")
+        self.note_label.setWordWrap(True)
+        layout.addWidget(self.note_label)
+
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setFormat("%v / %m")
+        self.progress_bar.setVisible(False)
+        layout.addWidget(self.progress_bar)
+
+        self.label_resultat = QLabel("")
+        self.label_resultat.setWordWrap(True)
+        layout.addWidget(self.label_resultat)
+
+        layout.addStretch()
+
+        self.button_box = QDialogButtonBox(QDialogButtonBox.StandardButton.Ok | QDialogButtonBox.StandardButton.Close)
+        self.button_box.button(QDialogButtonBox.StandardButton.Ok).setText("Exporter")
+        self.button_box.button(QDialogButtonBox.StandardButton.Close).setText("Fermer")
+        self.button_box.accepted.connect(self.lancer_export)
+        self.button_box.rejected.connect(self.fermer)
+        layout.addWidget(self.button_box)
+
+        self.periode_change()
+
+    def periode_change(self):
+        """Met à jour les bornes selon la période choisie"""
+        periode = self.periode_combo.currentText()
+        aujourd_hui = QDate.currentDate()
+        debut_mois = QDate(aujourd_hui.year(), aujourd_hui.month(), 1)
+
+        if periode == "Ce mois":
+            self.date_debut_edit.setDate(debut_mois)
+            self.date_fin_edit.setDate(debut_mois.addMonths(1).addDays(-1))
+        elif periode == "Mois précédent":
+            self.date_debut_edit.setDate(debut_mois.addMonths(-1))
+            self.date_fin_edit.setDate(debut_mois.addDays(-1))
+        elif periode == "Cette année":
+            self.date_debut_edit.setDate(QDate(aujourd_hui.year(), 1, 1))
+            self.date_fin_edit.setDate(QDate(aujourd_hui.year(), 12, 31))
+
+        personnalisee = periode == "Période personnalisée"
+        self.date_debut_edit.setEnabled(personnalisee)
+        self.date_fin_edit.setEnabled(personnalisee)
+
+    def lancer_export(self):
+        """Démarre la génération en arrière-plan"""
+        if not REPORTLAB_AVAILABLE:
+            QMessageBox.critical(self, "Erreur", "Le module ReportLab n'est pas installé.")
+            return
+
+        toutes = self.periode_combo.currentText() == "Toutes"
+        date_debut = None if toutes else self.date_debut_edit.date().toString('yyyy-MM-dd')
+        date_fin = None if toutes else self.date_fin_edit.date().toString('yyyy-MM-dd')
+
+        self.worker = self.creer_worker(self.patient_combo.currentData(), date_debut, date_fin)
+        self.worker.progression.connect(self.maj_progression)
+        self.worker.termine.connect(self.export_termine)
+
+        self.button_box.button(QDialogButtonBox.StandardButton.Ok).setEnabled(False)
+        self.button_box.button(QDialogButtonBox.StandardButton.Close).setText("Annuler")
+        self.progress_bar.setRange(0, 0)
+        self.progress_bar.setVisible(True)
+        self.label_resultat.setText("")
+        self.worker.start()
+
+    def creer_worker(self, patient_id, date_debut, date_fin):
+        return ExportFacturesWorker(patient_id, date_debut, date_fin, parent=self)
+
+    def maj_progression(self, generees, total):
+        self.progress_bar.setRange(0, max(total, 1))
+        self.progress_bar.setValue(generees)
+
+    def export_termine(self, resume):
+        """Affiche le résumé de l'export"""
+        self.worker = None
+        self.progress_bar.setVisible(False)
+        self.button_box.button(QDialogButtonBox.StandardButton.Ok).setEnabled(True)
+        self.button_box.button(QDialogButtonBox.StandardButton.Close).setText("Fermer")
+
+        if not resume['total']:
+            self.label_resultat.setText(self.LIBELLE_AUCUN)
+            return
+
+        resultat = (f"{self.LIBELLE_GENERES}: {resume['generees']}/{resume['total']} "
+                    f"en {resume['duree']:.1f} s\n"
+                    f"Dossier: {resume['dossier']}")
+        if resume['erreurs']:
+            resultat += f"\n{len(resume['erreurs'])} erreur(s): " + "; ".join(resume['erreurs'][:3])
+        self.label_resultat.setText(resultat)
+
+    def fermer(self):
+        if self.worker is not None and self.worker.isRunning():
+            self.worker.annuler()
+            return
+        self.reject()
+
+    def reject(self):
+        # Échap et fermeture de la fenêtre : l'export s'arrête avant que le dialog disparaisse
+        if self.worker is not None and self.worker.isRunning():
+            self.worker.annuler()
+            self.worker.wait()
+        super().reject()
+
+class ExportRelevesDialog(ExportFacturesDialog):
+    """Relevés de compte PDF de tous les patients dont le solde reste dû (ou d'un patient)"""
+
+    LIBELLE_AUCUN = "Aucun patient avec un solde dû pour cette sélection."
+    LIBELLE_GENERES = "Relevés générés"
+
+    def __init__(self, parent=None, patient_id=None):
+        super().__init__(parent, patient_id)
+        self.setWindowTitle("Relevés de compte")
+        self.titre_label.setText("Relevés de Compte des Patients")
+        self.patient_combo.setItemText(0, "Tous les patients avec un solde dû")
+        self.note_label.setText(f"Les PDF sont enregistrés dans {path_manager.get_releves_folder()}")
+
+    def creer_worker(self, patient_id, date_debut, date_fin):
+        return ExportRelevesWorker(patient_id, date_debut, date_fin, parent=self)
+
 class PaiementsView(QWidget):
     """Vue principale pour la gestion des paiements"""
     
@@ -581,6 +755,16 @@ class PaiementsView(QWidget):
         self.btn_imprimer_facture.clicked.connect(self.imprimer_facture)
         actions_layout.addWidget(self.btn_imprimer_facture)
         
+        self.btn_exporter_factures = QPushButton("Exporter le lot")
+        self.btn_exporter_factures.setToolTip("Générer les PDF de toutes les factures d'une période ou d'un patient")
+        self.btn_exporter_factures.clicked.connect(self.exporter_factures)
+        actions_layout.addWidget(self.btn_exporter_factures)
+        
+        self.btn_releves = QPushButton("Relevés de compte")
+        self.btn_releves.setToolTip("Générer le relevé de compte des patients dont le solde reste dû")
+        self.btn_releves.clicked.connect(self.exporter_releves)
+        actions_layout.addWidget(self.btn_releves)
+        
         self.btn_payer_facture = QPushButton("Enregistrer Paiement")
         self.btn_payer_facture.clicked.connect(self.payer_facture)
         actions_layout.addWidget(self.btn_payer_facture)
@@ -706,6 +890,31 @@ class PaiementsView(QWidget):
         resume_layout.addWidget(self.label_reste_a_payer, 2, 0, 1, 2)
         
         layout.addWidget(resume_group)
+        
+        # Occupation des fauteuils sur la même période
+        occupation_group = QGroupBox("Occupation des fauteuils")
+        occupation_layout = QVBoxLayout(occupation_group)
+        
+        self.chart_occupation = QChartView()
+        self.chart_occupation.setRenderHint(QPainter.RenderHint.Antialiasing)
+        self.chart_occupation.setMinimumHeight(220)
+        occupation_layout.addWidget(self.chart_occupation)
+        
+        self.label_occupation = QLabel("Taux d'occupation: -")
+        occupation_layout.addWidget(self.label_occupation)
+        
+        layout.addWidget(occupation_group)
+        
+        # Absences et annulations (cumuls de tout l'historique)
+        absences_group = QGroupBox("Absences et annulations (tout l'historique)")
+        absences_layout = QVBoxLayout(absences_group)
+        
+        self.chart_absences = QChartView()
+        self.chart_absences.setRenderHint(QPainter.RenderHint.Antialiasing)
+        self.chart_absences.setMinimumHeight(220)
+        absences_layout.addWidget(self.chart_absences)
+        
+        layout.addWidget(absences_group)
     
     def charger_donnees(self):
         """Charge les données initiales"""
@@ -871,6 +1080,82 @@ class PaiementsView(QWidget):
         # Mettre à jour les graphiques
         self.actualiser_graphique_modes(stats.get('modes_paiement', {}))
         self.actualiser_graphique_factures(stats_factures)
+        self.actualiser_occupation()
+        self.actualiser_absences()
+    
+    def actualiser_absences(self):
+        """Actualise les taux d'absence et d'annulation par jour de la semaine"""
+        set_absences = QBarSet("Absences (%)")
+        set_annulations = QBarSet("Annulations (%)")
+        jours = []
+        for jour, absence, annulation in statistiques_par_jour():
+            jours.append(jour)
+            set_absences.append(round((absence or 0) * 100, 1))
+            set_annulations.append(round((annulation or 0) * 100, 1))
+        series = QBarSeries()
+        series.append(set_absences)
+        series.append(set_annulations)
+        
+        chart = QChart()
+        chart.addSeries(series)
+        chart.setTitle("Taux d'absence et d'annulation par jour de la semaine")
+        
+        axisX = QBarCategoryAxis()
+        axisX.append(jours)
+        chart.addAxis(axisX, Qt.AlignmentFlag.AlignBottom)
+        series.attachAxis(axisX)
+        
+        axisY = QValueAxis()
+        axisY.setRange(0, 100)
+        axisY.setLabelFormat("%d %%")
+        chart.addAxis(axisY, Qt.AlignmentFlag.AlignLeft)
+        series.attachAxis(axisY)
+        self.chart_absences.setChart(chart)
+    
+    def actualiser_occupation(self):
+        """Actualise le taux d'occupation des fauteuils pour la période choisie"""
+        occupation = calculer_occupation(self.stats_date_debut.date().toPython(),
+                                         self.stats_date_fin.date().toPython())
+        if occupation is None:
+            self.label_occupation.setText("Taux d'occupation: NumPy n'est pas installé")
+            return
+        
+        # Barres : taux de chaque fauteuil (%)
+        set_taux = QBarSet("Occupation (%)")
+        for taux in occupation['taux_fauteuils']:
+            set_taux.append(round(taux * 100, 1))
+        series = QBarSeries()
+        series.append(set_taux)
+        
+        chart = QChart()
+        chart.addSeries(series)
+        chart.setTitle("Minutes réservées / minutes d'ouverture par fauteuil")
+        
+        axisX = QBarCategoryAxis()
+        axisX.append([f"Fauteuil {f}" for f in occupation['fauteuils']])
+        chart.addAxis(axisX, Qt.AlignmentFlag.AlignBottom)
+        series.attachAxis(axisX)
+        
+        axisY = QValueAxis()
+        axisY.setRange(0, 100)
+        axisY.setLabelFormat("%d %%")
+        chart.addAxis(axisY, Qt.AlignmentFlag.AlignLeft)
+        series.attachAxis(axisY)
+        chart.legend().setVisible(False)
+        self.chart_occupation.setChart(chart)
+        
+        if occupation['taux_global'] is None:
+            self.label_occupation.setText("Taux d'occupation: aucun jour ouvré sur la période")
+            return
+        heures_reservees = int((occupation['reserve'] * (occupation['disponible'] > 0)).sum()) / 60
+        heures_disponibles = int(occupation['disponible'].sum()) / 60
+        texte = (f"Taux d'occupation: {occupation['taux_global'] * 100:.1f} % "
+                 f"({heures_reservees:.1f} h réservées sur {heures_disponibles:.1f} h d'ouverture)")
+        taux_jours = occupation['taux_jours']
+        if taux_jours.max() > 0:
+            jour = occupation['jours'][int(taux_jours.argmax())]
+            texte += f" – jour le plus chargé: {jour.strftime('%d/%m/%Y')} ({taux_jours.max() * 100:.0f} %)"
+        self.label_occupation.setText(texte)
     
     def actualiser_graphique_modes(self, stats_modes):
         """Actualise le graphique des modes de paiement"""
@@ -1046,7 +1331,7 @@ class PaiementsView(QWidget):
             QMessageBox.critical(self, "Erreur", "Le module ReportLab n'est pas installé.")
             return
 
-        fichier_defaut = os.path.join(path_manager.get_factures_folder(), f"facture_{numero_facture}.pdf")
+        fichier_defaut = os.path.join(path_manager.get_factures_folder(), nom_fichier_facture(numero_facture))
         fichier, _ = QFileDialog.getSaveFileName(
             self, "Enregistrer la facture", fichier_defaut, "PDF Files (*.pdf)"
         )
@@ -1067,67 +1352,27 @@ class PaiementsView(QWidget):
             if not details:
                 raise ValueError("Aucun détail trouvé pour cette facture.")
 
-            # 📄 Création PDF avec image de fond
-            from reportlab.pdfgen import canvas
-            from reportlab.lib.pagesizes import A4
-
-            largeur, hauteur = A4
-            c = canvas.Canvas(fichier, pagesize=A4)
-
-            # 🖼️ Ajouter image de fond si existe
-            image_path = os.path.join(os.path.dirname(__file__), "..", "..", "assets", "icons", "grosse_dent.ico")
-            if os.path.exists(image_path):
-                try:
-                    c.drawImage(image_path, 0, 0, width=largeur, height=hauteur, mask='auto')
-                except Exception as img_err:
-                    QMessageBox.critical(self, "Erreur", f"Erreur lors de l'ajout de l'image de fond: {str(img_err)}")
-
-            # ✏️ Texte général
-            x_margin = 50
-            y = hauteur - 80
-
-            c.setFont("Helvetica-Bold", 18)
-            c.drawString(x_margin, y, f"Facture N° {numero_facture}")
-
-            y -= 30
-            c.setFont("Helvetica", 12)
-            c.drawString(x_margin, y, f"Date : {facture_info['date_facture']}")
-            y -= 20
-            c.drawString(x_margin, y, f"Patient : {patient}")
-
-            # 🧾 Tableau des actes
-            y -= 40
-            c.setFont("Helvetica-Bold", 12)
-            c.drawString(x_margin, y, "Acte")
-            c.drawString(x_margin + 200, y, "Quantité")
-            c.drawString(x_margin + 300, y, "PU (DT)")
-            c.drawString(x_margin + 400, y, "Total (DT)")
-
-            y -= 20
-            c.setFont("Helvetica", 11)
-            total = 0
-            for d in details:
-                c.drawString(x_margin, y, d['libelle'])
-                c.drawString(x_margin + 200, y, str(d['quantite']))
-                c.drawString(x_margin + 300, y, f"{d['prix_unitaire']:.2f}")
-                c.drawString(x_margin + 400, y, f"{d['montant_total']:.2f}")
-                total += d['montant_total']
-                y -= 20
-
-            # 🧮 Total général
-            y -= 20
-            c.setFont("Helvetica-Bold", 12)
-            c.drawRightString(x_margin + 500, y, f"TOTAL : {total:.2f} DT")
-
-            # ✒️ Signature (optionnel)
-            c.setFont("Helvetica", 9)
-            c.drawString(2 * cm, 2.5 * cm, "Signature du médecin : _______________________")
-
-            c.save()
-
-            QMessageBox.information(self, "Succès", "Facture PDF générée avec succès.")
+            # Rendu en arrière-plan : la fenêtre principale signale la fin de la génération
+            travail_id = file_pdf.ajouter('facture', fichier, {
+                'numero_facture': numero_facture,
+                'date_facture': facture_info['date_facture'],
+                'patient': patient,
+                'lignes': details
+            })
+            if travail_id is None:
+                raise ValueError("Impossible de programmer la génération du PDF.")
         except Exception as e:
             QMessageBox.critical(self, "Erreur", f"Erreur lors de l'impression : {str(e)}")
+
+    def exporter_factures(self):
+        """Exporte en PDF toutes les factures d'une période ou d'un patient"""
+        dialog = ExportFacturesDialog(self, self.facture_patient_combo.currentData())
+        dialog.exec()
+
+    def exporter_releves(self):
+        """Génère les relevés de compte de la période (patients au solde dû)"""
+        dialog = ExportRelevesDialog(self, self.facture_patient_combo.currentData())
+        dialog.exec()
    
     def payer_facture(self):
         """Enregistre un paiement pour une facture"""
@@ -1195,21 +1440,7 @@ class PaiementsView(QWidget):
         if not fichier:
             return
 
-        try:
-            doc = SimpleDocTemplate(fichier, pagesize=A4)
-            styles = getSampleStyleSheet()
-            contenu = []
-
-            contenu.append(Paragraph(f"<b>Reçu de Paiement</b>", styles["Title"]))
-            contenu.append(Spacer(1, 12))
-            contenu.append(Paragraph(f"Patient : {patient}", styles["Normal"]))
-            contenu.append(Paragraph(f"Date : {date}", styles["Normal"]))
-            contenu.append(Paragraph(f"Montant payé : {montant}", styles["Normal"]))
-            contenu.append(Paragraph(f"Mode de paiement : {mode}", styles["Normal"]))
-            contenu.append(Spacer(1, 24))
-            contenu.append(Paragraph("Merci pour votre paiement.", styles["Normal"]))
-
-            doc.build(contenu)
-            QMessageBox.information(self, "Succès", "Reçu enregistré avec succès.")
-        except Exception as e:
-            QMessageBox.critical(self, "Erreur", f"Erreur lors de l'impression du reçu :\n{str(e)}")
\ No newline at end of file
+        # Rendu en arrière-plan : la fenêtre principale signale la fin de la génération
+        recu = {'patient': patient, 'date': date, 'montant': montant, 'mode': mode}
+        if file_pdf.ajouter('recu', fichier, recu) is None:
+            QMessageBox.critical(self, "Erreur", "Impossible de programmer la génération du reçu.")
\ No newline at end of file